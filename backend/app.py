@@ -1,16 +1,76 @@
+from utils.startup_profile import startup_profile  # First, so the boot clock covers every import below
+import time
+from datetime import datetime
+from functools import lru_cache
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from config.database import db
-from routes import session_routes, chat_routes, auth_route
+from routes import session_routes, chat_routes, auth_route, admin_routes
 from contextlib import asynccontextmanager
+from utils.metrics import metrics
+from utils.mongo_monitoring import pool_stats
+from services.session_service import session_service
+from services.usage_service import usage_service
+from services.quota_service import quota_service
+from services.evaluation_service import evaluation_queue, evaluation_pool
+from services.archive_service import archive_service
+from services.stream_service import stream_service
+from services.speculation_service import speculation_service
+from services.search_service import search_service
+from services.analytics_service import analytics_service
+from services.runtime_settings import runtime_settings
+from services.shared_state import shared_state
+from config.constants import EVALUATION_IN_PROCESS, ARCHIVE_ENABLED
+
+startup_profile.mark("imports")
 
 # Database events handled via lifespan
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    await db.connect_db()
+    with startup_profile.phase("connect_db"):
+        await db.connect_db()
+    try:
+        with startup_profile.phase("indexes"):
+            await session_service.ensure_indexes()
+            await usage_service.ensure_indexes()
+            await evaluation_queue.ensure_indexes()
+            await archive_service.ensure_indexes()
+            await stream_service.ensure_indexes()
+            await search_service.ensure_indexes()
+            await analytics_service.ensure_indexes()
+            await shared_state.ensure_indexes()
+        with startup_profile.phase("backfills"):
+            await session_service.backfill_message_counts()
+            await session_service.backfill_question_index()
+            await search_service.rebuild_if_empty()
+            await shared_state.load_revocations()
+    except Exception as e:
+        print(f"⚠️ Could not prepare session collection: {e}")
+    runtime_settings.start()
+    shared_state.start()
+    usage_service.start()
+    search_service.start()
+    analytics_service.start()
+    quota_service.start()
+    if EVALUATION_IN_PROCESS:
+        evaluation_pool.start()
+    if ARCHIVE_ENABLED:
+        archive_service.start()
+    startup_profile.ready()
     try:
         yield
     finally:
+        await runtime_settings.stop()
+        await shared_state.stop()
+        await speculation_service.stop()
+        await stream_service.stop()
+        await archive_service.stop()
+        await evaluation_pool.stop()
+        await quota_service.stop()
+        await usage_service.stop()
+        await search_service.stop()
+        await analytics_service.stop()
         await db.close_db()
 
 # Create FastAPI app
@@ -35,18 +95,30 @@ app.add_middleware(
 app.include_router(auth_route.router)
 app.include_router(session_routes.router)
 app.include_router(chat_routes.router)
+app.include_router(admin_routes.router)
 
 # Health check endpoint
 @app.get("/")
 async def root():
     return {"message": "Interview Bot API is running! 🚀"}
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """Prometheus-format metrics for this worker"""
+    return metrics.render()
+
+@lru_cache(maxsize=None)
+def _psutil():
+    """psutil (optional) is only needed by /health: imported on the first check, not at boot"""
+    try:
+        import psutil
+        return psutil
+    except ImportError:
+        return None
+
 @app.get("/health")
 async def health_check():
     """Comprehensive health check endpoint for monitoring and debugging."""
-    import time
-    from datetime import datetime
-    
     health_status = {
         "status": "healthy",
         "timestamp": datetime.utcnow().isoformat(),
@@ -71,6 +143,7 @@ async def health_check():
     except Exception as e:
         health_status["checks"]["database"] = f"error: {str(e)}"
         health_status["status"] = "degraded"
+    health_status["checks"]["database_pool"] = pool_stats()
     
     # Check AI service (OpenRouter API key)
     try:
@@ -86,7 +159,9 @@ async def health_check():
     
     # Check memory usage
     try:
-        import psutil
+        psutil = _psutil()
+        if psutil is None:
+            raise ImportError("psutil")
         memory = psutil.virtual_memory()
         health_status["checks"]["memory"] = {
             "total_gb": round(memory.total / (1024**3), 2),
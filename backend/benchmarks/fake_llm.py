@@ -0,0 +1,159 @@
+# Local stand-in for the OpenRouter chat completions API
+import asyncio
+import json
+import random
+import time
+from dataclasses import dataclass, asdict
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+WORDS = (
+    "great answer let us move on to the next question how would you approach "
+    "optimizing a campaign when the cost per result keeps rising over time"
+).split()
+
+
+@dataclass
+class FakeLLMConfig:
+    token_rate: float = 50.0          # Tokens per second while streaming (0 = no pacing)
+    latency: float = 0.2              # Seconds before the first token / full response
+    error_rate: float = 0.0           # Probability of answering with an HTTP error
+    error_status: int = 503           # Status code used for injected errors
+    reply_tokens: int = 40            # Tokens per generated reply
+    keepalive_every: int = 10         # Emit a ": keep-alive" comment every N tokens (0 = never)
+    seed: int = 0
+
+
+class FakeLLM:
+    """Streams OpenRouter-shaped SSE responses with configurable pacing and failures"""
+
+    def __init__(self, config: FakeLLMConfig):
+        self.config = config
+        self.random = random.Random(config.seed)
+        self.stats = {"requests": 0, "streams": 0, "errors_injected": 0}
+        self._seen_prefixes = set()
+
+    def _reply_tokens(self):
+        return [self.random.choice(WORDS) + " " for _ in range(self.config.reply_tokens)]
+
+    def _usage(self, messages):
+        prompt_tokens = sum(len(str(m.get("content", "")).split()) for m in messages)
+
+        # Emulate provider prefix caching: a first message seen before counts as cached
+        cached_tokens = 0
+        if messages:
+            first = str(messages[0].get("content", ""))
+            if first in self._seen_prefixes:
+                cached_tokens = len(first.split())
+            else:
+                self._seen_prefixes.add(first)
+
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": self.config.reply_tokens,
+            "total_tokens": prompt_tokens + self.config.reply_tokens,
+            "prompt_tokens_details": {"cached_tokens": cached_tokens},
+            # OpenRouter reports the charge in credits; use a flat per-token price
+            "cost": round((prompt_tokens + self.config.reply_tokens) * 1e-6, 8),
+        }
+
+    def _chunk(self, created: int, delta: dict, finish_reason=None) -> bytes:
+        body = {
+            "id": f"gen-fake-{created}",
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": "fake/model",
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }
+        return f"data: {json.dumps(body)}\n\n".encode()
+
+    async def completions(self, request: Request):
+        payload = await request.json()
+        self.stats["requests"] += 1
+
+        await asyncio.sleep(self.config.latency)
+        if self.random.random() < self.config.error_rate:
+            self.stats["errors_injected"] += 1
+            return JSONResponse(
+                status_code=self.config.error_status,
+                content={"error": {"message": "Injected failure", "code": self.config.error_status}},
+            )
+
+        messages = payload.get("messages", [])
+        tokens = self._reply_tokens()
+        created = int(time.time())
+
+        if not payload.get("stream"):
+            content = "".join(tokens).strip() + "?"
+            if messages and '"score"' in str(messages[0].get("content", "")):
+                # Evaluation scorer prompts ask for a JSON verdict
+                content = json.dumps({"score": self.random.randint(1, 10), "summary": "".join(tokens[:8]).strip()})
+            return {
+                "id": f"gen-fake-{created}",
+                "object": "chat.completion",
+                "created": created,
+                "model": "fake/model",
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }],
+                "usage": self._usage(messages),
+            }
+
+        self.stats["streams"] += 1
+        delay = 1.0 / self.config.token_rate if self.config.token_rate > 0 else 0
+
+        async def event_stream():
+            yield self._chunk(created, {"role": "assistant", "content": ""})
+            for i, token in enumerate(tokens):
+                if self.config.keepalive_every and i and i % self.config.keepalive_every == 0:
+                    yield b": OPENROUTER PROCESSING\n\n"
+                yield self._chunk(created, {"content": token})
+                if delay:
+                    await asyncio.sleep(delay)
+            yield self._chunk(created, {"content": "?"}, finish_reason="stop")
+            usage_chunk = {"id": f"gen-fake-{created}", "choices": [], "usage": self._usage(messages)}
+            yield f"data: {json.dumps(usage_chunk)}\n\n".encode()
+            yield b"data: [DONE]\n\n"
+
+        return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
+def create_fake_llm_app(config: FakeLLMConfig) -> FastAPI:
+    """Build a FastAPI app exposing POST /api/v1/chat/completions"""
+    fake = FakeLLM(config)
+    app = FastAPI(title="Fake OpenRouter")
+    app.state.fake = fake
+    app.add_api_route("/api/v1/chat/completions", fake.completions, methods=["POST"])
+
+    @app.get("/stats")
+    async def stats():
+        return {"config": asdict(config), **fake.stats}
+
+    return app
+
+
+if __name__ == "__main__":
+    import argparse
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Run the fake OpenRouter server")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--token-rate", type=float, default=50.0)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--reply-tokens", type=int, default=40)
+    args = parser.parse_args()
+
+    uvicorn.run(
+        create_fake_llm_app(FakeLLMConfig(
+            token_rate=args.token_rate,
+            latency=args.latency,
+            error_rate=args.error_rate,
+            reply_tokens=args.reply_tokens,
+        )),
+        host="127.0.0.1",
+        port=args.port,
+        log_level="warning",
+    )
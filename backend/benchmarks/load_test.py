@@ -0,0 +1,258 @@
+"""
+End-to-end load test: boots app.py against the fake OpenRouter server and drives
+N concurrent simulated candidates through full interviews.
+
+    python -m benchmarks.load_test --candidates 50 --concurrency 10 --mongo memory
+    python -m benchmarks.load_test --mongo mongodb://localhost:27017 --output bench/results.json
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.common import summarize, save_results  # noqa: E402
+
+CANDIDATE_ANSWER = (
+    "I would start by checking the audience overlap and frequency, then look at creative "
+    "fatigue and the attribution window before changing the bid strategy."
+)
+
+
+def _serve(args: argparse.Namespace) -> None:
+    """Child process: run the fake LLM and the API in one event loop"""
+    import uvicorn
+    from benchmarks.fake_llm import FakeLLMConfig, create_fake_llm_app
+
+    os.environ["OPENROUTER_API_URL"] = f"http://127.0.0.1:{args.llm_port}/api/v1/chat/completions"
+    os.environ["OPENROUTER_API_KEY"] = "benchmark-key"
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+    os.environ.setdefault("ALGORITHM", "HS256")
+    os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+    os.environ["DATABASE_NAME"] = args.database
+    os.environ["LLM_RATE_LIMIT_PER_MINUTE"] = str(args.rate_limit)
+    if args.mongo != "memory":
+        os.environ["MONGODB_URL"] = args.mongo
+
+    from config.database import Database
+    if args.mongo == "memory":
+        try:
+            from mongomock_motor import AsyncMongoMockClient
+        except ImportError:
+            print("❌ --mongo memory requires the optional 'mongomock-motor' package")
+            sys.exit(2)
+
+        async def connect_memory_db(cls):
+            cls.client = AsyncMongoMockClient()
+            cls.database = cls.client[args.database]
+            print("✅ Connected to in-memory MongoDB stand-in.")
+
+        Database.connect_db = classmethod(connect_memory_db)
+
+    from app import app
+
+    fake_app = create_fake_llm_app(FakeLLMConfig(
+        token_rate=args.token_rate,
+        latency=args.latency,
+        error_rate=args.error_rate,
+        reply_tokens=args.reply_tokens,
+        seed=args.seed,
+    ))
+
+    async def main():
+        servers = [
+            uvicorn.Server(uvicorn.Config(fake_app, host="127.0.0.1", port=args.llm_port, log_level="warning")),
+            uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=args.api_port, log_level="warning")),
+        ]
+        await asyncio.gather(*(server.serve() for server in servers))
+
+    asyncio.run(main())
+
+
+class LoadTest:
+    """Drives simulated candidates and records per-endpoint timings"""
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.base_url = f"http://127.0.0.1:{args.api_port}"
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.ttft: List[float] = []
+        self.streamed_chars = 0
+        self.completed_interviews = 0
+
+    async def _timed(self, client: httpx.AsyncClient, name: str, method: str, url: str, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.errors[name] += 1
+            return None
+        self.latencies[name].append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            self.errors[name] += 1
+            return None
+        return response
+
+    async def _stream_turn(self, client: httpx.AsyncClient, session_id: str) -> bool:
+        started = time.perf_counter()
+        first_token_at = None
+        try:
+            async with client.stream(
+                "POST", "/api/chat/stream",
+                json={"session_id": session_id, "message": CANDIDATE_ANSWER},
+            ) as response:
+                if response.status_code >= 400:
+                    await response.aread()
+                    self.errors["POST /api/chat/stream"] += 1
+                    return False
+                async for chunk in response.aiter_text():
+                    if chunk and first_token_at is None:
+                        first_token_at = time.perf_counter()
+                    self.streamed_chars += len(chunk)
+        except httpx.HTTPError:
+            self.errors["POST /api/chat/stream"] += 1
+            return False
+
+        self.latencies["POST /api/chat/stream"].append(time.perf_counter() - started)
+        if first_token_at is not None:
+            self.ttft.append(first_token_at - started)
+        return True
+
+    async def run_candidate(self, client: httpx.AsyncClient) -> None:
+        from services.interview_flow import interview_flows
+
+        response = await self._timed(
+            client, "POST /api/sessions/init", "POST", "/api/sessions/init",
+            json={"role_id": self.args.role},
+        )
+        if response is None:
+            return
+        session_id = response.json()["session_id"]
+
+        response = await self._timed(
+            client, "POST /api/sessions/start", "POST", "/api/sessions/start",
+            json={"session_id": session_id},
+        )
+        if response is None:
+            return
+
+        # start_interview asks question 1; each answer advances one question
+        for _ in range(interview_flows.for_role(self.args.role).total_questions - 1):
+            if not await self._stream_turn(client, session_id):
+                return
+
+        response = await self._timed(
+            client, "GET /api/sessions/{id}/status", "GET", f"/api/sessions/{session_id}/status",
+        )
+        if response is not None and response.json().get("interview_completed"):
+            self.completed_interviews += 1
+
+        await self._timed(
+            client, "GET /api/sessions/{id}/history", "GET", f"/api/sessions/{session_id}/history",
+        )
+
+    async def run(self) -> dict:
+        semaphore = asyncio.Semaphore(self.args.concurrency)
+        limits = httpx.Limits(max_connections=self.args.concurrency * 2)
+        timeout = httpx.Timeout(self.args.request_timeout)
+
+        async with httpx.AsyncClient(base_url=self.base_url, limits=limits, timeout=timeout) as client:
+            async def guarded():
+                async with semaphore:
+                    await self.run_candidate(client)
+
+            started = time.perf_counter()
+            await asyncio.gather(*(guarded() for _ in range(self.args.candidates)))
+            elapsed = time.perf_counter() - started
+
+        total_requests = sum(len(samples) for samples in self.latencies.values())
+        return {
+            "elapsed_s": round(elapsed, 3),
+            "candidates": self.args.candidates,
+            "completed_interviews": self.completed_interviews,
+            "interviews_per_s": round(self.completed_interviews / elapsed, 3),
+            "requests_per_s": round(total_requests / elapsed, 3),
+            "streamed_chars_per_s": round(self.streamed_chars / elapsed, 1),
+            "ttft": summarize(self.ttft),
+            "endpoints": {name: summarize(samples) for name, samples in sorted(self.latencies.items())},
+            "errors": dict(self.errors),
+        }
+
+
+async def _wait_until_ready(base_url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get("/")).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"API did not become ready at {base_url}")
+
+
+def print_report(results: dict) -> None:
+    print(f"\n⏱️  {results['completed_interviews']}/{results['candidates']} interviews in {results['elapsed_s']}s "
+          f"({results['interviews_per_s']} interviews/s, {results['requests_per_s']} req/s)")
+    ttft = results["ttft"]
+    if ttft.get("count"):
+        print(f"   TTFT  p50={ttft['p50_ms']}ms p95={ttft['p95_ms']}ms p99={ttft['p99_ms']}ms")
+    for name, stats in results["endpoints"].items():
+        print(f"   {name:<34} n={stats['count']:<5} p50={stats['p50_ms']}ms "
+              f"p95={stats['p95_ms']}ms p99={stats['p99_ms']}ms")
+    if results["errors"]:
+        print(f"   errors: {results['errors']}")
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Interview Bot end-to-end load test")
+    parser.add_argument("--candidates", type=int, default=20, help="Simulated candidates (full interviews)")
+    parser.add_argument("--concurrency", type=int, default=10, help="Candidates interviewing at once")
+    parser.add_argument("--role", default="meta-ads-expert")
+    parser.add_argument("--mongo", default="memory", help="'memory' or a MongoDB URL")
+    parser.add_argument("--database", default="interview_bot_bench")
+    parser.add_argument("--api-port", type=int, default=8801)
+    parser.add_argument("--llm-port", type=int, default=8901)
+    parser.add_argument("--token-rate", type=float, default=200.0, help="Fake LLM tokens per second")
+    parser.add_argument("--latency", type=float, default=0.05, help="Fake LLM latency before first token (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fake LLM error probability")
+    parser.add_argument("--reply-tokens", type=int, default=40)
+    parser.add_argument("--rate-limit", type=int, default=1_000_000, help="AIService requests per minute")
+    parser.add_argument("--request-timeout", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write results JSON to this path")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    server = multiprocessing.get_context("spawn").Process(target=_serve, args=(args,), daemon=True)
+    server.start()
+    try:
+        base_url = f"http://127.0.0.1:{args.api_port}"
+        asyncio.run(_wait_until_ready(base_url))
+        results = asyncio.run(LoadTest(args).run())
+    finally:
+        server.terminate()
+        server.join(timeout=10)
+
+    print_report(results)
+    if args.output:
+        config = {k: v for k, v in vars(args).items() if k != "output"}
+        save_results(args.output, "load_test", config, results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
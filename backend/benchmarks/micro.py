@@ -0,0 +1,262 @@
+"""
+Micro-benchmarks for per-turn serialization and model hot paths.
+
+    python -m benchmarks.micro                                   # run and print
+    python -m benchmarks.micro --save bench/micro-baseline.json  # record a baseline
+    python -m benchmarks.micro --compare bench/micro-baseline.json --max-regression 0.15
+
+With --compare the run exits non-zero when any benchmark's median is slower than
+the baseline by more than --max-regression (fraction, per benchmark).
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import timeit
+import warnings
+from datetime import datetime
+from typing import Callable, Dict, List, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.common import save_results  # noqa: E402
+
+# Realistic transcript sizes: system prompt + 19-question interview, and a long outlier
+MESSAGE_COUNTS = (1 + 2 * 19, 101)
+
+BENCHMARKS: List[Tuple[str, Callable[[], Callable[[], object]]]] = []
+
+
+def benchmark(name: str):
+    """Register a benchmark; the decorated factory returns the callable to time"""
+    def register(factory):
+        BENCHMARKS.append((name, factory))
+        return factory
+    return register
+
+
+def _session_document(message_count: int) -> dict:
+    from data.role_prompts import ROLE_PROMPTS
+    from models.session import Session, Message
+
+    messages = [Message(**ROLE_PROMPTS["meta-ads-expert"])]
+    for i in range(message_count - 1):
+        role = "assistant" if i % 2 == 0 else "user"
+        messages.append(Message(role=role, content=f"Message {i}: " + "campaign budget optimization " * 8))
+    return Session(session_id="bench-session", role_id="meta-ads-expert", messages=messages).dict(by_alias=True)
+
+
+def _sse_lines(tokens: int = 40) -> List[str]:
+    lines = ['data: {"id":"gen-1","choices":[{"index":0,"delta":{"role":"assistant","content":""}}]}']
+    for i in range(tokens):
+        chunk = {"id": "gen-1", "object": "chat.completion.chunk", "model": "openai/gpt-4o-mini",
+                 "choices": [{"index": 0, "delta": {"content": f"token{i} "}, "finish_reason": None}]}
+        lines.append("data: " + json.dumps(chunk))
+        lines.append("")
+        if i % 10 == 9:
+            lines.append(": OPENROUTER PROCESSING")
+    lines.append("data: [DONE]")
+    return lines
+
+
+for _count in MESSAGE_COUNTS:
+    @benchmark(f"session_to_llm_payload[{_count}]")
+    def _payload_factory(count=_count):
+        from services.session_service import SessionService
+        from services.ai_service import ai_service
+        from services.prompt_registry import prompt_registry
+
+        document = _session_document(count)
+        prompt = prompt_registry.variant("meta-ads-expert", "moderate")
+        phase_context = "CURRENT STATUS: Question 9/19"
+
+        def run():
+            return ai_service._prepare_messages(SessionService.build_llm_messages(document), phase_context, prompt)
+        return run
+
+    @benchmark(f"session_dict_by_alias[{_count}]")
+    def _session_dict_factory(count=_count):
+        from models.session import Session, Message
+
+        document = _session_document(count)
+        messages = [Message(**msg) for msg in document["messages"]]
+
+        def run():
+            return Session(session_id="bench-session", role_id="meta-ads-expert", messages=messages).dict(by_alias=True)
+        return run
+
+
+# /history on a 20-question transcript: FastAPI's default path vs FastJSONResponse
+HISTORY_MESSAGES = 1 + 2 * 20
+
+
+@benchmark("history_render_default[20q]")
+def _history_default_factory():
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+
+    history = _session_document(HISTORY_MESSAGES)["messages"][1:]
+
+    def run():
+        return JSONResponse(jsonable_encoder(history)).body
+    return run
+
+
+@benchmark("history_render_fast[20q]")
+def _history_fast_factory():
+    from utils.responses import FastJSONResponse
+
+    history = _session_document(HISTORY_MESSAGES)["messages"][1:]
+
+    def run():
+        return FastJSONResponse(history).body
+    return run
+
+
+@benchmark("message_dict")
+def _message_dict_factory():
+    from models.session import Message
+
+    def run():
+        return Message(role="assistant", content="What does CPM stand for?").dict()
+    return run
+
+
+@benchmark("user_response_from_user")
+def _user_response_factory():
+    from models.user import User, UserResponse
+
+    user = User(email="candidate@example.com", password_hash="x" * 60, name="Candidate",
+                sessions=[f"session-{i}" for i in range(25)]).dict(by_alias=True)
+
+    def run():
+        return UserResponse.from_user(user).dict()
+    return run
+
+
+# Reading a completed transcript back out of its compressed subdocument
+for _count in MESSAGE_COUNTS:
+    @benchmark(f"transcript_decode[{_count}]")
+    def _transcript_decode_factory(count=_count):
+        from utils.transcript_codec import pack_transcript, unpack_transcript
+
+        transcript = pack_transcript(_session_document(count)["messages"])
+
+        def run():
+            return unpack_transcript(transcript)
+        return run
+
+
+@benchmark("minhash_signature[answer]")
+def _minhash_signature_factory():
+    from utils.minhash import MinHasher, shingles
+
+    hasher = MinHasher(64)
+    answer = "CPM stands for cost per mille, the price an advertiser pays for a thousand impressions."
+
+    def run():
+        return hasher.signature(shingles(answer))
+    return run
+
+
+@benchmark("stream_parsing[40 tokens]")
+def _stream_parsing_factory():
+    from utils.sse import SSEDecoder, DONE
+
+    # Split the stream into network-sized chunks that cut frames in half
+    payload = "\n".join(_sse_lines()).encode() + b"\n\n"
+    chunks = [payload[i:i + 256] for i in range(0, len(payload), 256)]
+
+    def run():
+        decoder = SSEDecoder()
+        out = []
+        for chunk in chunks:
+            for data in decoder.feed(chunk):
+                if data == DONE:
+                    return out
+                delta = decoder.extract_content(data)
+                if delta:
+                    out.append(delta)
+        return out
+    return run
+
+
+def measure(func: Callable[[], object], rounds: int, min_time: float) -> Dict[str, float]:
+    """Time func over several rounds; each round loops enough calls to last min_time"""
+    timer = timeit.Timer(func)
+    number, elapsed = timer.autorange()
+    if elapsed < min_time:
+        number = max(1, int(number * min_time / max(elapsed, 1e-9)))
+    samples = [t / number for t in timer.repeat(repeat=rounds, number=number)]
+    median = statistics.median(samples)
+    return {
+        "rounds": rounds,
+        "iterations": number,
+        "min_us": round(min(samples) * 1e6, 3),
+        "median_us": round(median * 1e6, 3),
+        "mean_us": round(statistics.mean(samples) * 1e6, 3),
+        "stddev_us": round(statistics.pstdev(samples) * 1e6, 3),
+        "ops_per_s": round(1 / median, 1) if median else 0.0,
+    }
+
+
+def compare(results: Dict[str, dict], baseline_path: str, max_regression: float) -> List[str]:
+    """Return a description of every benchmark slower than the baseline allows"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)["results"]
+
+    failures = []
+    for name, stats in results.items():
+        if name not in baseline:
+            continue
+        before, after = baseline[name]["median_us"], stats["median_us"]
+        change = (after - before) / before if before else 0.0
+        marker = "❌" if change > max_regression else "✅"
+        print(f"   {marker} {name:<36} {before:>10.3f}us -> {after:>10.3f}us ({change:+.1%})")
+        if change > max_regression:
+            failures.append(f"{name}: {change:+.1%} (limit {max_regression:+.0%})")
+    return failures
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Interview Bot micro-benchmarks")
+    parser.add_argument("--filter", help="Only run benchmarks whose name contains this")
+    parser.add_argument("--rounds", type=int, default=7)
+    parser.add_argument("--min-time", type=float, default=0.2, help="Seconds per round")
+    parser.add_argument("--save", help="Write results JSON (usable as a --compare baseline)")
+    parser.add_argument("--compare", help="Baseline JSON to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.15,
+                        help="Allowed median slowdown vs baseline before failing (0.15 = 15%%)")
+    args = parser.parse_args(argv)
+
+    # The app still uses pydantic's v1-style .dict(); keep the report readable
+    warnings.simplefilter("ignore", DeprecationWarning)
+
+    results = {}
+    started = datetime.utcnow()
+    for name, factory in BENCHMARKS:
+        if args.filter and args.filter not in name:
+            continue
+        stats = measure(factory(), args.rounds, args.min_time)
+        results[name] = stats
+        print(f"   {name:<36} median={stats['median_us']:>10.3f}us  min={stats['min_us']:>10.3f}us  "
+              f"({stats['ops_per_s']:,.0f} ops/s)")
+    print(f"⏱️  {len(results)} benchmarks in {(datetime.utcnow() - started).total_seconds():.1f}s")
+
+    if args.save:
+        save_results(args.save, "micro", {"rounds": args.rounds, "min_time": args.min_time}, results)
+
+    if args.compare:
+        failures = compare(results, args.compare, args.max_regression)
+        if failures:
+            print("❌ Performance regressions:\n   " + "\n   ".join(failures))
+            return 1
+        print("✅ No regressions beyond threshold")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
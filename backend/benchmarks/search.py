@@ -0,0 +1,157 @@
+"""
+Transcript search latency at scale: seeds a synthetic search index and times
+the admin search queries (filter only, keywords, keywords plus filter, phrase).
+
+    python -m benchmarks.search --sessions 20000                       # in-process backend
+    python -m benchmarks.search --mongo mongodb://localhost:27017 --sessions 200000 --target-ms 100
+
+With --mongo the index is written to a scratch database (--database, dropped
+first) and searched with the mongo backend, text index included. The run exits
+non-zero when a query's p95 is above --target-ms.
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+import warnings
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.common import save_results, summarize  # noqa: E402
+
+ROLES = ("meta-ads-expert", "google-ads-expert", "seo-specialist", "data-analyst")
+PHASES = ("greeting", "easy", "moderate", "scenario", "hard", "expert")
+QUERIES = {
+    "filter_only": (None, {"role_id": "meta-ads-expert", "completed": True}),
+    "all_recent": (None, {}),
+    "keywords": ("budget campaign", {}),
+    "keywords_filtered": ("budget campaign", {"phase": "hard"}),
+    "phrase": ('"conversion rate"', {}),
+}
+
+
+def _documents(count: int, messages: int, seed: int = 7):
+    """Search index documents shaped like SearchService.flush writes them"""
+    from benchmarks.fake_llm import WORDS
+
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    for number in range(count):
+        updated_at = now - timedelta(seconds=rng.randint(0, 90 * 86400))
+        contents = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 60))) for _ in range(messages)]
+        if number % 50 == 0:
+            contents.append("We tracked the conversion rate per ad set.")
+        yield {
+            "session_id": f"bench-{number}",
+            "role_id": rng.choice(ROLES),
+            "phase": rng.choice(PHASES),
+            "question_count": rng.randint(0, 19),
+            "completed": rng.random() < 0.6,
+            "user_email": None,
+            "is_guest": False,
+            "contents": contents,
+            "created_at": updated_at,
+            "updated_at": updated_at,
+            "expires_from": updated_at,
+        }
+
+
+async def _seed_mongo(service, count: int, messages: int) -> None:
+    batch = []
+    for document in _documents(count, messages):
+        batch.append(document)
+        if len(batch) == 1000:
+            await service.collection.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        await service.collection.insert_many(batch, ordered=False)
+    await service.ensure_indexes()
+
+
+def _seed_memory(service, count: int, messages: int) -> None:
+    for document in _documents(count, messages):
+        contents = document.pop("contents")
+        service.index_session({
+            "session_id": document["session_id"],
+            "role_id": document["role_id"],
+            "metadata": {
+                "current_phase": document["phase"],
+                "question_count": document["question_count"],
+                "interview_completed": document["completed"],
+                "created_at": document["created_at"],
+            },
+        })
+        for content in contents:
+            service.record(document["session_id"], content=content)
+
+
+async def run(args) -> dict:
+    from services.search_service import SearchService, SearchFilter
+
+    if args.mongo:
+        from config.database import Database
+        from motor.motor_asyncio import AsyncIOMotorClient
+
+        Database.client = AsyncIOMotorClient(args.mongo)
+        Database.database = Database.client[args.database]
+        await Database.client.drop_database(args.database)
+        service = SearchService("mongo")
+        await service.ensure_indexes()
+        started = time.perf_counter()
+        await _seed_mongo(service, args.sessions, args.messages)
+    else:
+        service = SearchService("memory")
+        started = time.perf_counter()
+        _seed_memory(service, args.sessions, args.messages)
+    print(f"   Seeded {args.sessions:,} sessions ({args.messages} messages each) in {time.perf_counter() - started:.1f}s")
+
+    results = {}
+    for name, (text, fields) in QUERIES.items():
+        search_filter = SearchFilter(**fields)
+        await service.search(text, search_filter)  # Warm up caches and plans
+        samples = []
+        for round_number in range(args.rounds):
+            query_started = time.perf_counter()
+            response = await service.search(text, search_filter, page=1 + round_number % 3)
+            samples.append(time.perf_counter() - query_started)
+        results[name] = {"total": response["total"], **summarize(samples)}
+
+    if args.mongo:
+        await Database.client.drop_database(args.database)
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=20000)
+    parser.add_argument("--messages", type=int, default=20, help="Indexed messages per session")
+    parser.add_argument("--rounds", type=int, default=30, help="Timed runs per query")
+    parser.add_argument("--mongo", help="MongoDB URL; default is the in-process backend")
+    parser.add_argument("--database", default="search_benchmark", help="Scratch database (dropped)")
+    parser.add_argument("--target-ms", type=float, default=100.0, help="p95 budget per query")
+    parser.add_argument("--output", help="Write results JSON to this path")
+    args = parser.parse_args(argv)
+    warnings.simplefilter("ignore", DeprecationWarning)
+
+    results = asyncio.run(run(args))
+    over = []
+    for name, stats in results.items():
+        flag = "" if stats["p95_ms"] <= args.target_ms else "  ❌ over target"
+        print(f"   {name:<18} total={stats['total']:>8,}  p50={stats['p50_ms']:>8.2f}ms  p95={stats['p95_ms']:>8.2f}ms{flag}")
+        if flag:
+            over.append(name)
+
+    if args.output:
+        config = {key: value for key, value in vars(args).items() if key not in ("output", "mongo")}
+        config["backend"] = "mongo" if args.mongo else "memory"
+        save_results(args.output, "search", config, results)
+    return 1 if over else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+"""
+Worker cold-start benchmark: how long `import app` takes in a fresh interpreter,
+and which packages that time goes to (from `python -X importtime`).
+
+    python -m benchmarks.startup                                    # run and print
+    python -m benchmarks.startup --save bench/startup-baseline.json
+    python -m benchmarks.startup --compare bench/startup-baseline.json --max-regression 0.2
+
+With --compare the run exits non-zero when the median import time is slower
+than the baseline by more than --max-regression (fraction).
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.common import save_results  # noqa: E402
+
+# Enough configuration for the app to import without a .env file
+BOOT_ENV = {"SECRET_KEY": "benchmark-secret", "ALGORITHM": "HS256", "ACCESS_TOKEN_EXPIRE_MINUTES": "30"}
+
+
+def import_once(module: str) -> Tuple[float, Dict[str, float]]:
+    """Import `module` in a fresh interpreter: total seconds and self seconds per top-level package"""
+    env = {**BOOT_ENV, **os.environ}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    packages: Dict[str, float] = defaultdict(float)
+    total = 0.0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        packages[name.split(".")[0]] += int(self_us) / 1e6
+        if name == module:
+            total = int(cumulative_us) / 1e6
+    return total, packages
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Interview Bot cold-start benchmark")
+    parser.add_argument("--module", default="app", help="Module to import (default: app)")
+    parser.add_argument("--rounds", type=int, default=7)
+    parser.add_argument("--top", type=int, default=15, help="Packages to list in the breakdown")
+    parser.add_argument("--save", help="Write results JSON (usable as a --compare baseline)")
+    parser.add_argument("--compare", help="Baseline JSON to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2,
+                        help="Allowed median slowdown vs baseline before failing (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    totals: List[float] = []
+    per_package: Dict[str, List[float]] = defaultdict(list)
+    for _ in range(args.rounds):
+        total, packages = import_once(args.module)
+        totals.append(total)
+        for package, seconds in packages.items():
+            per_package[package].append(seconds)
+
+    breakdown = {package: statistics.median(samples) for package, samples in per_package.items()}
+    median_ms = statistics.median(totals) * 1000
+    print(f"   import {args.module:<30} median={median_ms:>8.1f}ms  min={min(totals) * 1000:>8.1f}ms  ({args.rounds} rounds)")
+    for package, seconds in sorted(breakdown.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"      {package:<32} {seconds * 1000:>8.1f}ms  ({seconds * 1000 / median_ms:.0%})")
+
+    results = {
+        f"import[{args.module}]": {"median_ms": round(median_ms, 3), "min_ms": round(min(totals) * 1000, 3)},
+        "packages_ms": {package: round(seconds * 1000, 3) for package, seconds in breakdown.items()},
+    }
+    if args.save:
+        save_results(args.save, "startup", {"rounds": args.rounds, "module": args.module}, results)
+
+    if args.compare:
+        with open(args.compare) as f:
+            before = json.load(f)["results"][f"import[{args.module}]"]["median_ms"]
+        change = (median_ms - before) / before if before else 0.0
+        marker = "❌" if change > args.max_regression else "✅"
+        print(f"   {marker} import[{args.module}] {before:.1f}ms -> {median_ms:.1f}ms ({change:+.1%})")
+        if change > args.max_regression:
+            print(f"❌ Startup regression: {change:+.1%} (limit {args.max_regression:+.0%})")
+            return 1
+        print("✅ No regressions beyond threshold")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""
+Storage size and read latency of completed transcripts: plain messages array
+versus the compressed transcript for each available codec.
+
+    python -m benchmarks.transcript_storage
+    python -m benchmarks.transcript_storage --messages 39 101 401 --output bench/transcripts.json
+
+Read latency is measured on the BSON bytes a driver would receive, so it covers
+document decoding plus (for compressed sessions) transcript decompression.
+"""
+import argparse
+import os
+import sys
+import warnings
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+import bson  # noqa: E402
+
+from benchmarks.common import save_results  # noqa: E402
+from benchmarks.micro import MESSAGE_COUNTS, _session_document, measure  # noqa: E402
+
+
+def _realistic_document(message_count: int) -> dict:
+    """Session document whose answers vary like real text (repetition flatters compressors)"""
+    from benchmarks.fake_llm import WORDS
+    import random
+
+    rng = random.Random(message_count)
+    document = _session_document(message_count)
+    for message in document["messages"][1:]:
+        message["content"] = " ".join(rng.choice(WORDS) for _ in range(rng.randint(20, 120)))
+    return document
+
+
+def run(message_counts, rounds: int, min_time: float) -> dict:
+    from utils.transcript_codec import CODECS, pack_transcript, unpack_transcript, zstandard
+
+    codecs = [name for name in CODECS if name != "zstd" or zstandard is not None]
+    results = {}
+    for count in message_counts:
+        document = _realistic_document(count)
+        plain = bson.encode(document)
+        results[f"plain[{count}]"] = {
+            "document_bytes": len(plain),
+            **measure(lambda: bson.decode(plain)["messages"], rounds, min_time),
+        }
+
+        for codec in codecs:
+            compressed_document = {key: value for key, value in document.items() if key != "messages"}
+            compressed_document["transcript"] = pack_transcript(document["messages"], codec)
+            stored = bson.encode(compressed_document)
+
+            def read_full():
+                return unpack_transcript(bson.decode(stored)["transcript"])
+
+            results[f"{codec}[{count}]"] = {
+                "document_bytes": len(stored),
+                "ratio": round(len(plain) / len(stored), 2),
+                **measure(read_full, rounds, min_time),
+                "pack_us": measure(lambda: pack_transcript(document["messages"], codec), rounds, min_time)["median_us"],
+            }
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, nargs="+", default=list(MESSAGE_COUNTS),
+                        help="Transcript lengths (including the system prompt)")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.1, help="Seconds per round")
+    parser.add_argument("--output", help="Write results JSON to this path")
+    args = parser.parse_args(argv)
+    warnings.simplefilter("ignore", DeprecationWarning)
+
+    results = run(args.messages, args.rounds, args.min_time)
+    for name, stats in results.items():
+        ratio = f"  x{stats['ratio']:<5}" if "ratio" in stats else " " * 8
+        pack = f"  pack={stats['pack_us']:>9.1f}us" if "pack_us" in stats else ""
+        print(f"   {name:<14} {stats['document_bytes']:>9,} B{ratio}  read={stats['median_us']:>9.1f}us{pack}")
+
+    if args.output:
+        save_results(args.output, "transcript_storage", {k: v for k, v in vars(args).items() if k != "output"}, results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
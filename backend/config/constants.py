@@ -1,12 +1,46 @@
 import os
-from dotenv import load_dotenv
+from config.settings import tunables
+
+# Every tunable is read through `tunables` (typed, validated, APP_PROFILE defaults);
+# reloadable=True marks the subset services/runtime_settings.py may change at runtime.
 
 # Database configuration
-DATABASE_NAME = os.getenv("DATABASE_NAME", "interview_bot")
+DATABASE_NAME = tunables.string("DATABASE_NAME", "interview_bot")
+
+# MongoDB client: connection pool, timeouts and wire compression
+MONGO_APP_NAME = tunables.string("MONGO_APP_NAME", "interview-bot")
+MONGO_MAX_POOL_SIZE = tunables.integer("MONGO_MAX_POOL_SIZE", 100, minimum=1)
+MONGO_MIN_POOL_SIZE = tunables.integer("MONGO_MIN_POOL_SIZE", 5, minimum=0)
+MONGO_MAX_IDLE_TIME_MS = tunables.integer("MONGO_MAX_IDLE_TIME_MS", 300000, minimum=0)
+MONGO_WAIT_QUEUE_TIMEOUT_MS = tunables.integer("MONGO_WAIT_QUEUE_TIMEOUT_MS", 5000, minimum=1)
+MONGO_SERVER_SELECTION_TIMEOUT_MS = tunables.integer("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000, minimum=1)
+MONGO_CONNECT_TIMEOUT_MS = tunables.integer("MONGO_CONNECT_TIMEOUT_MS", 10000, minimum=1)
+MONGO_COMPRESSORS = tunables.string("MONGO_COMPRESSORS", "zstd,zlib")
+MONGO_RETRY_WRITES = tunables.flag("MONGO_RETRY_WRITES", True)
+MONGO_COMMAND_MONITORING = tunables.flag("MONGO_COMMAND_MONITORING", True)
+
+# Read preference for read-only endpoints (history, status, session listings).
+# "primary" keeps them read-your-writes; e.g. "secondaryPreferred" offloads them
+# to secondaries that lag by at most MONGO_MAX_STALENESS_SECONDS (>= 90).
+MONGO_READ_ONLY_PREFERENCE = tunables.string(
+    "MONGO_READ_ONLY_PREFERENCE", "primary",
+    choices=("primary", "primaryPreferred", "secondary", "secondaryPreferred", "nearest")
+)
+MONGO_MAX_STALENESS_SECONDS = tunables.integer("MONGO_MAX_STALENESS_SECONDS", 90, minimum=90)
 
 # Collection names
 SESSIONS_COLLECTION = "sessions"
 USERS_COLLECTION = "users"
+USAGE_ROLLUPS_COLLECTION = "usage_rollups"
+EVALUATION_JOBS_COLLECTION = "evaluation_jobs"
+ARCHIVE_COLLECTION = "sessions_archive"
+STREAMS_COLLECTION = "streams"
+SEARCH_COLLECTION = "search_index"
+ANALYTICS_ROLLUPS_COLLECTION = "analytics_rollups"
+RATE_LIMITS_COLLECTION = "rate_limits"
+LEASES_COLLECTION = "leases"
+REVOKED_TOKENS_COLLECTION = "revoked_tokens"
+SHARED_EVENTS_COLLECTION = "shared_events"
 
 # Interview flow configuration
 INTERVIEW_FLOW = {
@@ -20,8 +54,134 @@ INTERVIEW_FLOW = {
 
 TOTAL_QUESTIONS = sum(phase["count"] for phase in INTERVIEW_FLOW.values())
 
+# Per-role flow overrides ({"roles": {role_id: {phase: {"count": n}}}}), hot-reloaded
+INTERVIEW_FLOWS_FILE = tunables.string(
+    "INTERVIEW_FLOWS_FILE",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "interview_flows.json")
+)
+
+# Data-file role prompts (<role_id>.json), loaded lazily and hot-reloaded
+PROMPTS_DIR = tunables.string(
+    "PROMPTS_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "prompts")
+)
+
+# History pagination
+HISTORY_MAX_PAGE_SIZE = 200
+HISTORY_FIELDS = ("role", "content", "timestamp")
+
 # API Configuration
-OPENROUTER_API_URL =os.getenv("OPENROUTER_API_URL", "https://openrouter.ai/api/v1/chat/completions")
-DEFAULT_MODEL = os.getenv("DEFAULT_MODEL", "openai/gpt-4o-mini")
-DEFAULT_TEMPERATURE = os.getenv("DEFAULT_TEMPERATURE", 0.7)
-DEFAULT_MAX_TOKENS = os.getenv("DEFAULT_MAX_TOKENS", 300)
+OPENROUTER_API_URL = tunables.string("OPENROUTER_API_URL", "https://openrouter.ai/api/v1/chat/completions")
+DEFAULT_MODEL = tunables.string("DEFAULT_MODEL", "openai/gpt-4o-mini", reloadable=True)
+DEFAULT_TEMPERATURE = tunables.number("DEFAULT_TEMPERATURE", 0.7, minimum=0, maximum=2, reloadable=True)
+DEFAULT_MAX_TOKENS = tunables.integer("DEFAULT_MAX_TOKENS", 300, minimum=1, reloadable=True)
+
+# Upstream LLM calls: process-wide rate limit, timeout and retries with exponential backoff
+LLM_RATE_LIMIT_PER_MINUTE = tunables.integer("LLM_RATE_LIMIT_PER_MINUTE", 10, minimum=1, reloadable=True)
+LLM_REQUEST_TIMEOUT_SECONDS = tunables.number("LLM_REQUEST_TIMEOUT_SECONDS", 30.0, minimum=1, reloadable=True)
+LLM_MAX_RETRIES = tunables.integer("LLM_MAX_RETRIES", 3, minimum=0, maximum=10, reloadable=True)
+LLM_RETRY_BASE_DELAY_SECONDS = tunables.number("LLM_RETRY_BASE_DELAY_SECONDS", 1.0, minimum=0, reloadable=True)
+LLM_RETRY_MAX_DELAY_SECONDS = tunables.number("LLM_RETRY_MAX_DELAY_SECONDS", 60.0, minimum=0, reloadable=True)
+LLM_RETRY_BACKOFF_FACTOR = tunables.number("LLM_RETRY_BACKOFF_FACTOR", 2.0, minimum=1)
+
+# Concurrent identical LLM requests (double clicks, client retries) share one upstream call
+LLM_COALESCE_REQUESTS = tunables.flag("LLM_COALESCE_REQUESTS", True, reloadable=True)
+LLM_COALESCE_MAX_BUFFER_CHARS = tunables.integer("LLM_COALESCE_MAX_BUFFER_CHARS", 65536, minimum=0)
+
+# Usage accounting: rollup writes are buffered and flushed in batches
+USAGE_FLUSH_INTERVAL_SECONDS = tunables.number("USAGE_FLUSH_INTERVAL_SECONDS", 10, minimum=0.1)
+
+# Interview funnel rollups (admin stats) are buffered like usage rollups
+ANALYTICS_FLUSH_INTERVAL_SECONDS = tunables.number("ANALYTICS_FLUSH_INTERVAL_SECONDS", 10, minimum=0.1)
+
+# Transcript search: "mongo" (text index, shared by all workers) or "memory" (in-process, single worker)
+SEARCH_BACKEND = tunables.string("SEARCH_BACKEND", "mongo", choices=("mongo", "memory"))
+SEARCH_FLUSH_INTERVAL_SECONDS = tunables.number("SEARCH_FLUSH_INTERVAL_SECONDS", 2, minimum=0.1)  # Index lag behind writes
+SEARCH_LANGUAGE = tunables.string("SEARCH_LANGUAGE", "english")  # Stemming and stop words of the text index
+SEARCH_MAX_PAGE_SIZE = tunables.integer("SEARCH_MAX_PAGE_SIZE", 50, minimum=1)
+
+# Budget quotas (0 disables a limit); tenants are email domains
+DAILY_TOKEN_QUOTA_PER_USER = tunables.integer("DAILY_TOKEN_QUOTA_PER_USER", 0, minimum=0, reloadable=True)
+DAILY_TOKEN_QUOTA_PER_TENANT = tunables.integer("DAILY_TOKEN_QUOTA_PER_TENANT", 0, minimum=0, reloadable=True)
+MAX_CONCURRENT_INTERVIEWS_PER_USER = tunables.integer("MAX_CONCURRENT_INTERVIEWS_PER_USER", 0, minimum=0, reloadable=True)
+QUOTA_RECONCILE_INTERVAL_SECONDS = tunables.number("QUOTA_RECONCILE_INTERVAL_SECONDS", 30, minimum=1)
+ACTIVE_INTERVIEW_WINDOW_HOURS = tunables.integer("ACTIVE_INTERVIEW_WINDOW_HOURS", 24, minimum=1)  # Idle longer = abandoned
+
+# Post-interview evaluation (run in the API process or via scripts/evaluation_worker.py)
+EVALUATION_IN_PROCESS = tunables.flag("EVALUATION_IN_PROCESS", True)
+EVALUATION_SCORER = tunables.string("EVALUATION_SCORER", "llm", choices=("llm", "deterministic"))
+EVALUATION_WORKERS = tunables.integer("EVALUATION_WORKERS", 2, minimum=1)
+EVALUATION_BATCH_SIZE = tunables.integer("EVALUATION_BATCH_SIZE", 5, minimum=1)
+EVALUATION_MAX_CONCURRENCY = tunables.integer("EVALUATION_MAX_CONCURRENCY", 2, minimum=1)  # Concurrent scoring LLM calls
+EVALUATION_MAX_ATTEMPTS = tunables.integer("EVALUATION_MAX_ATTEMPTS", 3, minimum=1)
+EVALUATION_POLL_INTERVAL_SECONDS = tunables.number("EVALUATION_POLL_INTERVAL_SECONDS", 5, minimum=0.1)
+EVALUATION_LEASE_SECONDS = tunables.integer("EVALUATION_LEASE_SECONDS", 300, minimum=1)  # Running jobs older than this are retried
+EVALUATION_RATE_RESERVE = tunables.integer("EVALUATION_RATE_RESERVE", 4, minimum=0)  # Rate-limit slots kept for live turns
+EVALUATION_DEFER_SECONDS = tunables.number("EVALUATION_DEFER_SECONDS", 60, minimum=1)  # Wait when the rate limit has no room
+EVALUATION_MAX_DEFERRALS = tunables.integer("EVALUATION_MAX_DEFERRALS", 20, minimum=0)  # Then a deferral spends an attempt
+
+# Bulk transcript export
+EXPORT_BATCH_SIZE = tunables.integer("EXPORT_BATCH_SIZE", 200, minimum=1)  # Sessions per cursor batch
+EXPORT_PARQUET_ROW_GROUP = tunables.integer("EXPORT_PARQUET_ROW_GROUP", 5000, minimum=1)  # Messages per parquet row group
+
+# Session lifecycle: keep the hot sessions collection small
+ARCHIVE_ENABLED = tunables.flag("ARCHIVE_ENABLED", True)
+ARCHIVE_INTERVAL_SECONDS = tunables.number("ARCHIVE_INTERVAL_SECONDS", 600, minimum=1)
+ARCHIVE_BATCH_SIZE = tunables.integer("ARCHIVE_BATCH_SIZE", 200, minimum=1)
+ARCHIVE_COMPLETED_AFTER_HOURS = tunables.integer("ARCHIVE_COMPLETED_AFTER_HOURS", 24, minimum=0)  # Idle completed interviews
+ARCHIVE_STALE_AFTER_DAYS = tunables.integer("ARCHIVE_STALE_AFTER_DAYS", 14, minimum=1)  # Abandoned signed-in interviews
+GUEST_SESSION_TTL_DAYS = tunables.integer("GUEST_SESSION_TTL_DAYS", 7, minimum=1)  # Abandoned guest sessions are deleted
+
+# Completed transcripts are stored compressed: "auto" (zstd when installed), "zstd" or "zlib"
+TRANSCRIPT_CODEC = tunables.string("TRANSCRIPT_CODEC", "auto", choices=("auto", "zstd", "zlib"))
+
+# Resumable streams: partial replies are checkpointed so clients can reattach
+STREAM_CHECKPOINT_INTERVAL_SECONDS = tunables.number("STREAM_CHECKPOINT_INTERVAL_SECONDS", 1.0, minimum=0.05)
+STREAM_STALE_AFTER_SECONDS = tunables.number("STREAM_STALE_AFTER_SECONDS", 60, minimum=1)
+STREAM_LIVE_RETENTION_SECONDS = tunables.number("STREAM_LIVE_RETENTION_SECONDS", 120, minimum=0)
+STREAM_RETENTION_HOURS = tunables.integer("STREAM_RETENTION_HOURS", 24, minimum=1)
+
+# Speculative next question while the candidate types (opt-in): "off", "warm"
+# (prime the provider's prompt cache) or "generate" (draft the reply to the draft)
+SPECULATION_MODE = tunables.string("SPECULATION_MODE", "off", choices=("off", "warm", "generate"))
+SPECULATION_BUDGET_PER_SESSION = tunables.integer("SPECULATION_BUDGET_PER_SESSION", 6, minimum=0, reloadable=True)  # Speculative LLM calls
+SPECULATION_MIN_DRAFT_CHARS = tunables.integer("SPECULATION_MIN_DRAFT_CHARS", 20, minimum=1)
+SPECULATION_MAX_CONCURRENCY = tunables.integer("SPECULATION_MAX_CONCURRENCY", 8, minimum=1)
+SPECULATION_RATE_RESERVE = tunables.integer("SPECULATION_RATE_RESERVE", 2, minimum=0)  # Rate-limit slots kept for real turns
+SPECULATION_TTL_SECONDS = tunables.number("SPECULATION_TTL_SECONDS", 600, minimum=1)
+
+# Repeated-question detection: fingerprints of asked questions live in session metadata
+QUESTION_DEDUP_ENABLED = tunables.flag("QUESTION_DEDUP_ENABLED", True, reloadable=True)
+QUESTION_DEDUP_THRESHOLD = tunables.number("QUESTION_DEDUP_THRESHOLD", 0.7, minimum=0, maximum=1, reloadable=True)  # Estimated Jaccard similarity
+QUESTION_DEDUP_NUM_PERM = tunables.integer("QUESTION_DEDUP_NUM_PERM", 32, minimum=1)
+
+# Local answer cache for repetitive phases: "off", "serve" (reuse the reply) or
+# "seed" (give it to the LLM as a reference). Similarities are MinHash estimates.
+ANSWER_CACHE_MODE = tunables.string("ANSWER_CACHE_MODE", "off", choices=("off", "serve", "seed"), reloadable=True)
+ANSWER_CACHE_PHASES = tunables.string("ANSWER_CACHE_PHASES", "easy")  # Comma-separated
+ANSWER_CACHE_QUESTION_THRESHOLD = tunables.number("ANSWER_CACHE_QUESTION_THRESHOLD", 0.8, minimum=0, maximum=1, reloadable=True)
+ANSWER_CACHE_ANSWER_THRESHOLD = tunables.number("ANSWER_CACHE_ANSWER_THRESHOLD", 0.85, minimum=0, maximum=1, reloadable=True)
+ANSWER_CACHE_MAX_ANSWER_CHARS = tunables.integer("ANSWER_CACHE_MAX_ANSWER_CHARS", 400, minimum=1)
+ANSWER_CACHE_MAX_ENTRIES = tunables.integer("ANSWER_CACHE_MAX_ENTRIES", 5000, minimum=1)
+ANSWER_CACHE_TTL_SECONDS = tunables.number("ANSWER_CACHE_TTL_SECONDS", 86400, minimum=1, reloadable=True)
+ANSWER_CACHE_NUM_PERM = tunables.integer("ANSWER_CACHE_NUM_PERM", 64, minimum=1)
+ANSWER_CACHE_BANDS = tunables.integer("ANSWER_CACHE_BANDS", 16, minimum=1)
+
+# Multi-worker mode: rate limits, session leases, revoked tokens and cache invalidation
+# are shared through SHARED_STATE_BACKEND ("memory" = this process only, "mongo" = all workers)
+SHARED_STATE_BACKEND = tunables.string("SHARED_STATE_BACKEND", "memory", choices=("memory", "mongo"))
+SHARED_STATE_POLL_INTERVAL_SECONDS = tunables.number("SHARED_STATE_POLL_INTERVAL_SECONDS", 1.0, minimum=0.1)  # Event delivery lag
+SESSION_LEASE_SECONDS = tunables.integer("SESSION_LEASE_SECONDS", 180, minimum=1)  # Longest turn a crashed worker can block
+WEB_CONCURRENCY = tunables.integer("WEB_CONCURRENCY", 0, minimum=0)  # Workers started by scripts/serve.py; 0 = one per CPU core
+PORT = tunables.integer("PORT", 8000, minimum=1, maximum=65535)
+
+# Runtime overrides of the reloadable settings above ({"NAME": value}), polled for changes
+RUNTIME_SETTINGS_FILE = tunables.string(
+    "RUNTIME_SETTINGS_FILE",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "runtime_settings.json")
+)
+RUNTIME_SETTINGS_CHECK_INTERVAL_SECONDS = tunables.number("RUNTIME_SETTINGS_CHECK_INTERVAL_SECONDS", 10, minimum=1)
+
+tunables.require(MONGO_MIN_POOL_SIZE <= MONGO_MAX_POOL_SIZE, "MONGO_MIN_POOL_SIZE must not exceed MONGO_MAX_POOL_SIZE")
+tunables.require(ANSWER_CACHE_NUM_PERM % ANSWER_CACHE_BANDS == 0, "ANSWER_CACHE_NUM_PERM must be a multiple of ANSWER_CACHE_BANDS")
+tunables.check()
@@ -1,23 +1,81 @@
 from motor.motor_asyncio import AsyncIOMotorClient
-import os
-from dotenv import load_dotenv
-from .constants import DATABASE_NAME
+import warnings
+from typing import Any, Dict, List
+from pymongo.compression_support import validate_compressors
+from pymongo.read_preferences import Primary, PrimaryPreferred, Secondary, SecondaryPreferred, Nearest
+from .constants import (
+    DATABASE_NAME, MONGO_APP_NAME, MONGO_MAX_POOL_SIZE, MONGO_MIN_POOL_SIZE, MONGO_MAX_IDLE_TIME_MS,
+    MONGO_WAIT_QUEUE_TIMEOUT_MS, MONGO_SERVER_SELECTION_TIMEOUT_MS, MONGO_CONNECT_TIMEOUT_MS,
+    MONGO_COMPRESSORS, MONGO_RETRY_WRITES, MONGO_COMMAND_MONITORING,
+    MONGO_READ_ONLY_PREFERENCE, MONGO_MAX_STALENESS_SECONDS
+)
+from utils.mongo_monitoring import PoolMetricsListener, CommandMetricsListener
+from .settings import settings
 
-load_dotenv()
+READ_PREFERENCES = {
+    "primaryPreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondaryPreferred": SecondaryPreferred,
+    "nearest": Nearest,
+}
+
+def _available_compressors(names: str) -> List[str]:
+    """Configured wire compressors the driver can use here (zstd/snappy need optional packages)"""
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return validate_compressors(None, [name.strip() for name in names.split(",") if name.strip()])
+
+
+def read_only_preference(name: str = MONGO_READ_ONLY_PREFERENCE, max_staleness: int = MONGO_MAX_STALENESS_SECONDS):
+    """Read preference for read-only endpoints; secondaries are bounded by max_staleness"""
+    if name == "primary":
+        return Primary()
+    if name not in READ_PREFERENCES:
+        raise ValueError(f"Unknown read preference '{name}'. Use one of: primary, {', '.join(READ_PREFERENCES)}")
+    return READ_PREFERENCES[name](max_staleness=max_staleness)
+
+
+def client_options() -> Dict[str, Any]:
+    """AsyncIOMotorClient keyword options (these take precedence over MONGODB_URL query options)"""
+    listeners = [PoolMetricsListener()]
+    if MONGO_COMMAND_MONITORING:
+        listeners.append(CommandMetricsListener())
+    options = {
+        "appname": MONGO_APP_NAME,
+        "maxPoolSize": MONGO_MAX_POOL_SIZE,
+        "minPoolSize": MONGO_MIN_POOL_SIZE,
+        "maxIdleTimeMS": MONGO_MAX_IDLE_TIME_MS,
+        "waitQueueTimeoutMS": MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "connectTimeoutMS": MONGO_CONNECT_TIMEOUT_MS,
+        "retryWrites": MONGO_RETRY_WRITES,
+        "event_listeners": listeners,
+    }
+    compressors = _available_compressors(MONGO_COMPRESSORS)
+    if compressors:
+        options["compressors"] = ",".join(compressors)
+    return options
 
-# MongoDB configuration
-MONGODB_URL = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
 
 class Database:
     client: AsyncIOMotorClient = None
     database = None
+    read_only_database = None
     
     @classmethod
     async def connect_db(cls):
-        """Create database connection."""
-        cls.client = AsyncIOMotorClient(MONGODB_URL)
+        """Create database connection and check that the server is reachable."""
+        cls.client = AsyncIOMotorClient(settings.mongodb_url, **client_options())
         cls.database = cls.client[DATABASE_NAME]
-        print("✅ Connected to MongoDB.")
+        cls.read_only_database = cls.client.get_database(DATABASE_NAME, read_preference=read_only_preference())
+        try:
+            await cls.client.admin.command("ping")
+        except Exception as e:
+            print(f"❌ Could not reach MongoDB: {e}")
+            cls.client.close()
+            cls.client = cls.database = cls.read_only_database = None
+            raise
+        print(f"✅ Connected to MongoDB (pool {MONGO_MIN_POOL_SIZE}-{MONGO_MAX_POOL_SIZE}, read-only reads: {MONGO_READ_ONLY_PREFERENCE}).")
         
     @classmethod
     async def close_db(cls):
@@ -27,10 +85,17 @@ class Database:
             print("✅ Disconnected from MongoDB.")
     
     @classmethod
-    def get_collection(cls, collection_name: str):
-        """Get a collection from the database."""
+    def get_collection(cls, collection_name: str, read_only: bool = False):
+        """
+        Get a collection from the database.
+
+        read_only collections follow MONGO_READ_ONLY_PREFERENCE, so they may be
+        served by a secondary and lag behind recent writes.
+        """
         if cls.database is None:
             raise RuntimeError("Database not connected. Call connect_db() first.")
+        if read_only and cls.read_only_database is not None:
+            return cls.read_only_database[collection_name]
         return cls.database[collection_name]
 
 # Database instance
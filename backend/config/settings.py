@@ -0,0 +1,185 @@
+# Process settings: .env is loaded here, once, before anything reads the environment
+import os
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Per-environment defaults (APP_PROFILE). Explicit environment variables always win.
+PROFILES: Dict[str, Dict[str, str]] = {
+    "development": {},
+    "test": {
+        "SEARCH_BACKEND": "memory",
+        "ARCHIVE_ENABLED": "false",
+        "EVALUATION_SCORER": "deterministic",
+        "LLM_MAX_RETRIES": "0",
+        "MONGO_COMMAND_MONITORING": "false",
+    },
+    "production": {
+        "MONGO_MIN_POOL_SIZE": "10",
+        "SHARED_STATE_BACKEND": "mongo",
+    },
+}
+
+# Settings a profile refuses to start without
+PROFILE_REQUIRED: Dict[str, Tuple[str, ...]] = {
+    "production": ("SECRET_KEY", "ALGORITHM", "MONGODB_URL", "OPENROUTER_API_KEY"),
+}
+
+_TRUE = ("true", "1", "yes", "on")
+_FALSE = ("false", "0", "no", "off")
+
+
+class SettingsError(ValueError):
+    """One or more settings are missing or invalid"""
+
+
+def _parse_bool(raw: str) -> bool:
+    value = raw.strip().lower()
+    if value in _TRUE:
+        return True
+    if value in _FALSE:
+        return False
+    raise ValueError(raw)
+
+
+@dataclass(frozen=True)
+class SettingSpec:
+    """How one setting is parsed and validated"""
+    name: str
+    kind: str  # "string", "integer", "number" or "boolean" (for messages)
+    parse: Callable[[str], Any]
+    minimum: Optional[float] = None
+    maximum: Optional[float] = None
+    choices: Optional[Tuple[str, ...]] = None
+    reloadable: bool = False  # May be changed at runtime (services/runtime_settings.py)
+    secret: bool = False  # Never shown by the admin settings endpoint
+
+    def coerce(self, raw: Any) -> Any:
+        """Parsed and validated value; raises ValueError with a readable message"""
+        if raw is None:
+            return None
+        try:
+            value = self.parse(raw) if isinstance(raw, str) else self.parse(str(raw))
+        except ValueError:
+            raise ValueError(f"{self.name}={raw!r} is not a valid {self.kind}")
+        if self.choices is not None and value not in self.choices:
+            raise ValueError(f"{self.name}={value!r} must be one of: {', '.join(self.choices)}")
+        if self.minimum is not None and value < self.minimum:
+            raise ValueError(f"{self.name}={value!r} must be >= {self.minimum}")
+        if self.maximum is not None and value > self.maximum:
+            raise ValueError(f"{self.name}={value!r} must be <= {self.maximum}")
+        return value
+
+
+class Tunables:
+    """
+    Typed reads of every tunable: the environment variable, else the profile's
+    default, else the code default. Each value is parsed and validated once;
+    problems are collected and raised together by check(), so a bad deployment
+    fails at startup with the full list instead of on the first request.
+    """
+
+    def __init__(self, profile: str):
+        if profile not in PROFILES:
+            raise SettingsError(f"Unknown APP_PROFILE '{profile}'. Use one of: {', '.join(PROFILES)}")
+        self.profile = profile
+        self.specs: Dict[str, SettingSpec] = {}
+        self.values: Dict[str, Any] = {}
+        self.sources: Dict[str, str] = {}  # "env", "profile" or "default"
+        self.errors: List[str] = []
+
+    def _read(self, spec: SettingSpec, default: Any, required: bool) -> Any:
+        self.specs[spec.name] = spec
+        if spec.name in os.environ:
+            raw, source = os.environ[spec.name], "env"
+        elif spec.name in PROFILES[self.profile]:
+            raw, source = PROFILES[self.profile][spec.name], "profile"
+        else:
+            raw, source = default, "default"
+
+        if required and (source == "default" or raw in (None, "")):
+            self.errors.append(f"{spec.name} is required in the {self.profile} profile")
+        try:
+            value = spec.coerce(raw)
+        except ValueError as e:
+            self.errors.append(str(e))
+            value, source = default, "default"
+        self.values[spec.name] = value
+        self.sources[spec.name] = source
+        return value
+
+    def _required(self, name: str) -> bool:
+        return name in PROFILE_REQUIRED.get(self.profile, ())
+
+    def string(self, name: str, default: Optional[str] = None, choices: Optional[Tuple[str, ...]] = None,
+               reloadable: bool = False, secret: bool = False) -> Optional[str]:
+        spec = SettingSpec(name, "string", str, choices=choices, reloadable=reloadable, secret=secret)
+        return self._read(spec, default, self._required(name))
+
+    def integer(self, name: str, default: int, minimum: Optional[int] = None, maximum: Optional[int] = None,
+                reloadable: bool = False) -> int:
+        spec = SettingSpec(name, "integer", int, minimum=minimum, maximum=maximum, reloadable=reloadable)
+        return self._read(spec, default, self._required(name))
+
+    def number(self, name: str, default: float, minimum: Optional[float] = None, maximum: Optional[float] = None,
+               reloadable: bool = False) -> float:
+        spec = SettingSpec(name, "number", float, minimum=minimum, maximum=maximum, reloadable=reloadable)
+        return self._read(spec, float(default), self._required(name))
+
+    def flag(self, name: str, default: bool, reloadable: bool = False) -> bool:
+        spec = SettingSpec(name, "boolean", _parse_bool, reloadable=reloadable)
+        return self._read(spec, default, self._required(name))
+
+    def require(self, condition: bool, message: str) -> None:
+        """Record a cross-setting constraint"""
+        if not condition:
+            self.errors.append(message)
+
+    def check(self) -> None:
+        """Raise every problem found so far (called once all tunables are read)"""
+        if self.errors:
+            raise SettingsError("Invalid settings:\n  " + "\n  ".join(self.errors))
+
+    def describe(self) -> List[Dict[str, Any]]:
+        """Effective value and origin of every setting, secrets redacted"""
+        return [
+            {
+                "name": name,
+                "value": "***" if spec.secret and self.values[name] else self.values[name],
+                "source": self.sources[name],
+                "reloadable": spec.reloadable,
+            }
+            for name, spec in self.specs.items()
+        ]
+
+# Global tunables instance
+tunables = Tunables(os.getenv("APP_PROFILE", "development"))
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Deployment settings, read once at import and frozen afterwards"""
+    secret_key: Optional[str]
+    algorithm: Optional[str]
+    access_token_expire_minutes: int
+    admin_emails: FrozenSet[str]  # Allowed to use /api/admin endpoints
+    mongodb_url: str
+    openrouter_api_key: Optional[str]
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        return cls(
+            secret_key=tunables.string("SECRET_KEY", secret=True),
+            algorithm=tunables.string("ALGORITHM"),
+            access_token_expire_minutes=tunables.integer("ACCESS_TOKEN_EXPIRE_MINUTES", 30, minimum=1),
+            admin_emails=frozenset(
+                email.strip().lower() for email in tunables.string("ADMIN_EMAILS", "").split(",") if email.strip()
+            ),
+            mongodb_url=tunables.string("MONGODB_URL", "mongodb://localhost:27017", secret=True),
+            openrouter_api_key=tunables.string("OPENROUTER_API_KEY", secret=True),
+        )
+
+# Global settings instance
+settings = Settings.from_env()
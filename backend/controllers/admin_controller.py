@@ -0,0 +1,134 @@
+from datetime import datetime
+from typing import Optional
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from config.constants import HISTORY_FIELDS, SEARCH_MAX_PAGE_SIZE
+from services.usage_service import usage_service, USAGE_DIMENSIONS
+from services.export_service import export_service, ExportFilter, MEDIA_TYPES, require_format
+from services.search_service import search_service, SearchFilter
+from services.analytics_service import analytics_service
+from services.runtime_settings import runtime_settings
+from services.shared_state import shared_state
+
+class AdminController:
+    """Controller for operator-only reporting endpoints"""
+
+    @staticmethod
+    async def get_usage(group_by: str = "role", days: int = 7):
+        """Token usage and cost rollups grouped by role, user or overall"""
+        if group_by not in USAGE_DIMENSIONS:
+            raise HTTPException(status_code=400, detail=f"'group_by' must be one of: {', '.join(USAGE_DIMENSIONS)}")
+        if not 1 <= days <= 366:
+            raise HTTPException(status_code=400, detail="'days' must be between 1 and 366")
+
+        rows = await usage_service.get_usage(group_by, days)
+        return {"group_by": group_by, "days": days, "usage": rows}
+
+    @staticmethod
+    async def export_transcripts(
+        export_format: str = "ndjson",
+        role_id: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        completed: Optional[bool] = None,
+        include_messages: bool = True,
+        fields: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> StreamingResponse:
+        """Stream matching sessions as NDJSON (one session per line) or parquet (one message per row)"""
+        try:
+            require_format(export_format)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except RuntimeError as e:
+            raise HTTPException(status_code=501, detail=str(e))
+        if limit is not None and limit < 1:
+            raise HTTPException(status_code=400, detail="'limit' must be positive")
+
+        message_fields = None
+        if fields:
+            message_fields = [field.strip() for field in fields.split(",") if field.strip()]
+            unknown = set(message_fields) - set(HISTORY_FIELDS)
+            if unknown:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Unknown fields: {', '.join(sorted(unknown))}. Allowed: {', '.join(HISTORY_FIELDS)}"
+                )
+
+        export_filter = ExportFilter(role_id=role_id, since=since, until=until, completed=completed)
+        if export_format == "parquet":
+            body = export_service.stream_parquet(export_filter, limit=limit)
+        else:
+            body = export_service.stream_ndjson(
+                export_filter, include_messages=include_messages, message_fields=message_fields, limit=limit
+            )
+
+        extension = "ndjson" if export_format == "ndjson" else "parquet"
+        filename = f"transcripts-{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}.{extension}"
+        return StreamingResponse(
+            body,
+            media_type=MEDIA_TYPES[export_format],
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+        )
+
+    @staticmethod
+    async def get_stats(days: int = 30, role_id: Optional[str] = None):
+        """Interview funnel per role and per day: starts, phases entered, completions"""
+        if not 1 <= days <= 366:
+            raise HTTPException(status_code=400, detail="'days' must be between 1 and 366")
+        return await analytics_service.get_stats(days, role_id)
+
+    @staticmethod
+    async def rebuild_stats():
+        """Recompute the funnel rollups from every live and archived session"""
+        return {"rollups": await analytics_service.rebuild()}
+
+    @staticmethod
+    async def search_sessions(
+        q: Optional[str] = None,
+        role_id: Optional[str] = None,
+        phase: Optional[str] = None,
+        completed: Optional[bool] = None,
+        page: int = 1,
+        page_size: int = 20
+    ):
+        """Sessions matching keywords and filters, with facet counts by role, phase and completion"""
+        if page < 1:
+            raise HTTPException(status_code=400, detail="'page' must be positive")
+        if not 1 <= page_size <= SEARCH_MAX_PAGE_SIZE:
+            raise HTTPException(status_code=400, detail=f"'page_size' must be between 1 and {SEARCH_MAX_PAGE_SIZE}")
+
+        search_filter = SearchFilter(role_id=role_id, phase=phase, completed=completed)
+        return await search_service.search(q.strip() if q else None, search_filter, page, page_size)
+
+    @staticmethod
+    async def rebuild_search_index():
+        """Re-index every live and archived session"""
+        return {"indexed": await search_service.rebuild()}
+
+    @staticmethod
+    async def get_settings():
+        """Effective settings of this worker (secrets redacted) and where each value came from"""
+        return runtime_settings.describe()
+
+    @staticmethod
+    async def reload_settings():
+        """Apply the runtime settings file now instead of at the next poll, on every worker"""
+        try:
+            changed = runtime_settings.reload()
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        await shared_state.invalidate("settings")
+        return {"changed": changed, "overrides": runtime_settings.overrides}
+
+    @staticmethod
+    async def invalidate_cache(cache: str):
+        """Clear a worker-local cache on every worker"""
+        try:
+            await shared_state.invalidate(cache)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return {"invalidated": cache, "shared_state": shared_state.backend_name}
+
+# Global controller instance
+admin_controller = AdminController()
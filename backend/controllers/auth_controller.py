@@ -1,8 +1,10 @@
+from datetime import datetime
 from fastapi import HTTPException, status
 from models.requests import SignupRequest, LoginRequest, AuthResponse
 from models.user import UserResponse
 from services.user_service import user_service
-from config.auth import create_access_token
+from config.auth import create_access_token, decode_token
+from services.shared_state import shared_state
 
 class AuthController:
     """Controller for handling authentication business logic"""
@@ -59,10 +61,12 @@ class AuthController:
         return await user_service.get_user_profile(user_email)
     
     @staticmethod
-    async def logout(user_email: str) -> dict:
-        """Handle user logout (JWT is stateless, so just return success)"""
-        # Note: JWT tokens are stateless, so logout is handled client-side
-        # You could implement token blacklisting here if needed
+    async def logout(user_email: str, token: str) -> dict:
+        """Handle user logout: the token is rejected by every worker until it expires"""
+        claims = decode_token(token)
+        # Tokens issued before revocation existed have no jti; they simply expire
+        if claims.get("jti"):
+            await shared_state.revoke_token(claims["jti"], datetime.utcfromtimestamp(claims["exp"]))
         return {"message": "Successfully logged out"}
 
 # Global auth controller instance
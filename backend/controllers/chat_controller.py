@@ -1,18 +1,89 @@
+import asyncio
+import hashlib
+from typing import Optional
 from fastapi import HTTPException
 from fastapi.responses import StreamingResponse
-from models.requests import ChatRequest
+from models.requests import ChatRequest, DraftRequest
 from models.session import Message
 from services.session_service import session_service
-from services.ai_service import ai_service, RateLimitExceeded
-from config.constants import TOTAL_QUESTIONS
+from services.ai_service import ai_service, RateLimitExceeded, LLMUsage
+from services.interview_flow import interview_flows, flow_events
+from services.prompt_registry import prompt_registry
+from services.usage_service import usage_service
+from services.quota_service import quota_service, QuotaExceeded
+from services.stream_service import stream_service, DONE, INTERRUPTED
+from services.speculation_service import speculation_service
+from services.answer_cache import answer_cache
+from services.question_index import question_index
+from services.shared_state import shared_state, LeaseHeld, Lease
+from utils.singleflight import SingleFlight
+from data.replies import (
+    SEND_COMPLETION_REPLY, STREAM_COMPLETION_REPLY, SEND_ERROR_REPLY, STREAM_ERROR_REPLY,
+    STREAM_RATE_LIMIT_REPLY, ERROR_REPLIES
+)
 
 class ChatController:
-    """Controller for handling chat-related business logic"""
+    """
+    Controller for handling chat-related business logic.
+
+    A session takes one turn at a time across all workers (shared_state session
+    lease). An identical request for the turn in flight (double click, client
+    retry) attaches to it instead of being refused: /send gets the same reply,
+    /stream follows the same stream. Only a different message gets a 409.
+    """
+
+    # Identical sends in this worker share one execution
+    _turns = SingleFlight("chat_turns")
+
+    @staticmethod
+    def _turn_key(request: ChatRequest) -> str:
+        return hashlib.sha256(request.message.encode()).hexdigest()[:16]
 
     @staticmethod
     async def send_message(request: ChatRequest):
+        turn = ChatController._turn_key(request)
+        return await ChatController._turns.do(
+            f"{request.session_id}:{turn}",
+            lambda: ChatController._send_turn(request, turn)
+        )
+
+    @staticmethod
+    async def _send_turn(request: ChatRequest, turn: str):
+        # One turn per session at a time, across all workers
+        try:
+            async with shared_state.session_lease(request.session_id, turn):
+                return await ChatController._send_message(request)
+        except LeaseHeld as e:
+            if e.holder is None or e.holder.turn != turn:
+                raise HTTPException(status_code=409, detail=str(e))
+            # The same message is being answered on another worker
+            return await ChatController._await_turn(request, e.holder)
+
+    @staticmethod
+    async def _await_turn(request: ChatRequest, holder: Lease):
+        """
+        Reply of the identical turn another request is running, once it finishes.
+        Only the last exchange counts: a failed turn saves no reply (or an error
+        reply), and an older reply to the same text answers a different question.
+        """
+        if await shared_state.wait_released(holder):
+            session = await session_service.get_session(request.session_id)
+            last = session.get("messages", [])[-2:] if session else []
+            if (
+                len(last) == 2
+                and last[0]["role"] == "user" and last[0]["content"] == request.message
+                and last[1]["role"] == "assistant" and last[1]["content"] not in ERROR_REPLIES
+            ):
+                reply = {"response": last[1]["content"]}
+                if session.get("metadata", {}).get("interview_completed", False):
+                    reply["interview_completed"] = True
+                return reply
+        raise HTTPException(status_code=409, detail="A reply for this message could not be completed; please send it again")
+
+    @staticmethod
+    async def _send_message(request: ChatRequest):
         # Get session and check if it exists
-        session = await session_service.get_session(request.session_id)
+        session = await session_service.get_session(request.session_id, restore_archived=True, include_messages=False)
         if not session:
             raise HTTPException(status_code=404, detail="Session not found")
 
@@ -21,42 +92,83 @@ class ChatController:
         if metadata.get("interview_completed", False):
             raise HTTPException(status_code=400, detail="Interview has already been completed")
 
+        # Budget check against in-memory counters (no DB round trip)
+        try:
+            quota_service.check_tokens(session.get("user_email"))
+        except QuotaExceeded as e:
+            raise HTTPException(status_code=429, detail=e.detail)
+
         # Add user message
         user_msg = Message(role="user", content=request.message)
         await session_service.add_message(request.session_id, user_msg)
 
         # Increment question count after user response
-        current_question_count = metadata.get("question_count", 0) + 1
-        current_phase = session_service._determine_current_phase(current_question_count)
+        flow = interview_flows.for_role(session.get("role_id"))
+        step = flow.advance(request.session_id, session.get("role_id"), metadata.get("question_count", 0))
+        current_question_count = step.question_count
+        current_phase = step.phase
 
         # Check if we've reached the question limit
-        if current_question_count >= TOTAL_QUESTIONS:
+        if step.completed:
             await session_service.mark_interview_completed(request.session_id)
-            final_response = (
-                "Thank you for completing the full interview! You've answered all questions across "
-                "different difficulty levels. This gives us a comprehensive understanding of your expertise. "
-                "We appreciate your time and detailed responses. We'll review your performance and get back to you soon! 🎯✨"
-            )
+            await flow_events.publish(step.transition)
+            final_response = SEND_COMPLETION_REPLY
             final_msg = Message(role="assistant", content=final_response)
             await session_service.add_message(request.session_id, final_msg)
+            await session_service.compress_transcript(request.session_id)
             return {"response": final_response, "interview_completed": True}
 
         # Get updated session for AI processing
         updated_session = await session_service.get_session(request.session_id)
-        messages = [{"role": msg["role"], "content": msg["content"]} for msg in updated_session["messages"]]
+        messages = session_service.build_llm_messages(updated_session)
+
+        # Phase-specific prompt plus the per-turn status line
+        prompt = prompt_registry.variant(session.get("role_id"), current_phase)
+        phase_context = f"CURRENT STATUS: Question {current_question_count}/{flow.total_questions}"
 
-        # Phase context
-        phase_context = f"CURRENT STATUS: Question {current_question_count}/{TOTAL_QUESTIONS}, Phase: {current_phase.upper()}"
+        # Reply generated while the candidate typed this exact answer (SPECULATION_MODE=generate)
+        speculation = await speculation_service.take(request.session_id, metadata.get("message_count"), request.message)
+        # Reply to a near-identical answer to the same question (ANSWER_CACHE_MODE); "seed" only hints the LLM
+        cached_reply = None if speculation is not None else answer_cache.lookup(prompt, messages, request.message)
+        if cached_reply is not None and answer_cache.mode == "seed":
+            phase_context, cached_reply = answer_cache.seed(phase_context, cached_reply), None
 
         try:
-            reply = await ai_service.generate_response(messages, phase_context)
+            if speculation is not None:
+                usage, reply = speculation.usage, speculation.reply
+            elif cached_reply is not None:
+                usage, reply = LLMUsage(), cached_reply
+            else:
+                usage = LLMUsage()
+                reply = await ai_service.generate_response(messages, phase_context, prompt, usage)
+            
+            # One bounded regeneration if the reply repeats a question the candidate was already asked
+            discarded = LLMUsage()
+            fingerprint = question_index.fingerprint(reply)
+            if question_index.is_repeat(updated_session, fingerprint, action="regenerated"):
+                discarded, usage = usage, LLMUsage()
+                reply = await ai_service.generate_response(messages, question_index.avoid(phase_context, reply), prompt, usage)
+                fingerprint = question_index.fingerprint(reply)
+            if speculation is None and cached_reply is None:
+                answer_cache.store(prompt, messages, request.message, reply, session.get("user_email"))
             assistant_msg = Message(role="assistant", content=reply)
 
-            await session_service.add_message(request.session_id, assistant_msg)
-            await session_service.update_metadata(request.session_id, {
-                "question_count": current_question_count,
-                "current_phase": current_phase
-            })
+            # Message, metadata and usage counters in a single write
+            await session_service.add_message_and_update_metadata(
+                request.session_id,
+                assistant_msg,
+                {
+                    "question_count": current_question_count,
+                    "current_phase": current_phase
+                },
+                # Cached replies and coalesced calls have no usage of their own
+                LLMUsage.combined_increments(discarded, usage),
+                fingerprint
+            )
+            for call in (discarded, usage):
+                usage_service.record(session.get("role_id"), session.get("user_email"), call)
+                quota_service.record(session.get("user_email"), call)
+            await flow_events.publish(step.transition)
 
             return {"response": reply}
 
@@ -84,7 +196,7 @@ class ChatController:
             print(f"AI Service error: {e}")
             
             # Save an error message to maintain conversation flow
-            error_response = "Sorry, I'm experiencing some technical difficulties right now. Please try again in a moment."
+            error_response = SEND_ERROR_REPLY
             assistant_msg = Message(role="assistant", content=error_response)
             await session_service.add_message(request.session_id, assistant_msg)
             
@@ -99,8 +211,37 @@ class ChatController:
     @staticmethod
     async def stream_message(request: ChatRequest):
         """Stream AI response token-by-token (keeps context)"""
+        # One turn per session at a time, across all workers; the generation task releases the lease
+        turn = ChatController._turn_key(request)
+        try:
+            lease = await shared_state.acquire_session(request.session_id, turn)
+        except LeaseHeld as e:
+            if e.holder is not None and e.holder.turn == turn:
+                # Same message already being answered: follow that stream instead of refusing
+                stream_id = await ChatController._holder_stream(request.session_id, e.holder)
+                if stream_id is not None:
+                    return await ChatController.resume_stream(stream_id)
+            raise HTTPException(status_code=409, detail=str(e))
+        try:
+            return await ChatController._stream_message(request, lease)
+        except BaseException:
+            await shared_state.release(lease)
+            raise
+
+    @staticmethod
+    async def _holder_stream(session_id: str, holder: Lease) -> Optional[str]:
+        """Stream id of the turn running under `holder`, waiting while it is still being set up"""
+        while True:
+            held = await shared_state.held(holder)
+            stream_id = await stream_service.find_by_lease(session_id, holder.owner)
+            if stream_id is not None or not held:
+                return stream_id
+            await asyncio.sleep(shared_state.poll_interval)
+
+    @staticmethod
+    async def _stream_message(request: ChatRequest, lease: Lease):
         # 1) Session checks
-        session = await session_service.get_session(request.session_id)
+        session = await session_service.get_session(request.session_id, restore_archived=True, include_messages=False)
         if not session:
             raise HTTPException(status_code=404, detail="Session not found")
 
@@ -108,23 +249,32 @@ class ChatController:
         if metadata.get("interview_completed", False):
             raise HTTPException(status_code=400, detail="Interview has already been completed")
 
-        # 2) Save user message ONCE
+        # 1b) Budget check against in-memory counters (no DB round trip)
+        try:
+            quota_service.check_tokens(session.get("user_email"))
+        except QuotaExceeded as e:
+            raise HTTPException(status_code=429, detail=e.detail)
+
+        # 2) Save the partial reply of a stream whose worker died, then the user message ONCE
+        await stream_service.recover_abandoned(request.session_id)
         user_msg = Message(role="user", content=request.message)
         await session_service.add_message(request.session_id, user_msg)
 
         # 3) Counters / phase
-        current_question_count = metadata.get("question_count", 0) + 1
-        current_phase = session_service._determine_current_phase(current_question_count)
+        flow = interview_flows.for_role(session.get("role_id"))
+        step = flow.advance(request.session_id, session.get("role_id"), metadata.get("question_count", 0))
+        current_question_count = step.question_count
+        current_phase = step.phase
 
         # 4) Handle completion
-        if current_question_count >= TOTAL_QUESTIONS:
+        if step.completed:
             await session_service.mark_interview_completed(request.session_id)
-            final_response = (
-                "Thank you for completing the full interview! "
-                "We appreciate your time and detailed responses."
-            )
+            await flow_events.publish(step.transition)
+            final_response = STREAM_COMPLETION_REPLY
             final_msg = Message(role="assistant", content=final_response)
             await session_service.add_message(request.session_id, final_msg)
+            await session_service.compress_transcript(request.session_id)
+            await shared_state.release(lease)
 
             async def final_stream():
                 yield final_response
@@ -132,42 +282,73 @@ class ChatController:
 
         # 5) Build messages (with system prompt preserved)
         updated_session = await session_service.get_session(request.session_id)
-        messages = [{"role": msg["role"], "content": msg["content"]} for msg in updated_session["messages"]]
+        messages = session_service.build_llm_messages(updated_session)
 
-        phase_context = (
-            f"CURRENT STATUS: Question {current_question_count}/{TOTAL_QUESTIONS}, "
-            f"Phase: {current_phase.upper()}"
-        )
+        prompt = prompt_registry.variant(session.get("role_id"), current_phase)
+        phase_context = f"CURRENT STATUS: Question {current_question_count}/{flow.total_questions}"
 
-        # 6) Accumulate streamed tokens - NO database writes during streaming
-        accumulated_response = ""
+        # 6) Generate in a task decoupled from this response, so a client that drops
+        #    can reattach with the X-Stream-Id instead of triggering a new generation
+        speculation = await speculation_service.take(request.session_id, metadata.get("message_count"), request.message)
+        # Reply to a near-identical answer to the same question (ANSWER_CACHE_MODE); "seed" only hints the LLM
+        cached_reply = None if speculation is not None else answer_cache.lookup(prompt, messages, request.message)
+        if cached_reply is not None and answer_cache.mode == "seed":
+            phase_context, cached_reply = answer_cache.seed(phase_context, cached_reply), None
+        live = await stream_service.open(
+            request.session_id,
+            {"question_count": current_question_count, "current_phase": current_phase},
+            step.transition,
+            lease.owner
+        )
+        usage = speculation.usage if speculation is not None else LLMUsage()
 
-        async def streaming_with_save():
-            nonlocal accumulated_response
+        async def generate():
+            accumulated_response = ""
+            fingerprint = None  # Computed below for generated replies; saved with the message
+            status = DONE
             
             try:
-                # Stream tokens without any database operations - WITH ERROR HANDLING
-                async for token in ai_service.stream_response(messages, phase_context):
-                    accumulated_response += token
-                    yield token  # Only yield to client, NO database writes
+                if speculation is not None:
+                    # Generated while the candidate was typing this answer
+                    accumulated_response = speculation.reply
+                    live.append(speculation.reply)
+                elif cached_reply is not None:
+                    # Near-identical answer to the same question (ANSWER_CACHE_MODE=serve)
+                    accumulated_response = cached_reply
+                    live.append(cached_reply)
+                else:
+                    async for token in ai_service.stream_response(messages, phase_context, prompt, usage):
+                        accumulated_response += token
+                        live.append(token)
+                        # Coarse checkpoints only: at most one write per STREAM_CHECKPOINT_INTERVAL_SECONDS
+                        await stream_service.checkpoint(live)
+                    answer_cache.store(prompt, messages, request.message, accumulated_response, session.get("user_email"))
+                    # Already sent, so a repeated question can only be counted here
+                    fingerprint = question_index.fingerprint(accumulated_response)
+                    question_index.is_repeat(updated_session, fingerprint, action="kept")
                     
             except RateLimitExceeded as e:
                 # Handle rate limiting during streaming
-                error_msg = "Rate limit exceeded. Please wait a moment before continuing the conversation."
+                error_msg = STREAM_RATE_LIMIT_REPLY
                 accumulated_response = error_msg
-                yield error_msg
+                live.append(error_msg)
                 print(f"Streaming rate limit error: {e}")
+            
+            except asyncio.CancelledError:
+                # Worker shutting down: keep what was generated
+                status = INTERRUPTED
+                raise
                 
             except Exception as e:
                 # Handle other streaming errors
-                error_msg = "Sorry, I encountered a technical issue. Please try sending your message again."
+                error_msg = STREAM_ERROR_REPLY
                 accumulated_response = error_msg
-                yield error_msg
+                live.append(error_msg)
                 print(f"Streaming error: {e}")
                 
             finally:
-                # Save ONCE when streaming completes (or client disconnects)
-                if accumulated_response.strip():
+                # Save ONCE when generation ends, unless the stream was recovered as abandoned meanwhile
+                if await stream_service.close(live, status) and accumulated_response.strip():
                     assistant_msg = Message(role="assistant", content=accumulated_response)
                     
                     try:
@@ -178,15 +359,23 @@ class ChatController:
                             {
                                 "question_count": current_question_count,
                                 "current_phase": current_phase
-                            }
+                            },
+                            # Only completed upstream calls have usage worth counting
+                            usage.metadata_increments() if usage.latency_ms else None,
+                            fingerprint
                         )
+                        usage_service.record(session.get("role_id"), session.get("user_email"), usage)
+                        quota_service.record(session.get("user_email"), usage)
+                        await flow_events.publish(step.transition)
                     except Exception as db_error:
                         # Log database errors but don't disrupt the stream
                         print(f"Database save error after streaming: {db_error}")
+                await shared_state.release(lease)
 
         # Handle initial streaming setup errors (rate limiting check happens here)
         try:
-            return StreamingResponse(streaming_with_save(), media_type="text/plain")
+            stream_service.run(live, generate())
+            return StreamingResponse(live.follow(), media_type="text/plain", headers={"X-Stream-Id": live.stream_id})
             
         except RateLimitExceeded as e:
             # Rate limit exceeded before streaming starts
@@ -207,5 +396,21 @@ class ChatController:
                 detail="Service temporarily unavailable. Please contact support if this persists."
             )
 
+    @staticmethod
+    async def draft(request: DraftRequest):
+        """Typing/draft event: lets the server speculate on the next question (opt-in)"""
+        return {"speculation": await speculation_service.on_draft(request.session_id, request.draft)}
+
+    @staticmethod
+    async def resume_stream(stream_id: str, offset: int = 0):
+        """Reattach to an in-flight or finished stream, skipping the first `offset` bytes"""
+        if offset < 0:
+            raise HTTPException(status_code=400, detail="'offset' must be non-negative")
+        
+        reader = await stream_service.follow(stream_id, offset)
+        if reader is None:
+            raise HTTPException(status_code=404, detail="Stream not found")
+        return StreamingResponse(reader, media_type="text/plain", headers={"X-Stream-Id": stream_id})
+
 # Global controller instance
 chat_controller = ChatController()
\ No newline at end of file
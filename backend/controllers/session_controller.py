@@ -2,10 +2,17 @@ from fastapi import HTTPException
 from models.requests import SessionRequest, StartInterviewRequest, EndInterviewRequest
 from models.session import Message
 from services.session_service import session_service
-from services.ai_service import ai_service
+from services.ai_service import ai_service, LLMUsage
 from models.user import UserSessionSummary
 from services.user_service import user_service
+from services.interview_flow import interview_flows, flow_events, PhaseTransition, COMPLETED_PHASE
+from services.prompt_registry import prompt_registry
+from services.usage_service import usage_service
+from services.quota_service import quota_service, QuotaExceeded
+from services.evaluation_service import evaluation_queue
 from typing import Optional, List
+from config.constants import HISTORY_MAX_PAGE_SIZE, HISTORY_FIELDS
+import hashlib
 
 class SessionController:
     """Controller for handling session-related business logic"""
@@ -13,16 +20,47 @@ class SessionController:
     @staticmethod
     async def init_session(request: SessionRequest,  current_user_email: Optional[str] = None):
         """Initialize a new interview session"""
-        session_id = await session_service.create_session(request.role_id)
+        session_id = await session_service.create_session(request.role_id, current_user_email)
         if current_user_email:
             await user_service.add_session_to_user(current_user_email, session_id)
         return {"session_id": session_id}
     
     @staticmethod
-    async def get_history(session_id: str,  current_user_email: Optional[str] = None):
-        """Get chat history for a session"""
-        messages = await session_service.get_session_messages(session_id)
-        return messages
+    async def get_history(
+        session_id: str,
+        current_user_email: Optional[str] = None,
+        limit: Optional[int] = None,
+        before: Optional[int] = None,
+        after: Optional[int] = None,
+        fields: Optional[str] = None
+    ) -> dict:
+        """Get a page of chat history for a session, with an ETag for conditional requests"""
+        if before is not None and after is not None:
+            raise HTTPException(status_code=400, detail="Use either 'before' or 'after', not both")
+        if limit is not None and not 1 <= limit <= HISTORY_MAX_PAGE_SIZE:
+            raise HTTPException(status_code=400, detail=f"'limit' must be between 1 and {HISTORY_MAX_PAGE_SIZE}")
+        if (before is not None and before < 0) or (after is not None and after < 0):
+            raise HTTPException(status_code=400, detail="Cursors must be non-negative")
+        
+        selected_fields = None
+        if fields:
+            selected_fields = [field.strip() for field in fields.split(",") if field.strip()]
+            unknown = set(selected_fields) - set(HISTORY_FIELDS)
+            if unknown:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Unknown fields: {', '.join(sorted(unknown))}. Allowed: {', '.join(HISTORY_FIELDS)}"
+                )
+        
+        page = await session_service.get_messages_page(session_id, limit, before, after, selected_fields)
+        if page is None:
+            # Unknown sessions have always returned an empty history
+            page = {"messages": [], "start": 0, "total": 0, "updated_at": None}
+        
+        # Messages are append-only, so the window plus the session's size identifies the content
+        fingerprint = f"{session_id}:{page['total']}:{page['updated_at']}:{page['start']}:{len(page['messages'])}:{fields}"
+        page["etag"] = f'W/"{hashlib.sha1(fingerprint.encode()).hexdigest()[:20]}"'
+        return page
     
     @staticmethod
     async def get_session_status(session_id: str,  current_user_email: Optional[str] = None):
@@ -32,42 +70,88 @@ class SessionController:
             raise HTTPException(status_code=404, detail="Session not found")
         return status
     
+    @staticmethod
+    async def get_evaluation(session_id: str, current_user_email: Optional[str] = None):
+        """Get the evaluation of a completed interview and its job status"""
+        session = await session_service.get_session(session_id, include_messages=False)
+        if not session:
+            raise HTTPException(status_code=404, detail="Session not found")
+        
+        job = await evaluation_queue.get_job(session_id)
+        return {
+            "session_id": session_id,
+            "status": job["status"] if job else "not_queued",
+            "evaluation": session.get("evaluation")
+        }
+    
     @staticmethod
     async def start_interview(request: StartInterviewRequest,  current_user_email: Optional[str] = None):
         """Start the interview"""
-        session = await session_service.get_session(request.session_id)
+        session = await session_service.get_session(request.session_id, restore_archived=True, include_messages=False)
         if not session:
             raise HTTPException(status_code=404, detail="Session not found")
         
-        # Add initial greeting message
-        greeting_msg = Message(role="user", content="Hello! I'm ready to start my interview.")
-        await session_service.add_message(request.session_id, greeting_msg)
-        
-        # Get updated session for AI processing
-        updated_session = await session_service.get_session(request.session_id)
-        messages = [{"role": msg["role"], "content": msg["content"]} for msg in updated_session["messages"]]
+        # Token budget and concurrent-interview limits (in-memory, no DB round trip)
+        try:
+            quota_service.check_can_start(session.get("user_email"), request.session_id)
+        except QuotaExceeded as e:
+            raise HTTPException(status_code=429, detail=e.detail)
+        took_slot = quota_service.interview_started(session.get("user_email"), request.session_id)
         
-        # Generate AI response
-        reply = await ai_service.generate_response(messages)
-        assistant_msg = Message(role="assistant", content=reply)
-        # Add assistant response and update metadata
-        await session_service.add_message(request.session_id, assistant_msg)
-        await session_service.update_metadata(request.session_id, {
-            "question_count": 1,
-            "current_phase": "greeting"
-        })
+        try:
+            # Add initial greeting message
+            greeting_msg = Message(role="user", content="Hello! I'm ready to start my interview.")
+            await session_service.add_message(request.session_id, greeting_msg)
+            
+            # Get updated session for AI processing
+            updated_session = await session_service.get_session(request.session_id)
+            messages = session_service.build_llm_messages(updated_session)
+            
+            # Generate AI response
+            step = interview_flows.for_role(session.get("role_id")).start(request.session_id, session.get("role_id"))
+            prompt = prompt_registry.variant(session.get("role_id"), step.phase)
+            usage = LLMUsage()
+            reply = await ai_service.generate_response(messages, prompt=prompt, usage=usage)
+            assistant_msg = Message(role="assistant", content=reply)
+            # Add assistant response, metadata and usage counters in a single write
+            await session_service.add_message_and_update_metadata(
+                request.session_id,
+                assistant_msg,
+                {
+                    "question_count": step.question_count,
+                    "current_phase": step.phase
+                },
+                usage.metadata_increments()
+            )
+        except Exception:
+            # The interview never got its first question: give back the slot this call took
+            if took_slot:
+                quota_service.interview_finished(request.session_id)
+            raise
+        usage_service.record(session.get("role_id"), session.get("user_email"), usage)
+        quota_service.record(session.get("user_email"), usage)
+        await flow_events.publish(step.transition)
         
         return {"response": reply}
     
     @staticmethod
     async def end_interview(request: EndInterviewRequest,  current_user_email: Optional[str] = None):
         """Manually end the interview"""
-        session = await session_service.get_session(request.session_id)
+        session = await session_service.get_session(request.session_id, restore_archived=True, include_messages=False)
         if not session:
             raise HTTPException(status_code=404, detail="Session not found")
         
         # Mark interview as completed
         await session_service.mark_interview_completed(request.session_id, manually_ended=True)
+        metadata = session.get("metadata", {})
+        if not metadata.get("interview_completed", False):
+            await flow_events.publish(PhaseTransition(
+                session_id=request.session_id,
+                role_id=session.get("role_id"),
+                from_phase=metadata.get("current_phase"),
+                to_phase=COMPLETED_PHASE,
+                question_count=metadata.get("question_count", 0)
+            ))
         
         # Add final message
         final_message = Message(
@@ -75,28 +159,30 @@ class SessionController:
             content="Thank you for taking the time to interview with us! While we didn't complete all questions, you've provided valuable insights. We appreciate your participation and will be in touch regarding next steps. Have a great day! 🎯"
         )
         await session_service.add_message(request.session_id, final_message)
+        await session_service.compress_transcript(request.session_id)
         
         return {"response": final_message.content, "interview_ended": True}
 
     @staticmethod
     async def get_user_sessions(current_user_email: str) -> List[UserSessionSummary]:
         """Get all sessions for a user"""
-        session_ids = await user_service.get_user_sessions(current_user_email)
+        session_ids = await user_service.get_user_sessions(current_user_email, read_only=True)
         
         sessions_data = []
         for session_id in session_ids:
-            session = await session_service.get_session(session_id)
+            session = await session_service.get_session(session_id, include_messages=False, read_only=True)
             if session:
                 metadata = session.get("metadata", {})
+                flow = interview_flows.for_role(session["role_id"])
                 sessions_data.append(UserSessionSummary(
                     session_id=session_id,
                     role_id=session["role_id"],
                     created_at=metadata.get("created_at", session.get("created_at")),
                     question_count=metadata.get("question_count", 0),
-                    current_phase=metadata.get("current_phase", "greeting"),
+                    current_phase=metadata.get("current_phase", flow.first_phase),
                     interview_completed=metadata.get("interview_completed", False),
                     manually_ended=metadata.get("manually_ended", False),
-                    progress_percentage=min((metadata.get("question_count", 0) / 20) * 100, 100)
+                    progress_percentage=flow.progress(metadata.get("question_count", 0))
                 ))
         
         return sessions_data
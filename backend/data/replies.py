@@ -0,0 +1,17 @@
+# Fixed assistant replies saved into transcripts (not generated by the LLM)
+SEND_COMPLETION_REPLY = (
+    "Thank you for completing the full interview! You've answered all questions across "
+    "different difficulty levels. This gives us a comprehensive understanding of your expertise. "
+    "We appreciate your time and detailed responses. We'll review your performance and get back to you soon! 🎯✨"
+)
+STREAM_COMPLETION_REPLY = (
+    "Thank you for completing the full interview! "
+    "We appreciate your time and detailed responses."
+)
+SEND_ERROR_REPLY = "Sorry, I'm experiencing some technical difficulties right now. Please try again in a moment."
+STREAM_ERROR_REPLY = "Sorry, I encountered a technical issue. Please try sending your message again."
+STREAM_RATE_LIMIT_REPLY = "Rate limit exceeded. Please wait a moment before continuing the conversation."
+
+# Turns that failed: they don't advance question_count and the candidate is asked to resend
+ERROR_REPLIES = frozenset({SEND_ERROR_REPLY, STREAM_ERROR_REPLY, STREAM_RATE_LIMIT_REPLY})
+CLOSING_REPLIES = frozenset({SEND_COMPLETION_REPLY, STREAM_COMPLETION_REPLY})
@@ -264,3 +264,26 @@ When you reach 19 total exchanges (greeting + 18 questions), end with: "That com
 REMEMBER: ONE QUESTION ONLY per response. Track your question count."""
     }
 }
+
+# Role used when a session asks for an unknown role_id
+DEFAULT_ROLE_ID = "meta-ads-expert"
+
+# Phase-specific instructions appended to a role prompt (roles may override per phase)
+PHASE_GUIDANCE = {
+    "greeting": "Welcome the candidate warmly and ask for their name.",
+    "easy": "Ask one basic question: definitions, core concepts or simple metrics.",
+    "moderate": "Ask one applied question about optimization, strategy or day-to-day practice.",
+    "scenario": "Present one realistic problem scenario and ask how they would handle it.",
+    "hard": "Ask one complex troubleshooting or advanced strategy question.",
+    "expert": "Ask one expert-level question that tests deep judgement and trade-offs.",
+    "completed": "The interview is complete. Thank the candidate and give a brief assessment."
+}
+
+# System prompt for post-interview scoring of one phase of a transcript
+EVALUATION_PROMPT = """You are a strict but fair hiring panelist reviewing part of a recorded interview.
+
+You will be given the role, the interview phase, and the questions asked with the candidate's answers.
+Judge only the candidate's answers: accuracy, depth, structure and practical judgement for the phase's difficulty.
+
+Respond with ONLY a JSON object, no prose around it:
+{"score": <integer 1-10>, "summary": "<one or two sentences on strengths and gaps>"}"""
@@ -0,0 +1,11 @@
+# gunicorn -c gunicorn.conf.py app:app
+# Same worker sizing and checks as scripts/serve.py, with gunicorn managing the processes
+# (needs the optional gunicorn package)
+from config.constants import PORT
+from scripts.serve import worker_count, check_multi_worker
+
+workers = worker_count()
+check_multi_worker(workers)
+worker_class = "uvicorn.workers.UvicornWorker"
+bind = f"0.0.0.0:{PORT}"
+graceful_timeout = 30  # Shutdown flushes the usage, search and analytics buffers
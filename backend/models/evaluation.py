@@ -0,0 +1,21 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import datetime
+
+class Exchange(BaseModel):
+    question_number: int
+    phase: str
+    question: str
+    answer: str
+
+class PhaseScore(BaseModel):
+    phase: str
+    score: float  # 1-10
+    summary: str
+    answers: int
+
+class SessionEvaluation(BaseModel):
+    scorer: str
+    overall_score: Optional[float] = None  # Answer-weighted mean of the phase scores
+    phases: List[PhaseScore] = []
+    evaluated_at: datetime = Field(default_factory=datetime.utcnow)
@@ -8,6 +8,10 @@ class ChatRequest(BaseModel):
     message: str
     session_id: str
 
+class DraftRequest(BaseModel):
+    session_id: str
+    draft: str
+
 class StartInterviewRequest(BaseModel):
     session_id: str
 
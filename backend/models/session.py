@@ -25,9 +25,13 @@ class Message(BaseModel):
 
 class SessionMetadata(BaseModel):
     question_count: int = 0
+    message_count: int = 0  # Length of the messages array (used for $slice pagination)
     current_phase: str = "greeting"
     interview_completed: bool = False
     manually_ended: bool = False
+    prompt_version: Optional[str] = None
+    prompt_hash: Optional[str] = None
+    question_index: List[str] = []  # Fingerprints of the questions asked (see QuestionIndex)
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
@@ -35,6 +39,8 @@ class Session(BaseModel):
     id: Optional[PyObjectId] = Field(default_factory=PyObjectId, alias="_id")
     session_id: str
     role_id: str
+    user_email: Optional[str] = None  # None for guest sessions
+    is_guest: bool = False  # Guest sessions expire via the guest TTL index
     messages: List[Message] = []
     metadata: SessionMetadata = Field(default_factory=SessionMetadata)
     
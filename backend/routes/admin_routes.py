@@ -0,0 +1,129 @@
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Depends, Query
+from controllers.admin_controller import admin_controller
+from config.auth import get_admin_email
+from utils.responses import FastJSONResponse
+
+router = APIRouter(prefix="/api/admin", tags=["admin"], default_response_class=FastJSONResponse)
+
+@router.get("/usage")
+async def get_usage(
+    group_by: str = Query("role", description="Group totals by 'role', 'user' or 'all'"),
+    days: int = Query(7, description="Number of days to include, today included"),
+    admin_email: str = Depends(get_admin_email)
+):
+    """LLM token usage and cost rollups (admin only)"""
+    try:
+        return await admin_controller.get_usage(group_by, days)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get usage: {str(e)}")
+
+@router.get("/stats")
+async def get_stats(
+    days: int = Query(30, description="Number of days to include, today included"),
+    role_id: Optional[str] = Query(None),
+    admin_email: str = Depends(get_admin_email)
+):
+    """Completion funnel from the analytics rollups (admin only)"""
+    try:
+        return await admin_controller.get_stats(days, role_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get stats: {str(e)}")
+
+@router.post("/stats/rebuild")
+async def rebuild_stats(admin_email: str = Depends(get_admin_email)):
+    """Recompute the analytics rollups from scratch (admin only)"""
+    try:
+        return await admin_controller.rebuild_stats()
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to rebuild stats: {str(e)}")
+
+@router.get("/export")
+async def export_transcripts(
+    format: str = Query("ndjson", description="'ndjson' (one session per line) or 'parquet' (one message per row)"),
+    role_id: Optional[str] = Query(None),
+    since: Optional[datetime] = Query(None, description="Sessions created at or after this time (ISO 8601)"),
+    until: Optional[datetime] = Query(None, description="Sessions created before this time (ISO 8601)"),
+    completed: Optional[bool] = Query(None, description="Only completed (true) or unfinished (false) interviews"),
+    include_messages: bool = Query(True),
+    fields: Optional[str] = Query(None, description="Comma-separated message fields for NDJSON, e.g. role,content"),
+    limit: Optional[int] = Query(None, description="Maximum number of sessions"),
+    admin_email: str = Depends(get_admin_email)
+):
+    """Bulk transcript export, streamed as it is read (admin only)"""
+    try:
+        return await admin_controller.export_transcripts(
+            format, role_id, since, until, completed, include_messages, fields, limit
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to export transcripts: {str(e)}")
+
+@router.get("/search")
+async def search_sessions(
+    q: Optional[str] = Query(None, description="Keywords (any match); quote a phrase to require it"),
+    role_id: Optional[str] = Query(None),
+    phase: Optional[str] = Query(None, description="Phase reached, e.g. 'moderate'"),
+    completed: Optional[bool] = Query(None, description="Only completed (true) or unfinished (false) interviews"),
+    page: int = Query(1),
+    page_size: int = Query(20),
+    admin_email: str = Depends(get_admin_email)
+):
+    """Search interview transcripts with facet counts (admin only)"""
+    try:
+        return await admin_controller.search_sessions(q, role_id, phase, completed, page, page_size)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to search sessions: {str(e)}")
+
+@router.post("/search/rebuild")
+async def rebuild_search_index(admin_email: str = Depends(get_admin_email)):
+    """Rebuild the transcript search index from scratch (admin only)"""
+    try:
+        return await admin_controller.rebuild_search_index()
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to rebuild search index: {str(e)}")
+
+@router.get("/settings")
+async def get_settings(admin_email: str = Depends(get_admin_email)):
+    """Effective settings, their sources and which are reloadable (admin only)"""
+    try:
+        return await admin_controller.get_settings()
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get settings: {str(e)}")
+
+@router.post("/settings/reload")
+async def reload_settings(admin_email: str = Depends(get_admin_email)):
+    """Re-read the runtime settings file on this worker (admin only)"""
+    try:
+        return await admin_controller.reload_settings()
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to reload settings: {str(e)}")
+
+@router.post("/cache/invalidate")
+async def invalidate_cache(
+    cache: str = Query(..., description="'prompts', 'flows', 'answer_cache' or 'settings'"),
+    admin_email: str = Depends(get_admin_email)
+):
+    """Clear a cache on every worker, e.g. after editing prompt files (admin only)"""
+    try:
+        return await admin_controller.invalidate_cache(cache)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to invalidate cache: {str(e)}")
@@ -2,7 +2,8 @@ from fastapi import APIRouter, HTTPException, Depends
 from models.requests import SignupRequest, LoginRequest, AuthResponse
 from models.user import UserResponse
 from controllers.auth_controller import auth_controller
-from config.auth import get_current_user_email
+from fastapi.security import HTTPAuthorizationCredentials
+from config.auth import get_current_user_email, security
 
 router = APIRouter(prefix="/api/auth", tags=["authentication"])
 
@@ -37,10 +38,13 @@ async def get_profile(current_user_email: str = Depends(get_current_user_email))
         raise HTTPException(status_code=500, detail=f"Failed to get profile: {str(e)}")
 
 @router.post("/logout")
-async def logout(current_user_email: str = Depends(get_current_user_email)):
-    """User logout"""
+async def logout(
+    current_user_email: str = Depends(get_current_user_email),
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+):
+    """User logout (revokes the token)"""
     try:
-        return await auth_controller.logout(current_user_email)
+        return await auth_controller.logout(current_user_email, credentials.credentials)
     except HTTPException:
         raise
     except Exception as e:
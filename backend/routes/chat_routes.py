@@ -1,8 +1,9 @@
 from fastapi import APIRouter, HTTPException
-from models.requests import ChatRequest
+from models.requests import ChatRequest, DraftRequest
 from controllers.chat_controller import chat_controller
+from utils.responses import FastJSONResponse
 
-router = APIRouter(prefix="/api/chat", tags=["chat"])
+router = APIRouter(prefix="/api/chat", tags=["chat"], default_response_class=FastJSONResponse)
 
 @router.post("/send")
 async def send_message(request: ChatRequest):
@@ -21,4 +22,24 @@ async def stream_message(request: ChatRequest):
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Streaming failed: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Streaming failed: {str(e)}")
+
+@router.post("/draft")
+async def draft_message(request: DraftRequest):
+    """Report the candidate's unsent draft (send when typing pauses)"""
+    try:
+        return await chat_controller.draft(request)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to process draft: {str(e)}")
+
+@router.get("/stream/{stream_id}")
+async def resume_stream(stream_id: str, offset: int = 0):
+    """Reattach to a streamed reply; `offset` is the number of bytes already received"""
+    try:
+        return await chat_controller.resume_stream(stream_id, offset)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to resume stream: {str(e)}")
@@ -1,10 +1,11 @@
-from fastapi import APIRouter, HTTPException, Depends, Header
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, Response
 from typing import Optional
 from models.requests import SessionRequest, StartInterviewRequest, EndInterviewRequest
 from controllers.session_controller import session_controller
 from config.auth import get_current_user_email
+from utils.responses import FastJSONResponse
 
-router = APIRouter(prefix="/api/sessions", tags=["sessions"])
+router = APIRouter(prefix="/api/sessions", tags=["sessions"], default_response_class=FastJSONResponse)
 
 async def get_optional_user_email(authorization: Optional[str] = Header(None)) -> Optional[str]:
     """Get user email from token if provided, otherwise return None (for guest users)"""
@@ -33,11 +34,27 @@ async def init_session(
 @router.get("/{session_id}/history")
 async def get_history(
     session_id: str,
+    limit: Optional[int] = Query(None, description="Maximum number of messages to return"),
+    before: Optional[int] = Query(None, description="Return messages older than this history index"),
+    after: Optional[int] = Query(None, description="Return messages newer than this history index"),
+    fields: Optional[str] = Query(None, description="Comma-separated message fields, e.g. role,content"),
+    if_none_match: Optional[str] = Header(None),
     current_user_email: Optional[str] = Depends(get_optional_user_email)
 ):
-    """Get chat history for a session"""
+    """Get chat history for a session (paginated with limit/before/after, supports ETags)"""
     try:
-        return await session_controller.get_history(session_id, current_user_email)
+        page = await session_controller.get_history(session_id, current_user_email, limit, before, after, fields)
+        headers = {
+            "ETag": page["etag"],
+            "Cache-Control": "no-cache",
+            "X-Total-Count": str(page["total"]),
+            "X-History-Start": str(page["start"]),
+        }
+        if if_none_match and (if_none_match.strip() == "*" or page["etag"] in [tag.strip() for tag in if_none_match.split(",")]):
+            return Response(status_code=304, headers=headers)
+        return FastJSONResponse(page["messages"], headers=headers)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get history: {str(e)}")
 
@@ -54,6 +71,19 @@ async def get_session_status(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get status: {str(e)}")
 
+@router.get("/{session_id}/evaluation")
+async def get_session_evaluation(
+    session_id: str,
+    current_user_email: Optional[str] = Depends(get_optional_user_email)
+):
+    """Get the post-interview evaluation (status is pending until a worker has scored it)"""
+    try:
+        return await session_controller.get_evaluation(session_id, current_user_email)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get evaluation: {str(e)}")
+
 @router.post("/start")
 async def start_interview(
     request: StartInterviewRequest,
@@ -85,7 +115,7 @@ async def end_interview(
 async def get_my_sessions(current_user_email: str = Depends(get_current_user_email)):
     """Get all sessions for the authenticated user"""
     try:
-        return await session_controller.get_user_sessions(current_user_email)
+        return FastJSONResponse(await session_controller.get_user_sessions(current_user_email))
     except HTTPException:
         raise
     except Exception as e:
@@ -95,7 +125,7 @@ async def get_my_sessions(current_user_email: str = Depends(get_current_user_ema
 async def get_my_active_sessions(current_user_email: str = Depends(get_current_user_email)):
     """Get active (incomplete) sessions for the authenticated user"""
     try:
-        return await session_controller.get_user_active_sessions(current_user_email)
+        return FastJSONResponse(await session_controller.get_user_active_sessions(current_user_email))
     except HTTPException:
         raise
     except Exception as e:
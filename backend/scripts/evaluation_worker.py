@@ -0,0 +1,88 @@
+"""
+Evaluation worker: scores completed interviews from the evaluation_jobs queue.
+
+Run it next to the API (set EVALUATION_IN_PROCESS=false there) or as a batch job:
+
+    python -m scripts.evaluation_worker --workers 4
+    python -m scripts.evaluation_worker --once --scorer deterministic
+    python -m scripts.evaluation_worker --enqueue-missing --once
+"""
+import argparse
+import asyncio
+import os
+import signal
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from config.constants import (  # noqa: E402
+    SESSIONS_COLLECTION, EVALUATION_SCORER, EVALUATION_WORKERS, EVALUATION_BATCH_SIZE
+)
+from config.database import db  # noqa: E402
+from services.evaluation_service import (  # noqa: E402
+    EvaluationService, EvaluationWorkerPool, evaluation_queue, get_scorer
+)
+
+
+async def enqueue_missing() -> int:
+    """Queue completed sessions that have no evaluation yet (e.g. finished before this feature)"""
+    count = 0
+    cursor = db.get_collection(SESSIONS_COLLECTION).find(
+        {"metadata.interview_completed": True, "evaluation": {"$exists": False}},
+        {"_id": 0, "session_id": 1}
+    )
+    async for session in cursor:
+        await evaluation_queue.enqueue(session["session_id"])
+        count += 1
+    return count
+
+
+async def run(args: argparse.Namespace) -> None:
+    await db.connect_db()
+    try:
+        await evaluation_queue.ensure_indexes()
+        if args.enqueue_missing:
+            print(f"Queued {await enqueue_missing()} completed session(s) without an evaluation")
+
+        pool = EvaluationWorkerPool(
+            EvaluationService(get_scorer(args.scorer)),
+            evaluation_queue,
+            workers=args.workers,
+            batch_size=args.batch_size
+        )
+        if args.once:
+            total = 0
+            while True:
+                handled = await pool.run_once()
+                if not handled:
+                    break
+                total += handled
+            print(f"Processed {total} evaluation job(s)")
+            return
+
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+        pool.start()
+        print(f"Evaluation worker running ({args.workers} workers, scorer={args.scorer})")
+        await stop.wait()
+        await pool.stop()
+    finally:
+        await db.close_db()
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=EVALUATION_WORKERS)
+    parser.add_argument("--batch-size", type=int, default=EVALUATION_BATCH_SIZE)
+    parser.add_argument("--scorer", choices=["llm", "deterministic"], default=EVALUATION_SCORER)
+    parser.add_argument("--once", action="store_true", help="Drain the due jobs and exit")
+    parser.add_argument("--enqueue-missing", action="store_true", help="Queue completed sessions without an evaluation")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    asyncio.run(run(parse_args()))
@@ -0,0 +1,78 @@
+"""
+Bulk transcript export straight from MongoDB (same format as GET /api/admin/export).
+
+    python -m scripts.export_transcripts --output transcripts.ndjson --completed
+    python -m scripts.export_transcripts --role meta-ads-expert --since 2025-01-01 --format parquet -o out.parquet
+    python -m scripts.export_transcripts --fields role,content | gzip > transcripts.ndjson.gz
+"""
+import argparse
+import asyncio
+import os
+import sys
+from datetime import datetime
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from config.database import db  # noqa: E402
+from services.export_service import ExportService, ExportFilter, EXPORT_FORMATS, require_format  # noqa: E402
+
+
+async def run(args: argparse.Namespace) -> int:
+    try:
+        require_format(args.format)
+    except (ValueError, RuntimeError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+    export_filter = ExportFilter(
+        role_id=args.role,
+        since=args.since,
+        until=args.until,
+        completed=args.completed
+    )
+    service = ExportService(batch_size=args.batch_size)
+    if args.format == "parquet":
+        chunks = service.stream_parquet(export_filter, limit=args.limit)
+    else:
+        chunks = service.stream_ndjson(
+            export_filter,
+            include_messages=not args.no_messages,
+            message_fields=args.fields.split(",") if args.fields else None,
+            limit=args.limit
+        )
+
+    await db.connect_db()
+    out = open(args.output, "wb") if args.output and args.output != "-" else sys.stdout.buffer
+    written = 0
+    try:
+        async for chunk in chunks:
+            out.write(chunk)
+            written += len(chunk)
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
+        await db.close_db()
+    print(f"Wrote {written} bytes", file=sys.stderr)
+    return 0
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="ndjson")
+    parser.add_argument("-o", "--output", help="Output file ('-' or omitted for stdout)")
+    parser.add_argument("--role", help="Only sessions of this role_id")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="Created at or after (ISO 8601)")
+    parser.add_argument("--until", type=datetime.fromisoformat, help="Created before (ISO 8601)")
+    completion = parser.add_mutually_exclusive_group()
+    completion.add_argument("--completed", dest="completed", action="store_true", default=None)
+    completion.add_argument("--unfinished", dest="completed", action="store_false")
+    parser.add_argument("--fields", help="Comma-separated message fields (NDJSON), e.g. role,content")
+    parser.add_argument("--no-messages", action="store_true", help="Session summaries only (NDJSON)")
+    parser.add_argument("--limit", type=int, help="Maximum number of sessions")
+    parser.add_argument("--batch-size", type=int, default=ExportService().batch_size)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(run(parse_args())))
@@ -0,0 +1,38 @@
+"""
+Recompute the interview funnel rollups behind GET /api/admin/stats from every
+live and archived session (same as POST /api/admin/stats/rebuild).
+
+    python -m scripts.rebuild_analytics
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from config.database import db  # noqa: E402
+from services.analytics_service import AnalyticsService  # noqa: E402
+
+
+async def run(args: argparse.Namespace) -> int:
+    await db.connect_db()
+    try:
+        service = AnalyticsService()
+        await service.ensure_indexes()
+        written = await service.rebuild()
+    finally:
+        await db.close_db()
+    print(f"Wrote {written} rollup documents", file=sys.stderr)
+    return 0
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(run(parse_args())))
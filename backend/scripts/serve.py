@@ -0,0 +1,71 @@
+"""
+Production server: the API in several uvicorn worker processes, one per
+available CPU core unless WEB_CONCURRENCY (or --workers) says otherwise.
+Workers share rate limits, session leases, revoked tokens and cache
+invalidations through SHARED_STATE_BACKEND=mongo.
+
+    python -m scripts.serve
+    python -m scripts.serve --workers 4 --port 8000
+    gunicorn -c gunicorn.conf.py app:app    (same sizing, gunicorn as process manager)
+"""
+import argparse
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from config.constants import WEB_CONCURRENCY, PORT, SHARED_STATE_BACKEND, SEARCH_BACKEND  # noqa: E402
+
+
+def available_cpus() -> int:
+    """Cores this process may run on: its CPU affinity, capped by a cgroup v2 quota (containers)"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # Not available on macOS
+        cpus = os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cpus = min(cpus, int(quota) // int(period))
+    except (OSError, ValueError):
+        pass
+    return max(cpus, 1)
+
+
+def worker_count(requested: int = 0) -> int:
+    """An explicit count, else WEB_CONCURRENCY, else one worker per available core"""
+    return requested or WEB_CONCURRENCY or available_cpus()
+
+
+def check_multi_worker(workers: int) -> None:
+    """Refuse to start several workers on state that only holds within one process"""
+    if workers > 1 and SHARED_STATE_BACKEND != "mongo":
+        sys.exit(
+            f"❌ {workers} workers need SHARED_STATE_BACKEND=mongo: with '{SHARED_STATE_BACKEND}' each worker "
+            "keeps its own rate limit, session leases and revoked tokens. Use --workers 1 otherwise."
+        )
+    if workers > 1 and SEARCH_BACKEND == "memory":
+        print("⚠️ SEARCH_BACKEND=memory: each worker only indexes the sessions it served")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the API with one worker process per CPU core")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--workers", type=int, default=0,
+                        help="Worker processes (default: WEB_CONCURRENCY, else one per available core)")
+    args = parser.parse_args()
+
+    workers = worker_count(args.workers)
+    check_multi_worker(workers)
+    print(f"🚀 Starting {workers} worker(s) on {args.host}:{args.port} (shared state: {SHARED_STATE_BACKEND})")
+
+    import uvicorn
+    uvicorn.run("app:app", host=args.host, port=args.port, workers=workers, app_dir=BACKEND_DIR)
+
+
+if __name__ == "__main__":
+    main()
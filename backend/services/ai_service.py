@@ -1,36 +1,119 @@
-import httpx
-import os
+import hashlib
 import time
 import asyncio
-import json
-from typing import List, Dict, Any
-from collections import deque
-from config.constants import OPENROUTER_API_URL, DEFAULT_MODEL, DEFAULT_TEMPERATURE, DEFAULT_MAX_TOKENS
+from typing import List, Dict, Any, Optional
+from dataclasses import dataclass
+from config.constants import (
+    OPENROUTER_API_URL, DEFAULT_MODEL, DEFAULT_TEMPERATURE, DEFAULT_MAX_TOKENS,
+    LLM_COALESCE_REQUESTS, LLM_COALESCE_MAX_BUFFER_CHARS, LLM_RATE_LIMIT_PER_MINUTE,
+    LLM_REQUEST_TIMEOUT_SECONDS, LLM_MAX_RETRIES, LLM_RETRY_BASE_DELAY_SECONDS,
+    LLM_RETRY_MAX_DELAY_SECONDS, LLM_RETRY_BACKOFF_FACTOR
+)
+from utils.sse import SSEDecoder, DONE, UpstreamStreamError
+from utils.singleflight import SingleFlight, SingleFlightStream
+from utils import fast_json
+from config.settings import settings
+from services.prompt_registry import PromptVariant
+from services.runtime_settings import runtime_settings
+from services.shared_state import shared_state
+from utils.lazy_import import lazy_import
+from utils.metrics import metrics
+
+# Loaded by the first LLM call, so workers boot (and pass health checks) without it
+httpx = lazy_import("httpx")
+
+llm_prompt_tokens_total = metrics.counter("llm_prompt_tokens_total", "Prompt tokens sent upstream, by provider cache outcome")
+llm_completion_tokens_total = metrics.counter("llm_completion_tokens_total", "Completion tokens received from upstream")
+llm_request_seconds = metrics.histogram("llm_request_seconds", "Upstream LLM call duration")
+llm_ttft_seconds = metrics.histogram("llm_ttft_seconds", "Time to first streamed token")
 
 class RateLimitExceeded(Exception):
     """Custom exception for rate limit exceeded"""
     pass
 
+@dataclass
+class LLMUsage:
+    """Token usage and timing of one upstream call (filled in by AIService)"""
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_prompt_tokens: int = 0
+    cost: float = 0.0  # Provider-reported cost (OpenRouter credits), when available
+    latency_ms: float = 0.0
+    ttft_ms: Optional[float] = None
+    reported: bool = False  # Whether the provider returned a usage block
+    
+    def update_from_provider(self, raw: Optional[Dict[str, Any]]) -> None:
+        """Copy the provider's usage block (OpenAI/OpenRouter shape)"""
+        if not raw:
+            return
+        details = raw.get("prompt_tokens_details") or {}
+        self.prompt_tokens = int(raw.get("prompt_tokens") or 0)
+        self.completion_tokens = int(raw.get("completion_tokens") or 0)
+        self.cached_prompt_tokens = int(details.get("cached_tokens") or 0)
+        self.cost = float(raw.get("cost") or 0.0)
+        self.reported = True
+    
+    def totals(self) -> Dict[str, float]:
+        """Additive counters for this call (summed per session and in rollups)"""
+        totals = {
+            "requests": 1,
+            "prompt_tokens": self.prompt_tokens,
+            "cached_prompt_tokens": self.cached_prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cost": self.cost,
+            "latency_ms": round(self.latency_ms, 1),
+        }
+        if self.ttft_ms is not None:
+            totals["ttft_ms"] = round(self.ttft_ms, 1)
+        return totals
+    
+    def metadata_increments(self) -> Dict[str, float]:
+        """Per-session counters to $inc under metadata.llm_usage"""
+        return {f"llm_usage.{key}": value for key, value in self.totals().items()}
+    
+    @staticmethod
+    def combined_increments(*calls: "LLMUsage") -> Optional[Dict[str, float]]:
+        """metadata_increments() summed over the calls that completed (None if none did)"""
+        increments: Dict[str, float] = {}
+        for call in calls:
+            if call.latency_ms:
+                for key, value in call.metadata_increments().items():
+                    increments[key] = increments.get(key, 0) + value
+        return increments or None
+    
+    def publish(self, mode: str) -> None:
+        llm_request_seconds.observe(self.latency_ms / 1000, mode=mode)
+        if self.ttft_ms is not None:
+            llm_ttft_seconds.observe(self.ttft_ms / 1000)
+        if self.reported:
+            llm_prompt_tokens_total.inc(self.cached_prompt_tokens, cache="hit")
+            llm_prompt_tokens_total.inc(self.prompt_tokens - self.cached_prompt_tokens, cache="miss")
+            llm_completion_tokens_total.inc(self.completion_tokens)
+
 class AIService:
     def __init__(self):
-        self.api_key = os.getenv('OPENROUTER_API_KEY')
+        self.api_key = settings.openrouter_api_key
         self.api_url = OPENROUTER_API_URL
         self.model = DEFAULT_MODEL
         self.temperature = DEFAULT_TEMPERATURE
         self.max_tokens = DEFAULT_MAX_TOKENS
         
-        # Rate limiting: 10 requests per minute
-        self.max_requests_per_minute = 10
-        self.request_timestamps = deque()
+        # Rate limiting: requests per minute across all workers (SHARED_STATE_BACKEND)
+        self.max_requests_per_minute = LLM_RATE_LIMIT_PER_MINUTE
         
         # Timeout settings
-        self.request_timeout = 30.0
+        self.request_timeout = LLM_REQUEST_TIMEOUT_SECONDS
+        
+        # Request coalescing for identical in-flight calls
+        self.coalesce_requests = LLM_COALESCE_REQUESTS
+        self._inflight_calls = SingleFlight("llm_complete")
+        self._inflight_streams = SingleFlightStream("llm_stream", max_buffer=LLM_COALESCE_MAX_BUFFER_CHARS)
         
         # Retry Configuration
-        self.max_retries = 3                    # Maximum number of retry attempts
-        self.base_delay = 1.0                   # Base delay between retries (seconds)
-        self.max_delay = 60.0                   # Maximum delay between retries
-        self.backoff_factor = 2.0               # Exponential backoff multiplier
+        self.max_retries = LLM_MAX_RETRIES                  # Maximum number of retry attempts
+        self.base_delay = LLM_RETRY_BASE_DELAY_SECONDS      # Base delay between retries (seconds)
+        self.max_delay = LLM_RETRY_MAX_DELAY_SECONDS        # Maximum delay between retries
+        self.backoff_factor = LLM_RETRY_BACKOFF_FACTOR      # Exponential backoff multiplier
         
         # Which HTTP status codes should trigger a retry
         self.retryable_status_codes = {
@@ -41,16 +124,42 @@ class AIService:
             504,  # Gateway Timeout
         }
     
-    def _check_rate_limit(self):
-        current_time = time.time()
-        
-        while self.request_timestamps and current_time - self.request_timestamps[0] > 60:
-            self.request_timestamps.popleft()
-        
-        if len(self.request_timestamps) >= self.max_requests_per_minute:
+    async def _check_rate_limit(self):
+        if not await shared_state.rate_limit("llm", self.max_requests_per_minute):
             raise RateLimitExceeded("Rate limit exceeded. Please try again in a moment.")
+    
+    def rate_limit_headroom(self) -> int:
+        """Requests still allowed in the current rate-limit window"""
+        return shared_state.headroom("llm", self.max_requests_per_minute)
+    
+    async def shared_rate_limit_headroom(self) -> int:
+        """Requests still allowed in the current window across all workers (for background callers)"""
+        return await shared_state.shared_headroom("llm", self.max_requests_per_minute)
+    
+    @staticmethod
+    def _request_key(payload: dict) -> str:
+        """Identity of an upstream request: model, messages and sampling parameters"""
+        return hashlib.sha256(fast_json.dumps(payload)).hexdigest()
+    
+    def _prepare_messages(
+        self,
+        messages: List[Dict[str, str]],
+        phase_context: str = None,
+        prompt: Optional[PromptVariant] = None
+    ) -> List[Dict[str, str]]:
+        """
+        Lay out the payload for provider prompt caching: the role prompt and prior
+        turns form a byte-stable prefix, and everything that changes per turn
+        (phase instructions, status line) goes in a trailing system message.
+        """
+        enhanced_messages = messages.copy()
+        if prompt and len(enhanced_messages) > 0 and enhanced_messages[0]["role"] == "system":
+            enhanced_messages[0] = {"role": "system", "content": prompt.prefix}
         
-        self.request_timestamps.append(current_time)
+        trailing = "\n\n".join(part for part in (prompt.instructions if prompt else None, phase_context) if part)
+        if trailing:
+            enhanced_messages.append({"role": "system", "content": trailing})
+        return enhanced_messages
     
     def _calculate_retry_delay(self, attempt: int) -> float:
         delay = self.base_delay * (self.backoff_factor ** attempt)
@@ -118,20 +227,18 @@ class AIService:
         else:
             raise Exception("Request failed after multiple attempts. Please try again later.")
     
-    async def generate_response(self, messages: List[Dict[str, str]], phase_context: str = None) -> str:
+    async def generate_response(
+        self,
+        messages: List[Dict[str, str]],
+        phase_context: str = None,
+        prompt: Optional[PromptVariant] = None,
+        usage: Optional[LLMUsage] = None
+    ) -> str:
         if not self.api_key:
             raise ValueError("OPENROUTER_API_KEY not found in environment variables")
         
-        # Check rate limit before making request
-        try:
-            self._check_rate_limit()
-        except RateLimitExceeded:
-            raise RateLimitExceeded("Too many requests. Please wait a moment before trying again.")
-        
-        # Add phase context to system prompt if provided
-        enhanced_messages = messages.copy()
-        if phase_context and len(enhanced_messages) > 0 and enhanced_messages[0]["role"] == "system":
-            enhanced_messages[0]["content"] += f"\n\n{phase_context}"
+        # Use the phase-specific registry prompt and add phase context if provided
+        enhanced_messages = self._prepare_messages(messages, phase_context, prompt)
         
         headers = {
             "Authorization": f"Bearer {self.api_key}",
@@ -142,12 +249,36 @@ class AIService:
             "model": self.model,
             "messages": enhanced_messages,
             "temperature": self.temperature,
-            "max_tokens": self.max_tokens
+            "max_tokens": self.max_tokens,
+            "usage": {"include": True}
         }
 
+        call_usage = usage if usage is not None else LLMUsage()
+        if not self.coalesce_requests:
+            return await self._complete(headers, payload, call_usage)
+        # Identical in-flight requests (double clicks, client retries) share one upstream call;
+        # only the caller that started it gets the usage
+        return await self._inflight_calls.do(
+            self._request_key(payload),
+            lambda: self._complete(headers, payload, call_usage)
+        )
+
+    async def _complete(self, headers: dict, payload: dict, call_usage: LLMUsage) -> str:
+        # Check rate limit before making request
+        try:
+            await self._check_rate_limit()
+        except RateLimitExceeded:
+            raise RateLimitExceeded("Too many requests. Please wait a moment before trying again.")
+        
         try:
             # Use the retry mechanism
+            started = time.perf_counter()
             response_json = await self._make_request_with_retry(headers, payload)
+            
+            call_usage.latency_ms = (time.perf_counter() - started) * 1000
+            call_usage.update_from_provider(response_json.get("usage"))
+            call_usage.publish("complete")
+            
             return response_json["choices"][0]["message"]["content"]
             
         except ValueError as e:  # API key missing
@@ -157,20 +288,55 @@ class AIService:
         except Exception as e:  # All other errors (already processed by retry logic)
             raise e  # Re-raise the final error from retry attempts
 
-    async def stream_response(self, messages: List[Dict[str, str]], phase_context: str = None):
+    async def warm_prefix(
+        self,
+        messages: List[Dict[str, str]],
+        prompt: Optional[PromptVariant] = None,
+        usage: Optional[LLMUsage] = None
+    ) -> None:
+        """
+        Send the byte-stable prefix of the next request (role prompt + prior turns)
+        with max_tokens=1, so the provider has it cached when the real turn arrives.
+        """
         if not self.api_key:
             raise ValueError("OPENROUTER_API_KEY not found in environment variables")
+        await self._check_rate_limit()
         
-        # Check rate limit before making request
-        try:
-            self._check_rate_limit()
-        except RateLimitExceeded:
-            raise RateLimitExceeded("Too many requests. Please wait a moment before trying again.")
+        prefix = messages.copy()
+        if prompt and prefix and prefix[0]["role"] == "system":
+            prefix[0] = {"role": "system", "content": prompt.prefix}
         
-        # Add phase context to system prompt if provided
-        enhanced_messages = messages.copy()
-        if phase_context and len(enhanced_messages) > 0 and enhanced_messages[0]["role"] == "system":
-            enhanced_messages[0]["content"] += f"\n\n{phase_context}"
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+        payload = {
+            "model": self.model,
+            "messages": prefix,
+            "temperature": self.temperature,
+            "max_tokens": 1,
+            "usage": {"include": True}
+        }
+        
+        started = time.perf_counter()
+        response_json = await self._make_request_with_retry(headers, payload)
+        call_usage = usage if usage is not None else LLMUsage()
+        call_usage.latency_ms = (time.perf_counter() - started) * 1000
+        call_usage.update_from_provider(response_json.get("usage"))
+        call_usage.publish("warm")
+
+    async def stream_response(
+        self,
+        messages: List[Dict[str, str]],
+        phase_context: str = None,
+        prompt: Optional[PromptVariant] = None,
+        usage: Optional[LLMUsage] = None
+    ):
+        if not self.api_key:
+            raise ValueError("OPENROUTER_API_KEY not found in environment variables")
+        
+        # Use the phase-specific registry prompt and add phase context if provided
+        enhanced_messages = self._prepare_messages(messages, phase_context, prompt)
         
         headers = {
             "Authorization": f"Bearer {self.api_key}",
@@ -182,34 +348,73 @@ class AIService:
             "messages": enhanced_messages,
             "temperature": self.temperature,
             "max_tokens": self.max_tokens,
-            "stream": True
+            "stream": True,
+            "stream_options": {"include_usage": True},
+            "usage": {"include": True}
         }
 
+        call_usage = usage if usage is not None else LLMUsage()
+        if not self.coalesce_requests:
+            upstream = self._stream(headers, payload, call_usage)
+        else:
+            # One upstream stream fans out to every identical in-flight request
+            upstream = self._inflight_streams.subscribe(
+                self._request_key(payload),
+                lambda: self._stream(headers, payload, call_usage)
+            )
+        try:
+            async for delta in upstream:
+                yield delta
+        finally:
+            await upstream.aclose()
+
+    async def _stream(self, headers: dict, payload: dict, call_usage: LLMUsage):
+        # Check rate limit before making request
+        try:
+            await self._check_rate_limit()
+        except RateLimitExceeded:
+            raise RateLimitExceeded("Too many requests. Please wait a moment before trying again.")
+        
         # Retry logic for establishing the streaming connection
         last_exception = None
+        yielded_tokens = False
+        started = time.perf_counter()
         
         for attempt in range(self.max_retries + 1):
+            decoder = SSEDecoder()
             try:
                 async with httpx.AsyncClient(timeout=self.request_timeout) as client:
                     async with client.stream("POST", self.api_url, headers=headers, json=payload) as response:
                         response.raise_for_status()
                         
-                        # Connection established successfully, start streaming
-                        async for line in response.aiter_lines():
-                            if not line or not line.startswith("data:"):
-                                continue
-                            data = line[len("data: "):]
-                            if data.strip() == "[DONE]":
-                                break
-                            try:
-                                chunk = json.loads(data)
-                                delta = chunk["choices"][0]["delta"].get("content", "")
+                        # Connection established successfully, decode raw chunks incrementally
+                        done = False
+                        async for raw in response.aiter_bytes():
+                            for data in decoder.feed(raw):
+                                if data == DONE:
+                                    done = True
+                                    break
+                                delta = decoder.extract_content(data)
                                 if delta:
+                                    if not yielded_tokens:
+                                        call_usage.ttft_ms = (time.perf_counter() - started) * 1000
+                                    yielded_tokens = True
                                     yield delta
-                            except Exception:
-                                continue
+                            if done:
+                                break
+                        
+                        if not done:
+                            for data in decoder.flush():
+                                if data != DONE:
+                                    delta = decoder.extract_content(data)
+                                    if delta:
+                                        yielded_tokens = True
+                                        yield delta
                         
                         # If we get here, streaming completed successfully
+                        call_usage.latency_ms = (time.perf_counter() - started) * 1000
+                        call_usage.update_from_provider(decoder.usage)
+                        call_usage.publish("stream")
                         return
                         
             except Exception as e:
@@ -223,15 +428,22 @@ class AIService:
                 if not self._is_retryable_error(e):
                     break
                 
-                # Only retry if we haven't started yielding tokens yet
-                # (In practice, this retry only helps with connection establishment)
+                # Only retry if we haven't started yielding tokens yet, otherwise
+                # the client would receive the beginning of the reply twice
+                if yielded_tokens:
+                    break
+                
                 delay = self._calculate_retry_delay(attempt)
                 print(f"Streaming connection failed (attempt {attempt + 1}/{self.max_retries + 1}): {str(e)}")
                 print(f"Retrying in {delay} seconds...")
                 await asyncio.sleep(delay)
+            finally:
+                decoder.close()
         
         # If we get here, all retry attempts failed
-        if isinstance(last_exception, httpx.TimeoutException):
+        if isinstance(last_exception, UpstreamStreamError):
+            raise last_exception
+        elif isinstance(last_exception, httpx.TimeoutException):
             raise Exception("Streaming request timed out after multiple attempts. Please try again later.")
         elif isinstance(last_exception, httpx.HTTPStatusError):
             if last_exception.response.status_code == 429:
@@ -247,3 +459,15 @@ class AIService:
 
 # Global AI service instance
 ai_service = AIService()
+runtime_settings.bind(
+    ai_service,
+    model="DEFAULT_MODEL",
+    temperature="DEFAULT_TEMPERATURE",
+    max_tokens="DEFAULT_MAX_TOKENS",
+    max_requests_per_minute="LLM_RATE_LIMIT_PER_MINUTE",
+    request_timeout="LLM_REQUEST_TIMEOUT_SECONDS",
+    max_retries="LLM_MAX_RETRIES",
+    base_delay="LLM_RETRY_BASE_DELAY_SECONDS",
+    max_delay="LLM_RETRY_MAX_DELAY_SECONDS",
+    coalesce_requests="LLM_COALESCE_REQUESTS"
+)
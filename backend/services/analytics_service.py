@@ -0,0 +1,178 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+from config.database import db
+from config.constants import ANALYTICS_ROLLUPS_COLLECTION, ANALYTICS_FLUSH_INTERVAL_SECONDS, SESSIONS_COLLECTION, ARCHIVE_COLLECTION
+from services.interview_flow import interview_flows, flow_events, PhaseTransition, COMPLETED_PHASE
+from utils.bulk_writes import CounterBuffer
+from utils.metrics import metrics
+from utils.periodic import PeriodicTask
+
+analytics_flushes_total = metrics.counter("analytics_rollup_flushes_total", "Analytics rollup batch writes, by outcome")
+
+# Additive counters of one rollup document ("phases.<phase>" counts sessions entering a phase)
+ANALYTICS_COUNTERS = ("started", "completed", "ended_early", "questions")
+
+RollupKey = Tuple[str, str]  # (day, role_id)
+
+
+def _day(moment: datetime) -> str:
+    return moment.strftime("%Y-%m-%d")
+
+
+class AnalyticsService:
+    """
+    Daily interview funnel rollups per role: sessions started, phases entered,
+    interviews completed (and how many ended early) and the questions they
+    reached.
+
+    Counters come from phase transitions, buffered in memory and flushed as
+    $inc upserts like the usage rollups, so the admin dashboard never scans
+    `sessions`. rebuild() recomputes every rollup from the sessions and the
+    archive, e.g. after changing what is counted. Events are bucketed by the
+    day they happen (a rebuild uses creation and last-update times).
+    """
+
+    def __init__(self, flush_interval: float = ANALYTICS_FLUSH_INTERVAL_SECONDS):
+        self.flush_interval = flush_interval
+        self._buffer = CounterBuffer(
+            "Analytics rollup",
+            lambda rollup_key: {"day": rollup_key[0], "role_id": rollup_key[1]},
+            analytics_flushes_total
+        )
+        self._flusher = PeriodicTask("Analytics rollup flush", self.flush, lambda: self.flush_interval)
+
+    @property
+    def collection(self):
+        return db.get_collection(ANALYTICS_ROLLUPS_COLLECTION)
+
+    async def ensure_indexes(self):
+        """One rollup document per day and role"""
+        await self.collection.create_index([("day", 1), ("role_id", 1)], unique=True)
+
+    def _add(self, day: str, role_id: Optional[str], field: str, amount: int = 1) -> None:
+        self._buffer.add((day, role_id or "unknown"), field, amount)
+
+    def record(self, transition: PhaseTransition) -> None:
+        """Count one phase transition (no I/O)"""
+        day = _day(datetime.utcnow())
+        if transition.from_phase is None:
+            self._add(day, transition.role_id, "started")
+        if transition.to_phase == COMPLETED_PHASE:
+            self._add(day, transition.role_id, "completed")
+            self._add(day, transition.role_id, "questions", transition.question_count)
+            if transition.question_count < interview_flows.for_role(transition.role_id).total_questions:
+                self._add(day, transition.role_id, "ended_early")
+        else:
+            self._add(day, transition.role_id, f"phases.{transition.to_phase}")
+
+    async def flush(self) -> int:
+        """Write buffered counters; returns the number of rollup documents touched"""
+        return await self._buffer.flush(self.collection)
+
+    def start(self):
+        """Start the periodic flusher (called from the app lifespan)"""
+        self._flusher.start()
+
+    async def stop(self):
+        """Stop the flusher and write whatever is still buffered"""
+        await self._flusher.stop()
+        await self.flush()
+
+    async def rebuild(self) -> int:
+        """
+        Recompute every rollup from live and archived sessions; returns the number
+        of rollup documents written. Sessions are grouped by the database, so only
+        one row per (role, day, progress) comes back.
+        """
+        pipeline = [
+            {"$match": {"metadata.question_count": {"$gte": 1}}},
+            {"$group": {
+                "_id": {
+                    "role_id": "$role_id",
+                    "started": {"$dateToString": {"format": "%Y-%m-%d", "date": "$metadata.created_at"}},
+                    "updated": {"$dateToString": {"format": "%Y-%m-%d", "date": "$metadata.updated_at"}},
+                    "question_count": "$metadata.question_count",
+                    "completed": {"$ifNull": ["$metadata.interview_completed", False]},
+                },
+                "sessions": {"$sum": 1},
+            }},
+        ]
+        rollups: Dict[RollupKey, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        for name in (SESSIONS_COLLECTION, ARCHIVE_COLLECTION):
+            async for row in db.get_collection(name).aggregate(pipeline):
+                group, sessions = row["_id"], row["sessions"]
+                role_id = group.get("role_id") or "unknown"
+                flow = interview_flows.for_role(role_id)
+                started = rollups[(group["started"], role_id)]
+                started["started"] += sessions
+                # Phases entered: every phase up to the last question asked
+                asked = min(group["question_count"], flow.total_questions)
+                for phase in {flow.phase_for(number) for number in range(1, asked + 1)}:
+                    started[f"phases.{phase}"] += sessions
+                if group["completed"]:
+                    completed = rollups[(group["updated"], role_id)]
+                    completed["completed"] += sessions
+                    completed["questions"] += group["question_count"] * sessions
+                    if group["question_count"] < flow.total_questions:
+                        completed["ended_early"] += sessions
+
+        # Drop what is buffered: the rebuild already counts it
+        self._buffer.clear()
+        now = datetime.utcnow()
+        documents = []
+        for (day, role_id), counters in rollups.items():
+            document: Dict[str, Any] = {"day": day, "role_id": role_id, "updated_at": now, "phases": {}}
+            for field, value in counters.items():
+                if field.startswith("phases."):
+                    document["phases"][field.split(".", 1)[1]] = value
+                else:
+                    document[field] = value
+            documents.append(document)
+        await self.collection.delete_many({})
+        if documents:
+            await self.collection.insert_many(documents)
+        return len(documents)
+
+    async def get_stats(self, days: int, role_id: Optional[str] = None) -> Dict[str, Any]:
+        """Funnel totals per role and per day over the last `days` days (rollups only)"""
+        await self.flush()
+        since = _day(datetime.utcnow() - timedelta(days=days - 1))
+        query: Dict[str, Any] = {"day": {"$gte": since}}
+        if role_id:
+            query["role_id"] = role_id
+
+        per_role: Dict[str, Dict[str, Any]] = {}
+        per_day: Dict[str, Dict[str, Any]] = {}
+        async for rollup in self.collection.find(query, {"_id": 0, "updated_at": 0}).sort("day", 1):
+            for totals in (
+                per_role.setdefault(rollup["role_id"], {"role_id": rollup["role_id"]}),
+                per_day.setdefault(rollup["day"], {"day": rollup["day"]}),
+            ):
+                for field in ANALYTICS_COUNTERS:
+                    totals[field] = totals.get(field, 0) + rollup.get(field, 0)
+                phases = totals.setdefault("phases", {})
+                for phase, count in rollup.get("phases", {}).items():
+                    phases[phase] = phases.get(phase, 0) + count
+
+        roles = sorted(per_role.values(), key=lambda totals: totals["started"], reverse=True)
+        return {
+            "days": days,
+            "since": since,
+            "roles": [self._with_rates(totals) for totals in roles],
+            "daily": [self._with_rates(totals) for totals in per_day.values()],
+        }
+
+    @staticmethod
+    def _with_rates(totals: Dict[str, Any]) -> Dict[str, Any]:
+        totals["completion_rate"] = round(totals["completed"] / totals["started"], 4) if totals["started"] else None
+        totals["avg_questions_reached"] = round(totals["questions"] / totals["completed"], 2) if totals["completed"] else None
+        return totals
+
+# Global analytics service instance
+analytics_service = AnalyticsService()
+
+
+@flow_events.subscribe
+async def count_funnel_event(transition: PhaseTransition) -> None:
+    analytics_service.record(transition)
@@ -0,0 +1,223 @@
+import itertools
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+from config.constants import (
+    ANSWER_CACHE_MODE, ANSWER_CACHE_PHASES, ANSWER_CACHE_QUESTION_THRESHOLD, ANSWER_CACHE_ANSWER_THRESHOLD,
+    ANSWER_CACHE_MAX_ANSWER_CHARS, ANSWER_CACHE_MAX_ENTRIES, ANSWER_CACHE_TTL_SECONDS,
+    ANSWER_CACHE_NUM_PERM, ANSWER_CACHE_BANDS
+)
+from services.prompt_registry import PromptVariant
+from services.question_index import question_text
+from services.runtime_settings import runtime_settings
+from services.shared_state import shared_state
+from utils.minhash import MinHasher, LSHIndex, Signature, normalize, shingles
+from utils.metrics import metrics
+
+answer_cache_lookups_total = metrics.counter("answer_cache_lookups_total", "Answer cache lookups, by outcome (exact/similar/miss)")
+answer_cache_entries = metrics.gauge("answer_cache_entries", "Replies held by the answer cache")
+answer_cache_evictions_total = metrics.counter("answer_cache_evictions_total", "Answer cache evictions, by reason (size/ttl)")
+
+ANSWER_CACHE_MODES = ("off", "serve", "seed")
+
+# Filler around a name in the candidate's reply to the greeting ("Hi, my name is ...")
+_INTRODUCTION_WORDS = frozenset((
+    "hi", "hello", "hey", "my", "name", "names", "is", "im", "am", "its", "this", "call", "me", "and",
+    "the", "you", "thanks", "thank", "nice", "meet", "glad", "here", "ready", "good", "morning",
+    "afternoon", "evening", "sure", "yes", "just", "please"
+))
+
+@dataclass
+class CachedReply:
+    namespace: str
+    exact_key: Tuple[str, str, str]
+    question_signature: Signature
+    answer_signature: Signature
+    reply: str
+    stored_at: float
+
+
+class AnswerCache:
+    """
+    In-process cache of interviewer replies for short answers in repetitive
+    phases (the easy definitions round), shared across sessions of a role.
+
+    Entries are namespaced by the prompt variant's content hash (role, phase and
+    prompt version). A lookup first tries the normalized (question, answer)
+    text, then MinHash/LSH candidates whose estimated Jaccard similarity clears
+    both thresholds. "serve" returns the cached reply instead of calling the
+    LLM; "seed" only hands it to the LLM as a reference. Replies that mention
+    the candidate (their name or email) are never stored. Fully offline.
+    """
+
+    def __init__(
+        self,
+        mode: str = ANSWER_CACHE_MODE,
+        phases: str = ANSWER_CACHE_PHASES,
+        max_entries: int = ANSWER_CACHE_MAX_ENTRIES,
+        ttl: float = ANSWER_CACHE_TTL_SECONDS
+    ):
+        if mode not in ANSWER_CACHE_MODES:
+            raise ValueError(f"Unknown answer cache mode '{mode}'. Use one of: {', '.join(ANSWER_CACHE_MODES)}")
+        self.mode = mode
+        self.phases = {phase.strip() for phase in phases.split(",") if phase.strip()}
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.question_threshold = ANSWER_CACHE_QUESTION_THRESHOLD
+        self.answer_threshold = ANSWER_CACHE_ANSWER_THRESHOLD
+        self._hasher = MinHasher(ANSWER_CACHE_NUM_PERM)
+        self._index = LSHIndex(ANSWER_CACHE_NUM_PERM, ANSWER_CACHE_BANDS)
+        self._entries: "OrderedDict[int, CachedReply]" = OrderedDict()  # LRU order
+        self._exact: Dict[Tuple[str, str, str], int] = {}
+        self._ids = itertools.count()
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    def _eligible(self, prompt: Optional[PromptVariant], answer: str) -> bool:
+        return (
+            self.enabled and prompt is not None and prompt.phase in self.phases
+            and 0 < len(answer.strip()) <= ANSWER_CACHE_MAX_ANSWER_CHARS
+        )
+
+    @staticmethod
+    def _last_question(messages: List[Dict[str, str]]) -> Optional[str]:
+        """Interviewer turn the candidate is answering (messages end with the answer)"""
+        for message in reversed(messages[:-1]):
+            if message["role"] == "assistant":
+                return question_text(message["content"])
+        return None
+
+    @staticmethod
+    def _identifiers(messages: List[Dict[str, str]], email: Optional[str]) -> Set[str]:
+        """
+        Words that identify the candidate: their reply to the greeting, which asks
+        for their name, and the parts of their email address
+        """
+        words: Set[str] = set()
+        for previous, message in zip(messages, messages[1:]):
+            if previous["role"] == "assistant" and message["role"] == "user":
+                words.update(normalize(message["content"]).split())
+                break
+        if email:
+            words.update(re.split(r"[^a-z]+", email.casefold().split("@")[0]))
+        return {word for word in words if len(word) > 1 and word not in _INTRODUCTION_WORDS}
+
+    def lookup(self, prompt: Optional[PromptVariant], messages: List[Dict[str, str]], answer: str) -> Optional[str]:
+        """Cached reply for a near-identical (question, answer) pair, never one this session already saw"""
+        if not self._eligible(prompt, answer):
+            return None
+        question = self._last_question(messages)
+        if question is None:
+            return None
+        asked = {message["content"] for message in messages if message["role"] == "assistant"}
+
+        entry_id = self._exact.get((prompt.content_hash, normalize(question), normalize(answer)))
+        entry = self._live_entry(entry_id) if entry_id is not None else None
+        if entry is not None and entry.reply not in asked:
+            self._entries.move_to_end(entry_id)
+            answer_cache_lookups_total.inc(outcome="exact")
+            return entry.reply
+
+        question_signature = self._hasher.signature(shingles(question))
+        answer_signature = self._hasher.signature(shingles(answer))
+        best, best_score = None, 0.0
+        for candidate_id in self._index.candidates(prompt.content_hash, answer_signature):
+            entry = self._live_entry(candidate_id)
+            if entry is None or entry.reply in asked:
+                continue
+            answer_score = MinHasher.similarity(answer_signature, entry.answer_signature)
+            question_score = MinHasher.similarity(question_signature, entry.question_signature)
+            if answer_score >= self.answer_threshold and question_score >= self.question_threshold:
+                score = answer_score + question_score
+                if score > best_score:
+                    best, best_score = candidate_id, score
+
+        if best is None:
+            answer_cache_lookups_total.inc(outcome="miss")
+            return None
+        self._entries.move_to_end(best)
+        answer_cache_lookups_total.inc(outcome="similar")
+        return self._entries[best].reply
+
+    def store(
+        self,
+        prompt: Optional[PromptVariant],
+        messages: List[Dict[str, str]],
+        answer: str,
+        reply: str,
+        email: Optional[str] = None
+    ) -> None:
+        """Remember an LLM reply to an eligible answer, unless it mentions the candidate"""
+        if not self._eligible(prompt, answer) or not reply.strip():
+            return
+        if self._identifiers(messages, email) & set(normalize(reply).split()):
+            return  # Addresses this candidate (e.g. by name); never hand it to another one
+        question = self._last_question(messages)
+        if question is None:
+            return
+        exact_key = (prompt.content_hash, normalize(question), normalize(answer))
+        if exact_key in self._exact:
+            return  # Keep the first reply; repeats would only churn the index
+
+        entry_id = next(self._ids)
+        entry = CachedReply(
+            namespace=prompt.content_hash,
+            exact_key=exact_key,
+            question_signature=self._hasher.signature(shingles(question)),
+            answer_signature=self._hasher.signature(shingles(answer)),
+            reply=reply,
+            stored_at=time.monotonic()
+        )
+        self._entries[entry_id] = entry
+        self._exact[exact_key] = entry_id
+        self._index.add(entry_id, entry.namespace, entry.answer_signature)
+        while len(self._entries) > self.max_entries:
+            self._evict(next(iter(self._entries)), "size")
+        answer_cache_entries.set(len(self._entries))
+
+    def seed(self, phase_context: Optional[str], reply: str) -> str:
+        """Phase context that offers a cached reply as a reference (seed mode)"""
+        reference = (
+            "REFERENCE: a previous candidate gave a near-identical answer to this question and got the "
+            f"reply below. Stay consistent with it, but write your own reply.\n{reply}"
+        )
+        return f"{phase_context}\n\n{reference}" if phase_context else reference
+
+    def clear(self) -> None:
+        """Drop every cached reply (e.g. after editing a prompt)"""
+        self._entries.clear()
+        self._exact.clear()
+        self._index = LSHIndex(ANSWER_CACHE_NUM_PERM, ANSWER_CACHE_BANDS)
+        answer_cache_entries.set(0)
+
+    def _live_entry(self, entry_id: int) -> Optional[CachedReply]:
+        entry = self._entries.get(entry_id)
+        if entry is not None and time.monotonic() - entry.stored_at > self.ttl:
+            self._evict(entry_id, "ttl")
+            return None
+        return entry
+
+    def _evict(self, entry_id: int, reason: str) -> None:
+        entry = self._entries.pop(entry_id)
+        self._exact.pop(entry.exact_key, None)
+        self._index.remove(entry_id, entry.namespace, entry.answer_signature)
+        answer_cache_evictions_total.inc(reason=reason)
+        answer_cache_entries.set(len(self._entries))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+# Global answer cache instance
+answer_cache = AnswerCache()
+runtime_settings.bind(
+    answer_cache,
+    mode="ANSWER_CACHE_MODE",
+    question_threshold="ANSWER_CACHE_QUESTION_THRESHOLD",
+    answer_threshold="ANSWER_CACHE_ANSWER_THRESHOLD",
+    ttl="ANSWER_CACHE_TTL_SECONDS"
+)
+shared_state.register_cache("answer_cache", answer_cache.clear)
@@ -0,0 +1,154 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+from pymongo import ASCENDING
+from config.database import db
+from config.constants import (
+    SESSIONS_COLLECTION, ARCHIVE_COLLECTION, ARCHIVE_INTERVAL_SECONDS, ARCHIVE_BATCH_SIZE,
+    ARCHIVE_COMPLETED_AFTER_HOURS, ARCHIVE_STALE_AFTER_DAYS, GUEST_SESSION_TTL_DAYS, TRANSCRIPT_CODEC
+)
+from utils.metrics import metrics
+from utils.periodic import PeriodicTask
+from utils.transcript_codec import pack_transcript, document_messages
+
+sessions_archived_total = metrics.counter("sessions_archived_total", "Sessions moved to the archive, by reason")
+archive_reads_total = metrics.counter("archive_reads_total", "Session reads served from the archive")
+archive_bytes_saved_total = metrics.counter("archive_bytes_saved_total", "Message bytes saved by archive compression")
+
+# Fields only present on archived documents
+ARCHIVE_FIELDS = ("messages_blob", "archived_at", "archive_reason")
+
+# Large stored fields skipped when the caller doesn't need the messages
+MESSAGE_FIELDS_PROJECTION = {"messages": 0, "transcript.blob": 0, "messages_blob": 0}
+
+
+class ArchiveService:
+    """
+    Session lifecycle for the hot `sessions` collection.
+
+    Completed interviews (after ARCHIVE_COMPLETED_AFTER_HOURS idle) and abandoned
+    signed-in interviews (after ARCHIVE_STALE_AFTER_DAYS) move to
+    `sessions_archive` with their messages packed into a compressed transcript
+    (completed sessions usually already are, see SessionService). Abandoned
+    guest sessions are deleted by a partial TTL index instead.
+    """
+
+    def __init__(self, interval: float = ARCHIVE_INTERVAL_SECONDS, batch_size: int = ARCHIVE_BATCH_SIZE):
+        self.interval = interval
+        self.batch_size = batch_size
+        self._archiver = PeriodicTask("Session archiving", self._archive_backlog, lambda: self.interval, immediate=True)
+
+    @property
+    def sessions(self):
+        return db.get_collection(SESSIONS_COLLECTION)
+
+    @property
+    def archive(self):
+        return db.get_collection(ARCHIVE_COLLECTION)
+
+    async def ensure_indexes(self):
+        await self.sessions.create_index(
+            [("metadata.updated_at", ASCENDING)],
+            name="guest_ttl",
+            expireAfterSeconds=GUEST_SESSION_TTL_DAYS * 86400,
+            partialFilterExpression={"is_guest": True}
+        )
+        await self.sessions.create_index(
+            [("metadata.interview_completed", ASCENDING), ("metadata.updated_at", ASCENDING)],
+            name="lifecycle"
+        )
+        await self.archive.create_index("session_id", unique=True)
+        # Transcript exports read the archive in creation order, optionally by role
+        await self.archive.create_index([("role_id", ASCENDING), ("metadata.created_at", ASCENDING)], name="role_created_at")
+        await self.archive.create_index([("metadata.created_at", ASCENDING)], name="created_at")
+
+    @staticmethod
+    def _to_archive(session: Dict[str, Any], reason: str) -> Dict[str, Any]:
+        document = {key: value for key, value in session.items() if key != "messages"}
+        if "transcript" not in document:
+            document["transcript"] = pack_transcript(session.get("messages", []), TRANSCRIPT_CODEC)
+        document["archived_at"] = datetime.utcnow()
+        document["archive_reason"] = reason
+        return document
+
+    @staticmethod
+    def _from_archive(document: Dict[str, Any], include_messages: bool = True) -> Dict[str, Any]:
+        session = {key: value for key, value in document.items() if key not in ARCHIVE_FIELDS + ("transcript",)}
+        if include_messages:
+            session["messages"] = document_messages(document)
+        return session
+
+    async def find(self, session_id: str, include_messages: bool = True) -> Optional[Dict[str, Any]]:
+        """Archived session in the same shape as the hot document, plus archived=True"""
+        projection = None if include_messages else MESSAGE_FIELDS_PROJECTION
+        document = await self.archive.find_one({"session_id": session_id}, projection)
+        if document is None:
+            return None
+        archive_reads_total.inc()
+        session = self._from_archive(document, include_messages)
+        session["archived"] = True
+        return session
+
+    async def restore(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Move an archived session back to the hot collection (e.g. a candidate resumes)"""
+        document = await self.archive.find_one({"session_id": session_id})
+        if document is None:
+            return None
+        session = self._from_archive(document)
+        await self.sessions.replace_one({"session_id": session_id}, session, upsert=True)
+        await self.archive.delete_one({"session_id": session_id})
+        return session
+
+    async def update_archived(self, session_id: str, updates: Dict[str, Any]) -> bool:
+        """$set top-level fields on an archived session (e.g. a late evaluation)"""
+        result = await self.archive.update_one({"session_id": session_id}, {"$set": updates})
+        return result.matched_count > 0
+
+    async def archive_batch(self) -> int:
+        """Archive one batch of eligible sessions; returns how many moved"""
+        now = datetime.utcnow()
+        criteria = (
+            ("completed", {
+                "metadata.interview_completed": True,
+                "metadata.updated_at": {"$lt": now - timedelta(hours=ARCHIVE_COMPLETED_AFTER_HOURS)}
+            }),
+            ("stale", {
+                "metadata.interview_completed": {"$ne": True},
+                "is_guest": {"$ne": True},
+                "metadata.updated_at": {"$lt": now - timedelta(days=ARCHIVE_STALE_AFTER_DAYS)}
+            }),
+        )
+        moved = 0
+        for reason, query in criteria:
+            async for session in self.sessions.find(query).limit(self.batch_size):
+                document = self._to_archive(session, reason)
+                await self.archive.replace_one({"session_id": session["session_id"]}, document, upsert=True)
+                # Only delete the hot copy if nobody wrote to it since we read it
+                metadata = session.get("metadata", {})
+                result = await self.sessions.delete_one({
+                    "_id": session["_id"],
+                    "metadata.updated_at": metadata.get("updated_at"),
+                    "metadata.message_count": metadata.get("message_count")
+                })
+                if result.deleted_count:
+                    moved += 1
+                    sessions_archived_total.inc(reason=reason)
+                    if "messages" in session:
+                        header = document["transcript"]["header"]
+                        archive_bytes_saved_total.inc(max(header["raw_bytes"] - header["stored_bytes"], 0))
+                else:
+                    await self.archive.delete_one({"session_id": session["session_id"]})
+        return moved
+
+    async def _archive_backlog(self):
+        while await self.archive_batch() >= self.batch_size:
+            pass  # Keep going while there is a backlog
+
+    def start(self):
+        """Start the periodic archiver (called from the app lifespan)"""
+        self._archiver.start()
+
+    async def stop(self):
+        await self._archiver.stop()
+
+# Global archive service instance
+archive_service = ArchiveService()
@@ -0,0 +1,391 @@
+import asyncio
+import json
+import re
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from pymongo import ASCENDING, ReturnDocument
+from config.database import db
+from config.constants import (
+    EVALUATION_JOBS_COLLECTION, EVALUATION_SCORER, EVALUATION_WORKERS, EVALUATION_BATCH_SIZE,
+    EVALUATION_MAX_CONCURRENCY, EVALUATION_MAX_ATTEMPTS, EVALUATION_POLL_INTERVAL_SECONDS,
+    EVALUATION_LEASE_SECONDS, EVALUATION_RATE_RESERVE, EVALUATION_DEFER_SECONDS, EVALUATION_MAX_DEFERRALS
+)
+from data.replies import ERROR_REPLIES, CLOSING_REPLIES
+from data.role_prompts import EVALUATION_PROMPT
+from models.evaluation import Exchange, PhaseScore, SessionEvaluation
+from services.ai_service import ai_service, LLMUsage, RateLimitExceeded
+from services.interview_flow import interview_flows, flow_events, PhaseTransition, COMPLETED_PHASE
+from services.session_service import session_service
+from services.usage_service import usage_service
+from utils.metrics import metrics
+
+evaluation_jobs_total = metrics.counter("evaluation_jobs_total", "Evaluation jobs processed, by outcome (ok/error/deferred)")
+evaluation_seconds = metrics.histogram("evaluation_seconds", "Time to evaluate one session", buckets=(0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120))
+
+WORD_RE = re.compile(r"[a-z0-9']+")
+JSON_OBJECT_RE = re.compile(r"\{.*\}", re.DOTALL)
+
+
+class EvaluationDeferred(Exception):
+    """Scoring has to wait for LLM rate-limit room; not a failed attempt"""
+
+    def __init__(self, message: str, scores: Optional[Dict[str, Dict[str, Any]]] = None):
+        super().__init__(message)
+        self.scores = scores or {}  # Phases already scored, kept for the next try
+
+
+def split_transcript(session: Dict[str, Any]) -> List[Exchange]:
+    """
+    Pair each candidate answer with the question it answers.
+
+    Assistant turns store the question number they ask; older transcripts count
+    assistant messages instead (see InterviewFlow.start/advance). The phase comes
+    from the role's flow. Error and closing replies are not questions and are
+    skipped, as are the opening "ready" message and the resend after an error.
+    """
+    flow = interview_flows.for_role(session.get("role_id"))
+    exchanges = []
+    question, question_number = None, 0
+    for message in session.get("messages", []):
+        if message["role"] == "assistant":
+            if message["content"] in ERROR_REPLIES or message["content"] in CLOSING_REPLIES:
+                question = None
+                continue
+            question_number = message.get("question_number", question_number + 1)
+            question = message["content"]
+        elif message["role"] == "user" and question is not None:
+            exchanges.append(Exchange(
+                question_number=question_number,
+                phase=flow.phase_for(question_number),
+                question=question,
+                answer=message["content"]
+            ))
+            question = None
+    return exchanges
+
+
+def group_by_phase(exchanges: List[Exchange]) -> Dict[str, List[Exchange]]:
+    phases: Dict[str, List[Exchange]] = {}
+    for exchange in exchanges:
+        phases.setdefault(exchange.phase, []).append(exchange)
+    return phases
+
+
+class DeterministicScorer:
+    """Offline heuristic scorer: answer length and overlap with the question's vocabulary"""
+    name = "deterministic"
+
+    async def has_room(self) -> bool:
+        return True
+
+    async def score_phase(self, role_id: str, phase: str, exchanges: List[Exchange]) -> PhaseScore:
+        scores, words = [], 0
+        for exchange in exchanges:
+            answer_words = WORD_RE.findall(exchange.answer.lower())
+            question_words = {word for word in WORD_RE.findall(exchange.question.lower()) if len(word) > 3}
+            overlap = len(question_words.intersection(answer_words)) / len(question_words) if question_words else 0
+            words += len(answer_words)
+            scores.append(1 + 6 * min(len(answer_words) / 80, 1) + 3 * overlap)
+        return PhaseScore(
+            phase=phase,
+            score=round(sum(scores) / len(scores), 1),
+            summary=f"{len(exchanges)} answer(s), {words // len(exchanges)} words on average.",
+            answers=len(exchanges)
+        )
+
+
+class LLMScorer:
+    """Scores each phase with one AIService call, at most `max_concurrency` at a time"""
+    name = "llm"
+
+    def __init__(self, max_concurrency: int = EVALUATION_MAX_CONCURRENCY):
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def has_room(self) -> bool:
+        """
+        Whether one scoring call still leaves EVALUATION_RATE_RESERVE slots for live
+        turns, judged from the shared counter so a standalone worker sees API traffic
+        """
+        return await ai_service.shared_rate_limit_headroom() > EVALUATION_RATE_RESERVE
+
+    async def score_phase(self, role_id: str, phase: str, exchanges: List[Exchange]) -> PhaseScore:
+        transcript = "\n\n".join(
+            f"Q{exchange.question_number}: {exchange.question}\nA: {exchange.answer}" for exchange in exchanges
+        )
+        messages = [
+            {"role": "system", "content": EVALUATION_PROMPT},
+            {"role": "user", "content": f"ROLE: {role_id}\nPHASE: {phase}\n\n{transcript}"}
+        ]
+        usage = LLMUsage()
+        async with self._semaphore:
+            # Live candidates come first: back off instead of taking their last rate-limit slots
+            if not await self.has_room():
+                raise EvaluationDeferred("LLM rate limit reserved for live interviews")
+            try:
+                reply = await ai_service.generate_response(messages, usage=usage)
+            except RateLimitExceeded as e:
+                raise EvaluationDeferred(str(e))
+        usage_service.record(role_id, "evaluation", usage)
+
+        match = JSON_OBJECT_RE.search(reply)
+        if not match:
+            raise ValueError(f"Scorer reply for phase '{phase}' has no JSON object")
+        parsed = json.loads(match.group(0))
+        return PhaseScore(
+            phase=phase,
+            score=max(1.0, min(10.0, float(parsed["score"]))),
+            summary=str(parsed.get("summary", "")).strip(),
+            answers=len(exchanges)
+        )
+
+
+def get_scorer(name: str = EVALUATION_SCORER):
+    if name == DeterministicScorer.name:
+        return DeterministicScorer()
+    if name == LLMScorer.name:
+        return LLMScorer()
+    raise ValueError(f"Unknown evaluation scorer '{name}'")
+
+
+class EvaluationQueue:
+    """Mongo-backed job queue: one job per session, claimed with a lease"""
+
+    @property
+    def collection(self):
+        return db.get_collection(EVALUATION_JOBS_COLLECTION)
+
+    async def ensure_indexes(self):
+        await self.collection.create_index("session_id", unique=True)
+        await self.collection.create_index([("status", ASCENDING), ("available_at", ASCENDING)])
+
+    async def enqueue(self, session_id: str) -> None:
+        """Queue a session for evaluation (a no-op if it is already queued or done)"""
+        now = datetime.utcnow()
+        await self.collection.update_one(
+            {"session_id": session_id},
+            {"$setOnInsert": {
+                "session_id": session_id,
+                "status": "pending",
+                "attempts": 0,
+                "created_at": now,
+                "available_at": now
+            }},
+            upsert=True
+        )
+
+    async def claim(self, worker_id: str, limit: int) -> List[Dict[str, Any]]:
+        """Lease up to `limit` due jobs (pending, or running with an expired lease)"""
+        jobs = []
+        for _ in range(limit):
+            now = datetime.utcnow()
+            job = await self.collection.find_one_and_update(
+                {"$or": [
+                    {"status": "pending", "available_at": {"$lte": now}},
+                    {"status": "running", "lease_until": {"$lt": now}}
+                ]},
+                {
+                    "$set": {
+                        "status": "running",
+                        "worker": worker_id,
+                        "lease_until": now + timedelta(seconds=EVALUATION_LEASE_SECONDS)
+                    },
+                    "$inc": {"attempts": 1}
+                },
+                sort=[("available_at", ASCENDING)],
+                return_document=ReturnDocument.AFTER
+            )
+            if job is None:
+                break
+            jobs.append(job)
+        return jobs
+
+    async def complete(self, job: Dict[str, Any]) -> None:
+        await self.collection.update_one(
+            {"_id": job["_id"]},
+            {
+                "$set": {"status": "done", "finished_at": datetime.utcnow()},
+                "$unset": {"lease_until": "", "error": "", "phase_scores": ""}
+            }
+        )
+
+    async def fail(self, job: Dict[str, Any], error: str) -> None:
+        """Retry with exponential backoff until EVALUATION_MAX_ATTEMPTS, then give up"""
+        if job["attempts"] >= EVALUATION_MAX_ATTEMPTS:
+            update = {"status": "failed", "error": error, "finished_at": datetime.utcnow()}
+        else:
+            delay = 30 * (2 ** (job["attempts"] - 1))
+            update = {"status": "pending", "error": error, "available_at": datetime.utcnow() + timedelta(seconds=delay)}
+        await self.collection.update_one({"_id": job["_id"]}, {"$set": update, "$unset": {"lease_until": ""}})
+
+    async def defer(
+        self,
+        job: Dict[str, Any],
+        scores: Dict[str, Dict[str, Any]],
+        delay: float = EVALUATION_DEFER_SECONDS
+    ) -> bool:
+        """
+        Keep the phases scored so far and put the job back without spending an
+        attempt, at most EVALUATION_MAX_DEFERRALS times; after that it is a
+        failure like any other. Returns whether the job was deferred.
+        """
+        if scores:
+            await self.collection.update_one(
+                {"_id": job["_id"]}, {"$set": {f"phase_scores.{phase}": score for phase, score in scores.items()}}
+            )
+        if job.get("deferrals", 0) >= EVALUATION_MAX_DEFERRALS:
+            await self.fail(job, "LLM rate limit had no room for evaluation")
+            return False
+        await self.collection.update_one(
+            {"_id": job["_id"]},
+            {
+                "$set": {"status": "pending", "available_at": datetime.utcnow() + timedelta(seconds=delay)},
+                "$inc": {"attempts": -1, "deferrals": 1},
+                "$unset": {"lease_until": ""}
+            }
+        )
+        return True
+
+    async def get_job(self, session_id: str) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one({"session_id": session_id}, {"_id": 0})
+
+
+class EvaluationService:
+    """Scores a completed transcript phase by phase and stores the result on the session"""
+
+    def __init__(self, scorer=None):
+        self._scorer = scorer
+
+    @property
+    def scorer(self):
+        if self._scorer is None:
+            self._scorer = get_scorer()
+        return self._scorer
+
+    async def evaluate_session(
+        self,
+        session_id: str,
+        scored: Optional[Dict[str, Dict[str, Any]]] = None
+    ) -> Optional[SessionEvaluation]:
+        """
+        Score every phase not in `scored` (phase scores kept from a deferred try).
+        Raises EvaluationDeferred, carrying the phases that did get scored, when
+        the rate limit has no room for some of them.
+        """
+        session = await session_service.get_session(session_id)
+        if not session:
+            return None
+
+        phases = group_by_phase(split_transcript(session))
+        scored = scored or {}
+        pending = [phase for phase in phases if phase not in scored]
+        results = await asyncio.gather(*(
+            self.scorer.score_phase(session.get("role_id"), phase, phases[phase])
+            for phase in pending
+        ), return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception) and not isinstance(result, EvaluationDeferred):
+                raise result
+        fresh = {phase: result.dict() for phase, result in zip(pending, results) if isinstance(result, PhaseScore)}
+        if len(fresh) < len(pending):
+            raise EvaluationDeferred("LLM rate limit reserved for live interviews", fresh)
+        scored = {**scored, **fresh}
+        scores = [PhaseScore(**scored[phase]) for phase in phases]
+        answered = sum(score.answers for score in scores)
+        evaluation = SessionEvaluation(
+            scorer=self.scorer.name,
+            overall_score=round(sum(score.score * score.answers for score in scores) / answered, 1) if answered else None,
+            phases=list(scores)
+        )
+        await session_service.set_evaluation(session_id, evaluation.dict())
+        return evaluation
+
+
+class EvaluationWorkerPool:
+    """N workers that each claim a batch of jobs and evaluate them concurrently"""
+
+    def __init__(
+        self,
+        service: EvaluationService,
+        queue: EvaluationQueue,
+        workers: int = EVALUATION_WORKERS,
+        batch_size: int = EVALUATION_BATCH_SIZE,
+        poll_interval: float = EVALUATION_POLL_INTERVAL_SECONDS
+    ):
+        self.service = service
+        self.queue = queue
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._wakeup = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+
+    def notify(self) -> None:
+        """Wake idle workers (new job enqueued in this process)"""
+        self._wakeup.set()
+
+    async def _process(self, job: Dict[str, Any]) -> None:
+        started = asyncio.get_running_loop().time()
+        try:
+            await self.service.evaluate_session(job["session_id"], job.get("phase_scores"))
+        except EvaluationDeferred as e:
+            if await self.queue.defer(job, e.scores):
+                print(f"Evaluation of session {job['session_id']} deferred ({len(e.scores)} phase(s) scored): {e}")
+                evaluation_jobs_total.inc(outcome="deferred")
+            else:
+                print(f"Evaluation of session {job['session_id']} failed (attempt {job['attempts']}): deferred too often")
+                evaluation_jobs_total.inc(outcome="error")
+            return
+        except Exception as e:
+            print(f"Evaluation of session {job['session_id']} failed (attempt {job['attempts']}): {e}")
+            await self.queue.fail(job, str(e))
+            evaluation_jobs_total.inc(outcome="error")
+            return
+        await self.queue.complete(job)
+        evaluation_jobs_total.inc(outcome="ok")
+        evaluation_seconds.observe(asyncio.get_running_loop().time() - started)
+
+    async def run_once(self, worker_id: str = "once") -> int:
+        """Claim and process one batch; returns the number of jobs handled"""
+        jobs = await self.queue.claim(worker_id, self.batch_size)
+        if jobs:
+            await asyncio.gather(*(self._process(job) for job in jobs))
+        return len(jobs)
+
+    async def _worker(self, worker_id: str) -> None:
+        while True:
+            try:
+                if await self.run_once(worker_id):
+                    continue
+            except Exception as e:
+                print(f"Evaluation worker {worker_id} error: {e}")
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        prefix = uuid.uuid4().hex[:8]
+        self._tasks = [asyncio.create_task(self._worker(f"{prefix}-{i}")) for i in range(self.workers)]
+
+    async def stop(self) -> None:
+        """Cancel the workers; leased jobs are retried once their lease expires"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+# Global evaluation instances
+evaluation_queue = EvaluationQueue()
+evaluation_service = EvaluationService()
+evaluation_pool = EvaluationWorkerPool(evaluation_service, evaluation_queue)
+
+
+@flow_events.subscribe
+async def enqueue_completed_interview(transition: PhaseTransition) -> None:
+    if transition.to_phase == COMPLETED_PHASE:
+        await evaluation_queue.enqueue(transition.session_id)
+        evaluation_pool.notify()
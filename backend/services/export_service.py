@@ -0,0 +1,224 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+from config.database import db
+from config.constants import SESSIONS_COLLECTION, ARCHIVE_COLLECTION, EXPORT_BATCH_SIZE, EXPORT_PARQUET_ROW_GROUP
+from services.session_service import MAX_SLICE
+from utils.transcript_codec import document_messages
+from utils import fast_json
+from utils.metrics import metrics
+
+export_sessions_total = metrics.counter("export_sessions_total", "Sessions written by transcript exports, by format")
+
+EXPORT_FORMATS = ("ndjson", "parquet")
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "parquet": "application/vnd.apache.parquet"}
+
+# Columns of the parquet export: one row per message, session fields repeated
+PARQUET_COLUMNS = (
+    "session_id", "role_id", "user_email", "created_at", "interview_completed",
+    "question_count", "message_index", "message_role", "message_content", "message_timestamp"
+)
+
+
+@dataclass
+class ExportFilter:
+    role_id: Optional[str] = None
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
+    completed: Optional[bool] = None
+
+    def to_query(self) -> Dict[str, Any]:
+        query: Dict[str, Any] = {}
+        if self.role_id:
+            query["role_id"] = self.role_id
+        if self.since or self.until:
+            query["metadata.created_at"] = {
+                **({"$gte": self.since} if self.since else {}),
+                **({"$lt": self.until} if self.until else {}),
+            }
+        if self.completed is not None:
+            query["metadata.interview_completed"] = self.completed
+        return query
+
+
+def _iso(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+class ExportService:
+    """
+    Streams sessions out of Mongo with a batched cursor and a projection, so
+    memory stays flat no matter how many sessions match.
+    """
+
+    def __init__(self, batch_size: int = EXPORT_BATCH_SIZE):
+        self.batch_size = batch_size
+
+    def _projection(self, include_messages: bool, message_fields: Optional[Sequence[str]], archived: bool = False) -> Dict[str, Any]:
+        projection: Dict[str, Any] = {
+            "_id": 0, "session_id": 1, "role_id": 1, "user_email": 1,
+            "metadata.created_at": 1, "metadata.updated_at": 1, "metadata.interview_completed": 1,
+            "metadata.manually_ended": 1, "metadata.question_count": 1, "metadata.current_phase": 1,
+            "metadata.llm_usage": 1, "evaluation.overall_score": 1,
+        }
+        if include_messages:
+            projection["transcript"] = 1  # Completed sessions store a compressed transcript
+            if archived:
+                projection["messages_blob"] = 1
+            elif message_fields:
+                # Sub-field projection can't be combined with $slice; the system prompt is dropped below
+                projection.update({f"messages.{field}": 1 for field in {"role", *message_fields}})
+            else:
+                projection["messages"] = {"$slice": [1, MAX_SLICE]}  # Skip the system prompt
+        return projection
+
+    async def iter_sessions(
+        self,
+        export_filter: ExportFilter,
+        include_messages: bool = True,
+        message_fields: Optional[Sequence[str]] = None,
+        limit: Optional[int] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yield export records (plain JSON-ready dicts): archived sessions, then live ones, each oldest first"""
+        remaining = limit
+        for collection_name, archived in ((ARCHIVE_COLLECTION, True), (SESSIONS_COLLECTION, False)):
+            cursor = db.get_collection(collection_name).find(
+                export_filter.to_query(),
+                self._projection(include_messages, message_fields, archived),
+                batch_size=self.batch_size
+            ).sort("metadata.created_at", 1)
+            if remaining:
+                cursor = cursor.limit(remaining)
+
+            async for session in cursor:
+                if include_messages:
+                    session["messages"] = document_messages(session)
+                yield self._record(session, include_messages, message_fields)
+                if remaining:
+                    remaining -= 1
+                    if not remaining:
+                        return
+
+    @staticmethod
+    def _record(session: Dict[str, Any], include_messages: bool, message_fields: Optional[Sequence[str]]) -> Dict[str, Any]:
+        metadata = session.get("metadata", {})
+        record = {
+            "session_id": session["session_id"],
+            "role_id": session.get("role_id"),
+            "user_email": session.get("user_email"),
+            "created_at": _iso(metadata.get("created_at")),
+            "updated_at": _iso(metadata.get("updated_at")),
+            "interview_completed": metadata.get("interview_completed", False),
+            "manually_ended": metadata.get("manually_ended", False),
+            "question_count": metadata.get("question_count", 0),
+            "current_phase": metadata.get("current_phase"),
+            "llm_usage": metadata.get("llm_usage"),
+            "overall_score": session.get("evaluation", {}).get("overall_score"),
+        }
+        if include_messages:
+            record["messages"] = [
+                {
+                    field: _iso(message.get(field))
+                    for field in (message_fields or message.keys())
+                }
+                for message in session.get("messages", [])
+                if message.get("role") != "system"
+            ]
+        return record
+
+    async def stream_ndjson(self, export_filter: ExportFilter, **options) -> AsyncIterator[bytes]:
+        """One JSON object per session per line, written as the cursor advances"""
+        async for record in self.iter_sessions(export_filter, **options):
+            export_sessions_total.inc(format="ndjson")
+            yield fast_json.dumps(record) + b"\n"
+
+    async def stream_parquet(self, export_filter: ExportFilter, limit: Optional[int] = None) -> AsyncIterator[bytes]:
+        """
+        Parquet with one row per message, flushed one row group at a time (needs
+        the optional pyarrow package).
+        """
+        pa, pq = _import_pyarrow()
+        schema = pa.schema([
+            ("session_id", pa.string()), ("role_id", pa.string()), ("user_email", pa.string()),
+            ("created_at", pa.string()), ("interview_completed", pa.bool_()), ("question_count", pa.int32()),
+            ("message_index", pa.int32()), ("message_role", pa.string()), ("message_content", pa.string()),
+            ("message_timestamp", pa.string()),
+        ])
+        sink = _ChunkSink()
+        writer = pq.ParquetWriter(sink, schema, compression="zstd")
+        columns: Dict[str, List[Any]] = {name: [] for name in PARQUET_COLUMNS}
+
+        def write_row_group():
+            writer.write_table(pa.table(columns, schema=schema))
+            for values in columns.values():
+                values.clear()
+
+        async for record in self.iter_sessions(export_filter, limit=limit):
+            export_sessions_total.inc(format="parquet")
+            for index, message in enumerate(record["messages"]):
+                for name, value in (
+                    ("session_id", record["session_id"]), ("role_id", record["role_id"]),
+                    ("user_email", record["user_email"]), ("created_at", record["created_at"]),
+                    ("interview_completed", record["interview_completed"]),
+                    ("question_count", record["question_count"]), ("message_index", index),
+                    ("message_role", message.get("role")), ("message_content", message.get("content")),
+                    ("message_timestamp", message.get("timestamp")),
+                ):
+                    columns[name].append(value)
+            if len(columns["session_id"]) >= EXPORT_PARQUET_ROW_GROUP:
+                write_row_group()
+                yield sink.drain()
+
+        if columns["session_id"]:
+            write_row_group()
+        writer.close()
+        yield sink.drain()
+
+
+def require_format(export_format: str) -> None:
+    """Fail before streaming starts if a format can't be produced"""
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{export_format}'. Use one of: {', '.join(EXPORT_FORMATS)}")
+    if export_format == "parquet":
+        _import_pyarrow()
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("Parquet export requires the optional 'pyarrow' package (pip install pyarrow)")
+    return pyarrow, pyarrow.parquet
+
+
+class _ChunkSink:
+    """Write-only file object that hands its bytes out in chunks (ParquetWriter output)"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+# Global export service instance
+export_service = ExportService()
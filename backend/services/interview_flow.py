@@ -0,0 +1,174 @@
+import json
+import os
+import time
+from bisect import bisect_left
+from dataclasses import dataclass
+from itertools import accumulate
+from typing import Awaitable, Callable, Dict, List, Optional
+from config.constants import INTERVIEW_FLOW, INTERVIEW_FLOWS_FILE
+from services.shared_state import shared_state
+from utils.metrics import metrics
+
+COMPLETED_PHASE = "completed"
+
+phase_transitions_total = metrics.counter("interview_phase_transitions_total", "Interview phase transitions")
+
+
+@dataclass(frozen=True)
+class PhaseTransition:
+    """Emitted when a session moves into a new phase (from_phase is None on start)"""
+    session_id: str
+    role_id: str
+    from_phase: Optional[str]
+    to_phase: str
+    question_count: int
+
+
+@dataclass(frozen=True)
+class FlowStep:
+    """Where a session lands after answering one more question"""
+    question_count: int
+    phase: str
+    completed: bool
+    transition: Optional[PhaseTransition]
+
+
+class InterviewFlow:
+    """Phase boundaries compiled once from an ordered {phase: {"count": n}} mapping"""
+
+    def __init__(self, flow: Dict[str, dict]):
+        if not flow:
+            raise ValueError("Interview flow must define at least one phase")
+        counts = []
+        for phase, spec in flow.items():
+            count = spec.get("count") if isinstance(spec, dict) else None
+            if not isinstance(count, int) or count < 1:
+                raise ValueError(f"Phase '{phase}' needs a positive integer 'count'")
+            counts.append(count)
+
+        self.phases = tuple(spec.get("phase", name) for name, spec in flow.items())
+        # Cumulative upper bounds, e.g. [1, 8, 12, 14, 17, 19]
+        self._bounds = list(accumulate(counts))
+        self.total_questions = self._bounds[-1]
+
+    @property
+    def first_phase(self) -> str:
+        return self.phases[0]
+
+    def phase_for(self, question_count: int) -> str:
+        """Phase a given question number belongs to"""
+        index = bisect_left(self._bounds, max(question_count, 1))
+        return self.phases[index] if index < len(self.phases) else COMPLETED_PHASE
+
+    def progress(self, question_count: int) -> float:
+        """Interview progress as a percentage"""
+        return min((question_count / self.total_questions) * 100, 100)
+
+    def start(self, session_id: str, role_id: str) -> FlowStep:
+        """First question of the interview"""
+        phase = self.phase_for(1)
+        return FlowStep(1, phase, False, PhaseTransition(session_id, role_id, None, phase, 1))
+
+    def advance(self, session_id: str, role_id: str, question_count: int) -> FlowStep:
+        """Step from question_count to the next question"""
+        next_count = question_count + 1
+        completed = next_count >= self.total_questions
+        phase = self.phase_for(next_count)
+        previous = self.phase_for(question_count)
+        to_phase = COMPLETED_PHASE if completed else phase
+
+        transition = None
+        if to_phase != previous:
+            transition = PhaseTransition(session_id, role_id, previous, to_phase, next_count)
+        return FlowStep(next_count, phase, completed, transition)
+
+
+class FlowRegistry:
+    """Compiled flows per role: INTERVIEW_FLOW by default, overridden from a data file"""
+
+    RELOAD_CHECK_INTERVAL = 30.0  # Seconds between data file mtime checks
+
+    def __init__(self, path: str = INTERVIEW_FLOWS_FILE):
+        self.path = path
+        self.default = InterviewFlow(INTERVIEW_FLOW)
+        self._flows: Dict[str, InterviewFlow] = {}
+        self._mtime: Optional[float] = None
+        self._next_check = 0.0
+        self.reload()
+
+    def reload(self) -> None:
+        """Re-read and compile role flows; a bad file keeps the previous flows"""
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            self._flows, self._mtime = {}, None
+            return
+
+        try:
+            with open(self.path) as f:
+                raw = json.load(f)
+            flows = {role_id: InterviewFlow(flow) for role_id, flow in raw.get("roles", {}).items()}
+        except (ValueError, AttributeError) as e:
+            if self._mtime is None and not self._flows:
+                raise ValueError(f"Invalid interview flows in {self.path}: {e}")
+            print(f"Ignoring invalid interview flows in {self.path}: {e}")
+            self._mtime = mtime
+            return
+
+        self._flows, self._mtime = flows, mtime
+
+    def _maybe_reload(self) -> None:
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        self._next_check = now + self.RELOAD_CHECK_INTERVAL
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            mtime = None
+        if mtime != self._mtime:
+            self.reload()
+
+    def for_role(self, role_id: Optional[str]) -> InterviewFlow:
+        """Compiled flow for a role (the default flow if it has no override)"""
+        self._maybe_reload()
+        return self._flows.get(role_id, self.default)
+
+
+TransitionHandler = Callable[[PhaseTransition], Awaitable[None]]
+
+
+class FlowEvents:
+    """Fan-out of phase transitions to interested subsystems"""
+
+    def __init__(self):
+        self._handlers: List[TransitionHandler] = []
+
+    def subscribe(self, handler: TransitionHandler) -> TransitionHandler:
+        self._handlers.append(handler)
+        return handler
+
+    async def publish(self, transition: Optional[PhaseTransition]) -> None:
+        if transition is None:
+            return
+        for handler in self._handlers:
+            try:
+                await handler(transition)
+            except Exception as e:
+                # Observers must never break the interview itself
+                print(f"Phase transition handler {getattr(handler, '__name__', handler)} failed: {e}")
+
+
+# Global flow registry and event bus
+interview_flows = FlowRegistry()
+flow_events = FlowEvents()
+shared_state.register_cache("flows", interview_flows.reload)
+
+
+@flow_events.subscribe
+async def count_transition(transition: PhaseTransition) -> None:
+    phase_transitions_total.inc(
+        role=transition.role_id,
+        from_phase=transition.from_phase or "none",
+        to_phase=transition.to_phase,
+    )
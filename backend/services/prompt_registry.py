@@ -0,0 +1,174 @@
+import hashlib
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+from config.constants import PROMPTS_DIR
+from data.role_prompts import ROLE_PROMPTS, PHASE_GUIDANCE, DEFAULT_ROLE_ID
+from services.interview_flow import interview_flows
+from services.shared_state import shared_state
+
+BUILTIN_VERSION = "builtin"
+
+
+@dataclass(frozen=True)
+class PromptVariant:
+    """
+    A rendered prompt split into a byte-stable prefix (the role prompt, identical
+    for every turn of every session of the role) and phase instructions.
+    """
+    role_id: str
+    phase: Optional[str]
+    version: str
+    prefix: str
+    instructions: str
+    prefix_hash: str
+    content_hash: str
+
+    @property
+    def text(self) -> str:
+        return f"{self.prefix}\n\n{self.instructions}" if self.instructions else self.prefix
+
+    @property
+    def key(self) -> str:
+        return f"{self.role_id}:{self.phase or 'base'}:{self.content_hash}"
+
+
+def _hash(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()[:16]
+
+
+def _make_variant(role_id: str, phase: Optional[str], version: str, prefix: str, instructions: str = "") -> PromptVariant:
+    prefix = sys.intern(prefix)
+    instructions = sys.intern(instructions)
+    content_hash = _hash(f"{prefix}\n\n{instructions}" if instructions else prefix)
+    return PromptVariant(role_id, phase, version, prefix, instructions, _hash(prefix), content_hash)
+
+
+class RolePrompts:
+    """The base prompt of one role plus its pre-rendered phase variants"""
+
+    def __init__(self, role_id: str, content: str, version: str = BUILTIN_VERSION,
+                 phase_guidance: Optional[Dict[str, str]] = None, mtime: Optional[float] = None):
+        if not isinstance(content, str) or not content.strip():
+            raise ValueError(f"Prompt for role '{role_id}' needs non-empty 'content'")
+        guidance = phase_guidance or {}
+        if not all(isinstance(k, str) and isinstance(v, str) for k, v in guidance.items()):
+            raise ValueError(f"Prompt for role '{role_id}' has non-string phase guidance")
+
+        self.role_id = role_id
+        self.version = str(version)
+        self.mtime = mtime
+        self.phase_guidance = {**PHASE_GUIDANCE, **guidance}
+        self.base = _make_variant(role_id, None, self.version, content)
+        self._variants: Dict[str, PromptVariant] = {}
+
+        for phase in interview_flows.for_role(role_id).phases + ("completed",):
+            self.variant(phase)
+
+    def variant(self, phase: Optional[str]) -> PromptVariant:
+        """System prompt for a phase (rendered once, then reused)"""
+        if not phase:
+            return self.base
+        variant = self._variants.get(phase)
+        if variant is None:
+            instructions = f"CURRENT PHASE: {phase.upper()}"
+            guidance = self.phase_guidance.get(phase)
+            if guidance:
+                instructions += f"\n{guidance}"
+            variant = self._variants[phase] = _make_variant(
+                self.role_id, phase, self.version, self.base.prefix, instructions
+            )
+        return variant
+
+
+class PromptRegistry:
+    """
+    Role prompts from data/role_prompts.py plus data/prompts/<role_id>.json files.
+
+    Built-in roles are rendered at startup. File-based roles (which also override
+    built-ins) load on first use and reload when the file changes.
+    """
+
+    RELOAD_CHECK_INTERVAL = 30.0  # Seconds between data file mtime checks
+
+    def __init__(self, prompts_dir: str = PROMPTS_DIR):
+        self.prompts_dir = prompts_dir
+        self._builtin = {
+            role_id: RolePrompts(role_id, prompt["content"])
+            for role_id, prompt in ROLE_PROMPTS.items()
+        }
+        self._file_mtimes: Dict[str, float] = {}
+        self._loaded: Dict[str, RolePrompts] = {}
+        self._next_scan = 0.0
+
+    def _scan(self) -> None:
+        """Refresh the role_id -> mtime index of prompt files (throttled)"""
+        now = time.monotonic()
+        if now < self._next_scan:
+            return
+        self._next_scan = now + self.RELOAD_CHECK_INTERVAL
+
+        mtimes = {}
+        try:
+            with os.scandir(self.prompts_dir) as entries:
+                for entry in entries:
+                    if entry.name.endswith(".json") and entry.is_file():
+                        mtimes[entry.name[:-len(".json")]] = entry.stat().st_mtime
+        except OSError:
+            pass
+        self._file_mtimes = mtimes
+        for role_id in list(self._loaded):
+            if role_id not in mtimes:
+                del self._loaded[role_id]
+
+    def _from_file(self, role_id: str) -> Optional[RolePrompts]:
+        self._scan()
+        mtime = self._file_mtimes.get(role_id)
+        if mtime is None:
+            return None
+        cached = self._loaded.get(role_id)
+        if cached is not None and cached.mtime == mtime:
+            return cached
+
+        path = os.path.join(self.prompts_dir, f"{role_id}.json")
+        try:
+            with open(path) as f:
+                raw = json.load(f)
+            prompts = RolePrompts(
+                role_id,
+                raw.get("content"),
+                version=raw.get("version", 1),
+                phase_guidance=raw.get("phases"),
+                mtime=mtime,
+            )
+        except (ValueError, AttributeError, OSError) as e:
+            print(f"Ignoring invalid prompt file {path}: {e}")
+            return cached
+
+        self._loaded[role_id] = prompts
+        return prompts
+
+    def reload(self) -> None:
+        """Force a rescan of the prompt files on next access"""
+        self._next_scan = 0.0
+
+    def has_role(self, role_id: str) -> bool:
+        return role_id in self._builtin or self._from_file(role_id) is not None
+
+    def get(self, role_id: str) -> RolePrompts:
+        """Prompts for a role, falling back to the default role"""
+        prompts = self._from_file(role_id) or self._builtin.get(role_id)
+        if prompts is None:
+            prompts = self._from_file(DEFAULT_ROLE_ID) or self._builtin[DEFAULT_ROLE_ID]
+        return prompts
+
+    def variant(self, role_id: str, phase: Optional[str] = None) -> PromptVariant:
+        """Rendered system prompt for a role and phase"""
+        return self.get(role_id).variant(phase)
+
+# Global prompt registry instance
+prompt_registry = PromptRegistry()
+shared_state.register_cache("prompts", prompt_registry.reload)
@@ -0,0 +1,79 @@
+import base64
+import re
+from array import array
+from typing import Any, Dict, Optional
+from config.constants import QUESTION_DEDUP_ENABLED, QUESTION_DEDUP_THRESHOLD, QUESTION_DEDUP_NUM_PERM
+from services.runtime_settings import runtime_settings
+from utils.minhash import MinHasher, shingles
+from utils.metrics import metrics
+
+question_repeats_total = metrics.counter("question_repeats_total", "Generated questions that repeat an earlier one, by action (regenerated/kept)")
+
+_SENTENCE = re.compile(r"[^.!?]*\?")
+
+
+def question_text(message: str) -> str:
+    """The question of an interviewer turn: its last '?' sentence, without the feedback before it"""
+    questions = _SENTENCE.findall(message)
+    return questions[-1] if questions else message
+
+
+class QuestionIndex:
+    """
+    Questions a session has already been asked, as compact MinHash fingerprints
+    in metadata.question_index (one base64 string per question, 2 bytes per
+    permutation). SessionService appends a fingerprint whenever it saves an
+    assistant message, so checking a new question never rescans the transcript.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = QUESTION_DEDUP_ENABLED,
+        threshold: float = QUESTION_DEDUP_THRESHOLD,
+        num_perm: int = QUESTION_DEDUP_NUM_PERM
+    ):
+        self.enabled = enabled
+        self.threshold = threshold
+        self._hasher = MinHasher(num_perm)
+
+    def fingerprint(self, message: str) -> Optional[str]:
+        """Fingerprint of the question in an assistant message, or None if it asks nothing"""
+        if "?" not in message:
+            return None
+        signature = self._hasher.signature(shingles(question_text(message)))
+        return base64.b64encode(array("H", (value & 0xFFFF for value in signature)).tobytes()).decode()
+
+    @staticmethod
+    def _unpack(fingerprint: str) -> array:
+        return array("H", base64.b64decode(fingerprint))
+
+    def is_repeat(self, session: Dict[str, Any], fingerprint: Optional[str], action: str) -> bool:
+        """
+        Whether a reply's fingerprint matches a question the session was already
+        asked (counted under `action`). Callers pass the same fingerprint on to
+        SessionService when saving the reply, so it is computed once per turn.
+        """
+        if not self.enabled or fingerprint is None:
+            return False
+        signature = self._unpack(fingerprint)
+        for seen in session.get("metadata", {}).get("question_index", []):
+            seen = self._unpack(seen)
+            if len(seen) == len(signature):
+                matches = sum(1 for x, y in zip(signature, seen) if x == y)
+                if matches / len(signature) >= self.threshold:
+                    question_repeats_total.inc(action=action)
+                    return True
+        return False
+
+    @staticmethod
+    def avoid(phase_context: Optional[str], reply: str) -> str:
+        """Phase context for the one regeneration after a repeated question"""
+        instruction = (
+            f'IMPORTANT: You already asked "{question_text(reply).strip()}" earlier in this interview. '
+            "Ask a different question that covers new ground."
+        )
+        return f"{phase_context}\n\n{instruction}" if phase_context else instruction
+
+# Global question index instance
+question_index = QuestionIndex()
+runtime_settings.bind(question_index, enabled="QUESTION_DEDUP_ENABLED", threshold="QUESTION_DEDUP_THRESHOLD")
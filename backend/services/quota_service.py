@@ -0,0 +1,225 @@
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Set
+from config.database import db
+from config.constants import (
+    SESSIONS_COLLECTION, USAGE_ROLLUPS_COLLECTION,
+    DAILY_TOKEN_QUOTA_PER_USER, DAILY_TOKEN_QUOTA_PER_TENANT, MAX_CONCURRENT_INTERVIEWS_PER_USER,
+    QUOTA_RECONCILE_INTERVAL_SECONDS, ACTIVE_INTERVIEW_WINDOW_HOURS
+)
+from services.ai_service import LLMUsage
+from services.interview_flow import flow_events, PhaseTransition, COMPLETED_PHASE
+from services.usage_service import usage_service
+from services.runtime_settings import runtime_settings
+from utils.metrics import metrics
+from utils.periodic import PeriodicTask
+
+quota_rejections_total = metrics.counter("quota_rejections_total", "Requests refused by budget quotas, by type")
+
+
+class QuotaExceeded(Exception):
+    """Custom exception for a user or tenant over budget"""
+
+    def __init__(self, message: str, quota_type: str, retry_after: int):
+        super().__init__(message)
+        self.quota_type = quota_type
+        self.retry_after = retry_after
+
+    @property
+    def detail(self) -> dict:
+        return {"message": str(self), "retry_after": self.retry_after, "type": self.quota_type}
+
+
+def tenant_of(user_email: str) -> str:
+    """Tenant of a user: the domain of their email"""
+    return user_email.rpartition("@")[2].lower()
+
+
+def _seconds_until_midnight() -> int:
+    now = datetime.utcnow()
+    midnight = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return int((midnight - now).total_seconds()) + 1
+
+
+class QuotaService:
+    """
+    Daily token budgets per user and tenant, and concurrent interviews per user.
+
+    Checks only read in-memory counters, which are bumped as usage is recorded
+    and periodically reset from Mongo (flushed usage rollups plus this worker's
+    unflushed buffer, and open sessions) so they converge across workers.
+    Guest sessions are only subject to the AIService rate limit.
+    """
+
+    def __init__(
+        self,
+        user_tokens_per_day: int = DAILY_TOKEN_QUOTA_PER_USER,
+        tenant_tokens_per_day: int = DAILY_TOKEN_QUOTA_PER_TENANT,
+        max_concurrent_interviews: int = MAX_CONCURRENT_INTERVIEWS_PER_USER,
+        reconcile_interval: float = QUOTA_RECONCILE_INTERVAL_SECONDS
+    ):
+        self.user_tokens_per_day = user_tokens_per_day
+        self.tenant_tokens_per_day = tenant_tokens_per_day
+        self.max_concurrent_interviews = max_concurrent_interviews
+        self.reconcile_interval = reconcile_interval
+
+        self._day = datetime.utcnow().strftime("%Y-%m-%d")
+        self._user_tokens: Dict[str, int] = {}
+        self._tenant_tokens: Dict[str, int] = {}
+        self._active: Dict[str, Set[str]] = {}  # user_email -> open session ids
+        self._owners: Dict[str, str] = {}  # session_id -> user_email
+        # Changes made while a reconcile query is in flight, replayed on top of its result
+        self._recent_starts: Dict[str, str] = {}
+        self._recent_finishes: Set[str] = set()
+        self._recent_tokens: Dict[str, int] = {}
+        self._reconciler = PeriodicTask("Quota reconcile", self.reconcile, lambda: self.reconcile_interval, immediate=True)
+
+    def _roll_day(self) -> None:
+        today = datetime.utcnow().strftime("%Y-%m-%d")
+        if today != self._day:
+            self._day = today
+            self._user_tokens = {}
+            self._tenant_tokens = {}
+
+    def check_tokens(self, user_email: Optional[str]) -> None:
+        """Raise QuotaExceeded if the user or their tenant spent today's token budget"""
+        if not user_email:
+            return
+        self._roll_day()
+        if self.user_tokens_per_day and self._user_tokens.get(user_email, 0) >= self.user_tokens_per_day:
+            quota_rejections_total.inc(type="user_tokens")
+            raise QuotaExceeded(
+                "Daily token quota reached. Please continue tomorrow.",
+                "token_quota_exceeded", _seconds_until_midnight()
+            )
+        tenant = tenant_of(user_email)
+        if self.tenant_tokens_per_day and self._tenant_tokens.get(tenant, 0) >= self.tenant_tokens_per_day:
+            quota_rejections_total.inc(type="tenant_tokens")
+            raise QuotaExceeded(
+                "Your organization's daily token quota has been reached. Please continue tomorrow.",
+                "tenant_quota_exceeded", _seconds_until_midnight()
+            )
+
+    def check_can_start(self, user_email: Optional[str], session_id: str) -> None:
+        """Raise QuotaExceeded if starting this interview exceeds the concurrency limit"""
+        self.check_tokens(user_email)
+        if not user_email or not self.max_concurrent_interviews:
+            return
+        active = self._active.get(user_email, set())
+        if session_id not in active and len(active) >= self.max_concurrent_interviews:
+            quota_rejections_total.inc(type="concurrent_interviews")
+            raise QuotaExceeded(
+                f"You already have {len(active)} interview(s) in progress. Finish or end one before starting another.",
+                "concurrent_interview_limit", 60
+            )
+
+    def interview_started(self, user_email: Optional[str], session_id: str) -> bool:
+        """Take a concurrent-interview slot; True if this call took it (it wasn't held already)"""
+        if not user_email:
+            return False
+        added = session_id not in self._active.get(user_email, set())
+        self._recent_starts[session_id] = user_email
+        self._recent_finishes.discard(session_id)  # Retried after a failed start
+        self._add_active(user_email, session_id)
+        return added
+
+    def interview_finished(self, session_id: str) -> None:
+        self._recent_starts.pop(session_id, None)
+        self._recent_finishes.add(session_id)
+        self._remove_active(session_id)
+
+    def _add_active(self, user_email: str, session_id: str) -> None:
+        self._active.setdefault(user_email, set()).add(session_id)
+        self._owners[session_id] = user_email
+
+    def _remove_active(self, session_id: str) -> None:
+        user_email = self._owners.pop(session_id, None)
+        if user_email and user_email in self._active:
+            self._active[user_email].discard(session_id)
+            if not self._active[user_email]:
+                del self._active[user_email]
+
+    def record(self, user_email: Optional[str], usage: LLMUsage) -> None:
+        """Charge one upstream call's tokens to the user and tenant"""
+        if not user_email:
+            return
+        self._roll_day()
+        tokens = usage.prompt_tokens + usage.completion_tokens
+        self._user_tokens[user_email] = self._user_tokens.get(user_email, 0) + tokens
+        self._recent_tokens[user_email] = self._recent_tokens.get(user_email, 0) + tokens
+        tenant = tenant_of(user_email)
+        self._tenant_tokens[tenant] = self._tenant_tokens.get(tenant, 0) + tokens
+
+    async def reconcile(self) -> None:
+        """Reset the in-memory counters from Mongo"""
+        self._roll_day()
+        day = self._day
+        self._recent_starts, self._recent_finishes, self._recent_tokens = {}, set(), {}
+
+        # Usage recorded by this worker but not flushed yet. Read before the rollups: a flush
+        # in between then counts twice until the next round instead of not at all
+        user_tokens: Dict[str, int] = {
+            user_email: int(totals.get("prompt_tokens", 0) + totals.get("completion_tokens", 0))
+            for user_email, totals in usage_service.pending_totals("user", day).items()
+        }
+        cursor = db.get_collection(USAGE_ROLLUPS_COLLECTION).find(
+            {"day": day, "dimension": "user"}, {"_id": 0, "key": 1, "totals": 1}
+        )
+        async for rollup in cursor:
+            totals = rollup.get("totals", {})
+            user_tokens[rollup["key"]] = user_tokens.get(rollup["key"], 0) + int(
+                totals.get("prompt_tokens", 0) + totals.get("completion_tokens", 0)
+            )
+
+        active: Dict[str, Set[str]] = {}
+        owners: Dict[str, str] = {}
+        cutoff = datetime.utcnow() - timedelta(hours=ACTIVE_INTERVIEW_WINDOW_HOURS)
+        cursor = db.get_collection(SESSIONS_COLLECTION).find(
+            {
+                "user_email": {"$ne": None},
+                "metadata.question_count": {"$gte": 1},
+                "metadata.interview_completed": False,
+                "metadata.updated_at": {"$gte": cutoff}
+            },
+            {"_id": 0, "session_id": 1, "user_email": 1}
+        )
+        async for session in cursor:
+            active.setdefault(session["user_email"], set()).add(session["session_id"])
+            owners[session["session_id"]] = session["user_email"]
+
+        if day != self._day:
+            return  # Midnight passed mid-query; the next round picks up the new day
+        for user_email, tokens in self._recent_tokens.items():
+            user_tokens[user_email] = user_tokens.get(user_email, 0) + tokens
+        user_tokens = {key: tokens for key, tokens in user_tokens.items() if "@" in key}  # Skip the guest bucket
+        tenant_tokens: Dict[str, int] = {}
+        for user_email, tokens in user_tokens.items():
+            tenant = tenant_of(user_email)
+            tenant_tokens[tenant] = tenant_tokens.get(tenant, 0) + tokens
+        self._user_tokens, self._tenant_tokens = user_tokens, tenant_tokens
+        self._active, self._owners = active, owners
+        for session_id, user_email in self._recent_starts.items():
+            self._add_active(user_email, session_id)
+        for session_id in self._recent_finishes:
+            self._remove_active(session_id)
+
+    def start(self):
+        """Start periodic reconciliation (called from the app lifespan)"""
+        self._reconciler.start()
+
+    async def stop(self):
+        await self._reconciler.stop()
+
+# Global quota service instance
+quota_service = QuotaService()
+runtime_settings.bind(
+    quota_service,
+    user_tokens_per_day="DAILY_TOKEN_QUOTA_PER_USER",
+    tenant_tokens_per_day="DAILY_TOKEN_QUOTA_PER_TENANT",
+    max_concurrent_interviews="MAX_CONCURRENT_INTERVIEWS_PER_USER"
+)
+
+
+@flow_events.subscribe
+async def release_finished_interview(transition: PhaseTransition) -> None:
+    if transition.to_phase == COMPLETED_PHASE:
+        quota_service.interview_finished(transition.session_id)
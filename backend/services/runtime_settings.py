@@ -0,0 +1,131 @@
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+from config.settings import tunables
+from config.constants import RUNTIME_SETTINGS_FILE, RUNTIME_SETTINGS_CHECK_INTERVAL_SECONDS
+from services.shared_state import shared_state
+from utils.metrics import metrics
+from utils.periodic import PeriodicTask
+
+runtime_settings_reloads_total = metrics.counter("runtime_settings_reloads_total", "Runtime settings file reloads, by outcome (ok/invalid)")
+
+
+class RuntimeSettings:
+    """
+    The reloadable subset of the tunables (reloadable=True in config/constants.py),
+    changed under load without a redeploy by editing RUNTIME_SETTINGS_FILE, e.g.
+    {"LLM_RATE_LIMIT_PER_MINUTE": 60, "LLM_REQUEST_TIMEOUT_SECONDS": 20}.
+
+    Services bind their attributes to setting names. When the file changes, each
+    override is validated like its environment variable and assigned to the bound
+    attributes; removing a key restores the startup value. A bad file is rejected
+    as a whole. Every worker polls the file itself.
+    """
+
+    def __init__(self, path: str = RUNTIME_SETTINGS_FILE, check_interval: float = RUNTIME_SETTINGS_CHECK_INTERVAL_SECONDS):
+        self.path = path
+        self.check_interval = check_interval
+        self.overrides: Dict[str, Any] = {}
+        self._bindings: Dict[str, List[Tuple[Any, str]]] = {}
+        self._mtime: Optional[float] = None
+        self._watcher = PeriodicTask("Runtime settings check", self._check, lambda: self.check_interval)
+
+    def bind(self, target: Any, **attributes: str) -> None:
+        """Keep target.<attribute> equal to the named reloadable setting"""
+        for attribute, name in attributes.items():
+            spec = tunables.specs.get(name)
+            if spec is None or not spec.reloadable:
+                raise ValueError(f"{name} is not a reloadable setting")
+            self._bindings.setdefault(name, []).append((target, attribute))
+            if name in self.overrides:
+                setattr(target, attribute, self.overrides[name])
+
+    def value(self, name: str) -> Any:
+        """Current value of a setting: its runtime override, else the startup value"""
+        return self.overrides.get(name, tunables.values[name])
+
+    @staticmethod
+    def _parse(raw: Any) -> Dict[str, Any]:
+        if not isinstance(raw, dict):
+            raise ValueError("expected a JSON object of setting names to values")
+        overrides, errors = {}, []
+        for name, value in raw.items():
+            spec = tunables.specs.get(name)
+            if spec is None or not spec.reloadable:
+                errors.append(f"{name} is not a reloadable setting")
+            elif value is None:
+                errors.append(f"{name} must not be null")
+            else:
+                try:
+                    overrides[name] = spec.coerce(value)
+                except ValueError as e:
+                    errors.append(str(e))
+        if errors:
+            raise ValueError("; ".join(errors))
+        return overrides
+
+    def _file_mtime(self) -> Optional[float]:
+        try:
+            return os.path.getmtime(self.path)
+        except OSError:
+            return None
+
+    def reload(self) -> List[str]:
+        """
+        Re-read the overrides file (a missing file means none) and apply it;
+        returns the names of the settings that changed. Raises ValueError for
+        an invalid file, keeping the previous overrides.
+        """
+        self._mtime = self._file_mtime()
+        overrides: Dict[str, Any] = {}
+        if self._mtime is not None:
+            try:
+                with open(self.path) as f:
+                    overrides = self._parse(json.load(f))
+            except ValueError as e:
+                runtime_settings_reloads_total.inc(outcome="invalid")
+                raise ValueError(f"Invalid runtime settings in {self.path}: {e}")
+        runtime_settings_reloads_total.inc(outcome="ok")
+        return self._apply(overrides)
+
+    def _apply(self, overrides: Dict[str, Any]) -> List[str]:
+        changed = sorted(
+            name for name in set(self.overrides) | set(overrides)
+            if self.value(name) != overrides.get(name, tunables.values[name])
+        )
+        self.overrides = overrides
+        for name in changed:
+            for target, attribute in self._bindings.get(name, ()):
+                setattr(target, attribute, self.value(name))
+        if changed:
+            print(f"Runtime settings changed: {', '.join(f'{name}={self.value(name)!r}' for name in changed)}")
+        return changed
+
+    def describe(self) -> Dict[str, Any]:
+        """Profile, overrides file and the effective value of every setting"""
+        described = tunables.describe()
+        for setting in described:
+            if setting["name"] in self.overrides:
+                setting["value"] = self.overrides[setting["name"]]
+                setting["source"] = "runtime"
+        return {"profile": tunables.profile, "runtime_file": self.path, "settings": described}
+
+    async def _check(self):
+        if self._file_mtime() != self._mtime:
+            try:
+                self.reload()
+            except ValueError as e:
+                print(e)
+
+    def start(self):
+        """Apply the overrides file and start polling it (called from the app lifespan)"""
+        self.reload()
+        self._watcher.start()
+
+    async def stop(self):
+        """Stop polling"""
+        await self._watcher.stop()
+
+# Global runtime settings instance
+runtime_settings = RuntimeSettings()
+shared_state.register_cache("settings", runtime_settings.reload)
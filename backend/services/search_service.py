@@ -0,0 +1,336 @@
+import re
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set
+from pymongo import ASCENDING, DESCENDING, TEXT, UpdateOne
+from config.database import db
+from config.constants import (
+    SEARCH_COLLECTION, SEARCH_BACKEND, SEARCH_FLUSH_INTERVAL_SECONDS, SEARCH_LANGUAGE,
+    SESSIONS_COLLECTION, ARCHIVE_COLLECTION, GUEST_SESSION_TTL_DAYS
+)
+from utils.bulk_writes import unapplied
+from utils.minhash import normalize
+from utils.transcript_codec import document_messages
+from utils.metrics import metrics
+from utils.periodic import PeriodicTask
+
+search_queries_total = metrics.counter("search_queries_total", "Transcript searches, by backend")
+search_query_seconds = metrics.histogram(
+    "search_query_seconds", "Transcript search latency",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+)
+search_flushes_total = metrics.counter("search_index_flushes_total", "Search index batch writes, by outcome")
+
+SEARCH_BACKENDS = ("mongo", "memory")
+# Session fields mirrored into the index (metadata key -> index field)
+INDEXED_METADATA = {"current_phase": "phase", "question_count": "question_count", "interview_completed": "completed"}
+FACETS = ("role_id", "phase", "completed")
+FACETS_INDEX = "facets"  # Covers the facet counts of searches without text
+SNIPPET_CHARS = 160
+
+_QUOTED = re.compile(r'"([^"]+)"')
+
+
+@dataclass
+class SearchFilter:
+    role_id: Optional[str] = None
+    phase: Optional[str] = None
+    completed: Optional[bool] = None
+
+    def fields(self) -> Dict[str, Any]:
+        return {field: value for field, value in (
+            ("role_id", self.role_id), ("phase", self.phase), ("completed", self.completed)
+        ) if value is not None}
+
+
+class _Pending:
+    """Index changes of one session not yet written"""
+
+    def __init__(self):
+        self.insert: Dict[str, Any] = {}
+        self.set: Dict[str, Any] = {}
+        self.push: List[str] = []
+
+
+class _MemoryIndex:
+    """In-process inverted index with the same documents as the Mongo backend (single worker, tests)"""
+
+    def __init__(self):
+        self.documents: Dict[str, Dict[str, Any]] = {}
+        self.postings: Dict[str, Set[str]] = defaultdict(set)
+
+    def apply(self, session_id: str, pending: _Pending, now: datetime) -> None:
+        document = self.documents.get(session_id)
+        if document is None:
+            document = self.documents[session_id] = {"session_id": session_id, "contents": [], **pending.insert}
+        document.update(pending.set, updated_at=now)
+        document["contents"].extend(pending.push)
+        for content in pending.push:
+            for term in normalize(content).split():
+                self.postings[term].add(session_id)
+
+    def query(self, text: Optional[str], search_filter: SearchFilter) -> List[Dict[str, Any]]:
+        """Matching documents with a score (number of query terms found, Mongo $text is OR too)"""
+        fields = search_filter.fields()
+        if text:
+            scores: Dict[str, int] = defaultdict(int)
+            for term in set(normalize(text).split()):
+                for session_id in self.postings.get(term, ()):
+                    scores[session_id] += 1
+            candidates = [dict(self.documents[session_id], score=score) for session_id, score in scores.items()]
+        else:
+            candidates = list(self.documents.values())
+        return [
+            document for document in candidates
+            if all(document.get(field) == value for field, value in fields.items())
+        ]
+
+
+class SearchService:
+    """
+    Keyword and faceted search over interview transcripts.
+
+    The `search_index` collection holds one document per session: its role,
+    phase reached, completion status and the content of every candidate and
+    interviewer message, under a Mongo text index. It is separate from
+    `sessions`, so completed (compressed) and archived interviews stay
+    searchable. SessionService records changes as it writes; like usage
+    rollups they are buffered and flushed as one bulk_write every
+    SEARCH_FLUSH_INTERVAL_SECONDS. SEARCH_BACKEND=memory keeps an in-process
+    inverted index instead, for single-worker setups without text indexes.
+    """
+
+    def __init__(self, backend: str = SEARCH_BACKEND, flush_interval: float = SEARCH_FLUSH_INTERVAL_SECONDS):
+        if backend not in SEARCH_BACKENDS:
+            raise ValueError(f"Unknown search backend '{backend}'. Use one of: {', '.join(SEARCH_BACKENDS)}")
+        self.backend = backend
+        self.flush_interval = flush_interval
+        self._pending: Dict[str, _Pending] = {}
+        self._memory = _MemoryIndex()
+        self._flusher = PeriodicTask("Search index flush", self.flush, lambda: self.flush_interval)
+
+    @property
+    def collection(self):
+        return db.get_collection(SEARCH_COLLECTION)
+
+    async def ensure_indexes(self):
+        if self.backend != "mongo":
+            return
+        await self.collection.create_index("session_id", unique=True)
+        await self.collection.create_index([("contents", TEXT)], name="contents_text", default_language=SEARCH_LANGUAGE)
+        for facet in FACETS:
+            await self.collection.create_index([(facet, ASCENDING), ("updated_at", DESCENDING)])
+        await self.collection.create_index([(facet, ASCENDING) for facet in FACETS], name=FACETS_INDEX)
+        await self.collection.create_index([("updated_at", DESCENDING)])
+        # Guest sessions are deleted by a TTL index; their index entries follow
+        await self.collection.create_index(
+            [("expires_from", ASCENDING)],
+            name="guest_ttl",
+            expireAfterSeconds=GUEST_SESSION_TTL_DAYS * 86400,
+            partialFilterExpression={"is_guest": True}
+        )
+
+    def _changes(self, session_id: str) -> _Pending:
+        pending = self._pending.get(session_id)
+        if pending is None:
+            pending = self._pending[session_id] = _Pending()
+        return pending
+
+    def index_session(self, session: Dict[str, Any]) -> None:
+        """Register a new session (no I/O)"""
+        metadata = session.get("metadata", {})
+        pending = self._changes(session["session_id"])
+        pending.insert.update(
+            role_id=session.get("role_id"),
+            user_email=session.get("user_email"),
+            is_guest=session.get("is_guest", False),
+            created_at=metadata.get("created_at") or datetime.utcnow()
+        )
+        self.record(session["session_id"], metadata_updates=metadata)
+
+    def record(self, session_id: str, content: Optional[str] = None, metadata_updates: Optional[Dict[str, Any]] = None) -> None:
+        """Buffer a new message and/or metadata change of a session (no I/O)"""
+        pending = self._changes(session_id)
+        if content:
+            pending.push.append(content)
+        for key, field in INDEXED_METADATA.items():
+            if metadata_updates and key in metadata_updates:
+                pending.set[field] = metadata_updates[key]
+        if self.backend == "memory":
+            self._memory.apply(session_id, self._pending.pop(session_id), datetime.utcnow())
+
+    async def flush(self) -> int:
+        """Write buffered changes; returns the number of sessions updated"""
+        if not self._pending:
+            return 0
+        pending, self._pending = self._pending, {}
+        session_ids = list(pending)
+        now = datetime.utcnow()
+        operations = []
+        for session_id in session_ids:
+            changes = pending[session_id]
+            update: Dict[str, Any] = {
+                # expires_from is updated_at for the guest TTL index (a TTL index can't share updated_at's key)
+                "$set": {**changes.set, "updated_at": now, "expires_from": now},
+                "$setOnInsert": {"created_at": now, **changes.insert},
+            }
+            if changes.push:
+                update["$push"] = {"contents": {"$each": changes.push}}
+            operations.append(UpdateOne({"session_id": session_id}, update, upsert=True))
+        try:
+            await self.collection.bulk_write(operations, ordered=False)
+        except Exception as e:
+            # Put back only the sessions that were not written (a replayed $push would duplicate
+            # their messages), in front of anything recorded meanwhile so messages keep their order
+            failed = unapplied(e, len(operations))
+            for session_id in (session_ids[index] for index in failed):
+                changes = pending[session_id]
+                newer = self._pending.get(session_id)
+                if newer is not None:
+                    changes.insert.update(newer.insert)
+                    changes.set.update(newer.set)
+                    changes.push.extend(newer.push)
+                self._pending[session_id] = changes
+            search_flushes_total.inc(outcome="error")
+            print(f"Search index flush failed for {len(failed)} of {len(operations)} sessions: {e}")
+            return len(operations) - len(failed)
+        search_flushes_total.inc(outcome="ok")
+        return len(operations)
+
+    def start(self):
+        """Start the periodic flusher (called from the app lifespan)"""
+        if self.backend == "mongo":
+            self._flusher.start()
+
+    async def stop(self):
+        """Stop the flusher and write whatever is still buffered"""
+        await self._flusher.stop()
+        if self.backend == "mongo":
+            await self.flush()
+
+    async def rebuild(self) -> int:
+        """Index every live and archived session from scratch; returns the number indexed"""
+        self._pending.clear()
+        if self.backend == "memory":
+            self._memory = _MemoryIndex()
+        else:
+            await self.collection.delete_many({})
+        indexed = 0
+        for name in (SESSIONS_COLLECTION, ARCHIVE_COLLECTION):
+            async for session in db.get_collection(name).find({}):
+                self.index_session(session)
+                for message in document_messages(session):
+                    if message.get("role") != "system":
+                        self.record(session["session_id"], content=message.get("content"))
+                indexed += 1
+                if len(self._pending) >= 500:
+                    await self.flush()
+        await self.flush()
+        return indexed
+
+    async def rebuild_if_empty(self) -> None:
+        """First start with search: index the sessions that already exist"""
+        if self.backend != "mongo" or await self.collection.estimated_document_count():
+            return
+        indexed = await self.rebuild()
+        if indexed:
+            print(f"✅ Indexed {indexed} sessions for search.")
+
+    async def search(
+        self,
+        text: Optional[str],
+        search_filter: SearchFilter,
+        page: int = 1,
+        page_size: int = 20
+    ) -> Dict[str, Any]:
+        """One page of matching sessions (best match first, else most recent) plus facet counts"""
+        started = time.perf_counter()
+        if self.backend == "memory":
+            total, results, facets = self._search_memory(text, search_filter, page, page_size)
+        else:
+            total, results, facets = await self._search_mongo(text, search_filter, page, page_size)
+        search_queries_total.inc(backend=self.backend)
+        search_query_seconds.observe(time.perf_counter() - started)
+        for result in results:
+            result["snippet"] = self._snippet(result.pop("contents", []), text)
+        return {"query": text, "total": total, "page": page, "page_size": page_size, "results": results, "facets": facets}
+
+    async def _search_mongo(self, text, search_filter: SearchFilter, page: int, page_size: int):
+        match: Dict[str, Any] = dict(search_filter.fields())
+        if text:
+            match["$text"] = {"$search": text}
+            # Transcripts are only read back for the snippets of one page
+            projection = {"_id": 0, "expires_from": 0, "score": {"$meta": "textScore"}}
+            order = [("score", {"$meta": "textScore"}), ("updated_at", DESCENDING)]
+        else:
+            projection = {"_id": 0, "expires_from": 0, "contents": 0}
+            order = [("updated_at", DESCENDING)]
+        # The page alone: sorted and limited by the text or updated_at indexes
+        cursor = self.collection.find(match, projection).sort(order).skip((page - 1) * page_size).limit(page_size)
+        results = [document async for document in cursor]
+        total, facets = await self._facet_counts(match, text)
+        return total, results, facets
+
+    async def _facet_counts(self, match: Dict[str, Any], text: Optional[str]):
+        """
+        Total and facet counts, computed from the facet fields only (never the
+        transcripts). Without a text query the facets index covers the whole
+        pipeline, so not a single document is fetched.
+        """
+        pipeline = [
+            {"$match": match},
+            {"$project": {"_id": 0, **{facet: 1 for facet in FACETS}}},
+            {"$facet": {
+                "total": [{"$count": "count"}],
+                **{facet: [{"$group": {"_id": f"${facet}", "count": {"$sum": 1}}}] for facet in FACETS},
+            }},
+        ]
+        options = {} if text else {"hint": FACETS_INDEX}
+        output = None
+        async for output in self.collection.aggregate(pipeline, **options):
+            break
+        if output is None:
+            return 0, {facet: {} for facet in FACETS}
+        total = output["total"][0]["count"] if output["total"] else 0
+        return total, {facet: {self._facet_key(row["_id"]): row["count"] for row in output[facet]} for facet in FACETS}
+
+    def _search_memory(self, text, search_filter: SearchFilter, page: int, page_size: int):
+        documents = self._memory.query(text, search_filter)
+        documents.sort(key=lambda document: (document.get("score", 0), document["updated_at"]), reverse=True)
+        facets: Dict[str, Dict[str, int]] = {facet: defaultdict(int) for facet in FACETS}
+        for document in documents:
+            for facet in FACETS:
+                facets[facet][self._facet_key(document.get(facet))] += 1
+        start = (page - 1) * page_size
+        results = [
+            {key: value for key, value in document.items() if key != "contents" or text}
+            for document in documents[start:start + page_size]
+        ]
+        return len(documents), results, {facet: dict(counts) for facet, counts in facets.items()}
+
+    @staticmethod
+    def _facet_key(value: Any) -> str:
+        if isinstance(value, bool):
+            return "true" if value else "false"
+        return "unknown" if value is None else str(value)
+
+    @staticmethod
+    def _snippet(contents: List[str], text: Optional[str]) -> Optional[str]:
+        """A window around the first query term found in the transcript"""
+        if not text or not contents:
+            return None
+        terms = [phrase.lower() for phrase in _QUOTED.findall(text)] or normalize(text).split()
+        for content in contents:
+            lowered = content.lower()
+            for term in terms:
+                position = lowered.find(term)
+                if position >= 0:
+                    start = max(position - SNIPPET_CHARS // 2, 0)
+                    snippet = content[start:start + SNIPPET_CHARS]
+                    return ("…" if start else "") + snippet + ("…" if start + SNIPPET_CHARS < len(content) else "")
+        return None
+
+# Global search service instance
+search_service = SearchService()
@@ -1,39 +1,129 @@
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 from config.database import db
-from config.constants import SESSIONS_COLLECTION, TOTAL_QUESTIONS
+from config.constants import SESSIONS_COLLECTION, TRANSCRIPT_CODEC
+from pymongo import ASCENDING
 from models.session import Session, Message, SessionMetadata
-from data.role_prompts import ROLE_PROMPTS
+from services.prompt_registry import prompt_registry
+from services.interview_flow import interview_flows
+from services.archive_service import archive_service, MESSAGE_FIELDS_PROJECTION
+from services.question_index import question_index
+from services.search_service import search_service
+from utils.transcript_codec import pack_transcript, unpack_transcript
+from utils.metrics import metrics
+
+# Upper bound for "the rest of the array" in $slice projections
+MAX_SLICE = 100_000
+
+transcript_bytes_total = metrics.counter("transcript_bytes_total", "Completed transcript sizes, raw BSON vs stored")
+transcript_decodes_total = metrics.counter("transcript_decodes_total", "Compressed transcripts decoded on read")
 
 class SessionService:
     def __init__(self):
         self.collection_name = SESSIONS_COLLECTION
     
-    def _get_collection(self):
+    def _get_collection(self, read_only: bool = False):
         """Get collection with proper error handling"""
-        return db.get_collection(self.collection_name)
+        return db.get_collection(self.collection_name, read_only)
+    
+    async def ensure_indexes(self) -> None:
+        """Create indexes used by session lookups"""
+        collection = self._get_collection()
+        await collection.create_index([("session_id", ASCENDING)], unique=True, name="session_id_unique")
+        # Transcript exports filter by role and date range, and stream oldest first
+        await collection.create_index([("role_id", ASCENDING), ("metadata.created_at", ASCENDING)], name="role_created_at")
+        await collection.create_index([("metadata.created_at", ASCENDING)], name="created_at")
+    
+    async def backfill_message_counts(self) -> None:
+        """Set metadata.message_count on sessions created before it was tracked"""
+        collection = self._get_collection()
+        try:
+            result = await collection.update_many(
+                {"metadata.message_count": {"$exists": False}},
+                [{"$set": {"metadata.message_count": {"$size": "$messages"}}}]
+            )
+            if result.modified_count:
+                print(f"✅ Backfilled message_count on {result.modified_count} sessions.")
+        except Exception as e:
+            # Pipeline updates need MongoDB 4.2+; pages fall back to a full read without the count
+            print(f"Could not backfill message counts: {e}")
+    
+    async def backfill_question_index(self) -> None:
+        """Fingerprint the questions of active sessions created before the question index"""
+        collection = self._get_collection()
+        backfilled = 0
+        async for session in collection.find(
+            {"metadata.question_index": {"$exists": False}, "metadata.interview_completed": {"$ne": True}, "messages": {"$exists": True}},
+            {"session_id": 1, "messages.role": 1, "messages.content": 1}
+        ):
+            fingerprints = [
+                question_index.fingerprint(msg["content"])
+                for msg in session.get("messages", []) if msg.get("role") == "assistant"
+            ]
+            await collection.update_one(
+                {"_id": session["_id"], "metadata.question_index": {"$exists": False}},
+                {"$set": {"metadata.question_index": [fp for fp in fingerprints if fp]}}
+            )
+            backfilled += 1
+        if backfilled:
+            print(f"✅ Backfilled question index on {backfilled} sessions.")
     
-    async def create_session(self, role_id: str) -> str:
+    async def create_session(self, role_id: str, user_email: Optional[str] = None) -> str:
         """Create a new interview session"""
         import uuid
         
         session_id = str(uuid.uuid4())
-        role_prompt = ROLE_PROMPTS.get(role_id, ROLE_PROMPTS["meta-ads-expert"])
+        role_prompt = prompt_registry.variant(role_id)
         
         session = Session(
             session_id=session_id,
             role_id=role_id,
-            messages=[Message(**role_prompt)]
+            user_email=user_email,
+            is_guest=user_email is None,
+            messages=[Message(role="system", content=role_prompt.text)],
+            metadata=SessionMetadata(
+                message_count=1,
+                prompt_version=role_prompt.version,
+                prompt_hash=role_prompt.content_hash
+            )
         )
         
+        document = session.dict(by_alias=True)
         collection = self._get_collection()
-        await collection.insert_one(session.dict(by_alias=True))
+        await collection.insert_one(document)
+        search_service.index_session(document)
         return session_id
     
-    async def get_session(self, session_id: str) -> Optional[Dict[str, Any]]:
-        """Get session by session_id"""
-        collection = self._get_collection()
-        return await collection.find_one({"session_id": session_id})
+    async def get_session(
+        self,
+        session_id: str,
+        restore_archived: bool = False,
+        include_messages: bool = True,
+        read_only: bool = False
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Get session by session_id, falling back to the archive.
+
+        Compressed transcripts are only decoded when include_messages is set;
+        without it the messages are not even read. With restore_archived, an
+        archived interview that is still in progress is moved back to the hot
+        collection so it can be written to again. read_only lookups may be served
+        by a secondary (see MONGO_READ_ONLY_PREFERENCE).
+        """
+        collection = self._get_collection(read_only)
+        projection = None if include_messages else MESSAGE_FIELDS_PROJECTION
+        session = await collection.find_one({"session_id": session_id}, projection)
+        if session is not None:
+            transcript = session.pop("transcript", None)
+            if transcript is not None and include_messages:
+                transcript_decodes_total.inc()
+                session["messages"] = unpack_transcript(transcript)
+            return session
+        
+        session = await archive_service.find(session_id, include_messages)
+        if session and restore_archived and not session.get("metadata", {}).get("interview_completed", False):
+            session = await archive_service.restore(session_id)
+        return session
     
     async def get_session_messages(self, session_id: str) -> List[Dict[str, Any]]:
         """Get session messages (excluding system prompt)"""
@@ -42,13 +132,138 @@ class SessionService:
             return [msg for msg in session["messages"] if msg["role"] != "system"]
         return []
     
+    async def get_messages_page(
+        self,
+        session_id: str,
+        limit: Optional[int] = None,
+        before: Optional[int] = None,
+        after: Optional[int] = None,
+        fields: Optional[List[str]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Get a window of the conversation (excluding system prompt) via a $slice projection.
+
+        Positions are history indexes (0 = first message after the system prompt):
+        `before` returns up to `limit` messages older than that index, `after` up to
+        `limit` newer ones, and neither returns the latest `limit` messages.
+        """
+        # History index i is stored at messages[i + 1]
+        if before is not None:
+            start = max(0, before - limit) if limit else 0
+            slice_spec = [start + 1, before - start] if before > start else None
+        elif after is not None:
+            start = after + 1
+            slice_spec = [start + 1, limit or MAX_SLICE]
+        elif limit:
+            start = None  # Counted back from the end once the total is known
+            slice_spec = -limit
+        else:
+            start = 0
+            slice_spec = [1, MAX_SLICE]
+        
+        projection = {"_id": 0, "metadata.message_count": 1, "metadata.updated_at": 1, "transcript.layout": 1}
+        if slice_spec is not None:
+            projection["messages"] = {"$slice": slice_spec}
+        
+        collection = self._get_collection(read_only=True)
+        session = await collection.find_one({"session_id": session_id}, projection)
+        if not session:
+            # Archived sessions only exist as a compressed blob; page through the decoded array
+            return await self._get_messages_page_legacy(session_id, limit, before, after, fields)
+        
+        metadata = session.get("metadata", {})
+        stored_count = metadata.get("message_count")
+        if stored_count is None or "transcript" in session:
+            # Counter predates message_count, or the transcript is compressed (decoded on demand)
+            return await self._get_messages_page_legacy(session_id, limit, before, after, fields)
+        
+        total = max(stored_count - 1, 0)
+        messages = session.get("messages", [])
+        if start is None:
+            # A -limit slice may reach back to the system prompt at messages[0]
+            if len(messages) > total:
+                messages = messages[len(messages) - total:]
+            start = total - len(messages)
+        
+        return {
+            "messages": self._project_fields(messages, fields),
+            "start": start,
+            "total": total,
+            "updated_at": metadata.get("updated_at"),
+        }
+    
+    async def _get_messages_page_legacy(self, session_id, limit, before, after, fields) -> Optional[Dict[str, Any]]:
+        """Page through a session without metadata.message_count by reading the full array"""
+        session = await self.get_session(session_id, read_only=True)
+        if not session:
+            return None
+        
+        history = session["messages"][1:]
+        total = len(history)
+        if before is not None:
+            end = min(before, total)
+            start = max(0, end - limit) if limit else 0
+        elif after is not None:
+            start = min(after + 1, total)
+            end = min(start + limit, total) if limit else total
+        else:
+            end = total
+            start = max(0, total - limit) if limit else 0
+        
+        return {
+            "messages": self._project_fields(history[start:end], fields),
+            "start": start,
+            "total": total,
+            "updated_at": session.get("metadata", {}).get("updated_at"),
+        }
+    
+    @staticmethod
+    def _project_fields(messages: List[Dict[str, Any]], fields: Optional[List[str]]) -> List[Dict[str, Any]]:
+        """Keep only the requested message fields"""
+        if not fields:
+            return messages
+        return [{field: msg.get(field) for field in fields} for msg in messages]
+    
+    @staticmethod
+    def build_llm_messages(session: Dict[str, Any]) -> List[Dict[str, str]]:
+        """Convert a session document's messages into the LLM payload format"""
+        return [{"role": msg["role"], "content": msg["content"]} for msg in session["messages"]]
+    
+    @staticmethod
+    def _message_push(
+        message: Message,
+        fingerprint: Optional[str] = None,
+        question_number: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        $push for a new message. Assistant turns also get their question fingerprint
+        (computed unless given) and the question number they ask, so evaluation can
+        tell questions from error replies without recounting.
+        """
+        document = message.dict()
+        if question_number is not None and message.role == "assistant":
+            document["question_number"] = question_number
+        push = {"messages": document}
+        if message.role == "assistant":
+            fingerprint = fingerprint or question_index.fingerprint(message.content)
+            if fingerprint:
+                push["metadata.question_index"] = fingerprint
+        return push
+    
     async def add_message(self, session_id: str, message: Message) -> None:
         """Add a message to the session"""
         collection = self._get_collection()
-        await collection.update_one(
-            {"session_id": session_id},
-            {"$push": {"messages": message.dict()}}
+        result = await collection.update_one(
+            {"session_id": session_id, "transcript": {"$exists": False}},
+            {
+                "$push": self._message_push(message),
+                "$inc": {"metadata.message_count": 1},
+                "$set": {"metadata.updated_at": datetime.utcnow()}
+            }
         )
+        # Compressed or archived sessions take no new messages; keep the index in step with the data
+        if result.matched_count:
+            search_service.record(session_id, content=message.content)
     
     async def update_metadata(self, session_id: str, metadata_updates: Dict[str, Any]) -> None:
         """Update session metadata"""
@@ -58,6 +273,41 @@ class SessionService:
             {"session_id": session_id},
             {"$set": {f"metadata.{k}": v for k, v in metadata_updates.items()}}
         )
+        search_service.record(session_id, metadata_updates=metadata_updates)
+    
+    async def compress_transcript(self, session_id: str) -> bool:
+        """
+        Replace a completed session's messages array with a compressed transcript.
+
+        Compressed sessions are read-only: message writes only match sessions
+        that still have a plain messages array.
+        """
+        collection = self._get_collection()
+        session = await collection.find_one(
+            {"session_id": session_id, "transcript": {"$exists": False}},
+            {"messages": 1}
+        )
+        if not session:
+            return False
+        
+        messages = session.get("messages", [])
+        transcript = pack_transcript(messages, TRANSCRIPT_CODEC)
+        # Only swap if no message was added since the read
+        result = await collection.update_one(
+            {"_id": session["_id"], "messages": {"$size": len(messages)}},
+            {"$set": {"transcript": transcript}, "$unset": {"messages": ""}}
+        )
+        if result.modified_count:
+            transcript_bytes_total.inc(transcript["header"]["raw_bytes"], stage="raw")
+            transcript_bytes_total.inc(transcript["header"]["stored_bytes"], stage="stored")
+        return result.modified_count > 0
+    
+    async def set_evaluation(self, session_id: str, evaluation: Dict[str, Any]) -> None:
+        """Store the post-interview evaluation on the session"""
+        collection = self._get_collection()
+        result = await collection.update_one({"session_id": session_id}, {"$set": {"evaluation": evaluation}})
+        if result.matched_count == 0:
+            await archive_service.update_archived(session_id, {"evaluation": evaluation})
     
     async def mark_interview_completed(self, session_id: str, manually_ended: bool = False) -> None:
         """Mark interview as completed"""
@@ -68,50 +318,44 @@ class SessionService:
     
     async def get_session_status(self, session_id: str) -> Optional[Dict[str, Any]]:
         """Get current session status"""
-        session = await self.get_session(session_id)
+        session = await self.get_session(session_id, include_messages=False, read_only=True)
         if not session:
             return None
         
         metadata = session.get("metadata", {})
         question_count = metadata.get("question_count", 0)
-        current_phase = self._determine_current_phase(question_count)
+        flow = interview_flows.for_role(session.get("role_id"))
         
         return {
             "question_count": question_count,
-            "current_phase": current_phase,
-            "total_questions": TOTAL_QUESTIONS,
+            "current_phase": flow.phase_for(question_count),
+            "total_questions": flow.total_questions,
             "interview_completed": metadata.get("interview_completed", False),
             "manually_ended": metadata.get("manually_ended", False),
-            "progress_percentage": min((question_count / TOTAL_QUESTIONS) * 100, 100)
+            "progress_percentage": flow.progress(question_count)
         }
     
-    def _determine_current_phase(self, question_count: int) -> str:
-        """Determine current interview phase based on question count"""
-        if question_count <= 1:
-            return "greeting"
-        elif question_count <= 8:  # 1 greeting + 7 easy
-            return "easy"
-        elif question_count <= 12:  # + 4 moderate
-            return "moderate"
-        elif question_count <= 14:  # + 2 scenario
-            return "scenario"
-        elif question_count <= 17:  # + 3 hard
-            return "hard"
-        elif question_count <= 19:  # + 2 expert
-            return "expert"
-        else:
-            return "completed"
-    
-    async def add_message_and_update_metadata(self, session_id: str, message: Message, metadata_updates: dict):
+    async def add_message_and_update_metadata(
+        self,
+        session_id: str,
+        message: Message,
+        metadata_updates: dict,
+        metadata_increments: Optional[Dict[str, float]] = None,
+        fingerprint: Optional[str] = None
+    ):
         """
-        Atomically add message and update metadata in single database operation
+        Atomically add message and update metadata in single database operation.
+        `fingerprint` is the assistant message's question fingerprint when the
+        caller already computed it (see QuestionIndex.is_repeat).
         """
         try:
             collection = self._get_collection()
+            increments = {f"metadata.{key}": value for key, value in (metadata_increments or {}).items()}
             result = await collection.update_one(
-                {"session_id": session_id},
+                {"session_id": session_id, "transcript": {"$exists": False}},
                 {
-                    "$push": {"messages": message.dict()},
+                    "$push": self._message_push(message, fingerprint, metadata_updates.get("question_count")),
+                    "$inc": {"metadata.message_count": 1, **increments},
                     "$set": {
                         **{f"metadata.{key}": value for key, value in metadata_updates.items()},
                         "metadata.updated_at": datetime.utcnow()
@@ -121,6 +365,7 @@ class SessionService:
             
             if result.matched_count == 0:
                 raise ValueError(f"Session {session_id} not found")
+            search_service.record(session_id, content=message.content, metadata_updates=metadata_updates)
                 
             return result.modified_count > 0
             
@@ -0,0 +1,380 @@
+import asyncio
+import os
+import socket
+import time
+import uuid
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from config.database import db
+from config.constants import (
+    SHARED_STATE_BACKEND, SHARED_STATE_POLL_INTERVAL_SECONDS, SESSION_LEASE_SECONDS,
+    RATE_LIMITS_COLLECTION, LEASES_COLLECTION, REVOKED_TOKENS_COLLECTION, SHARED_EVENTS_COLLECTION
+)
+from utils.metrics import metrics
+from utils.periodic import PeriodicTask
+
+shared_events_total = metrics.counter("shared_events_total", "Cross-worker events, by topic and direction (sent/received)")
+session_lease_conflicts_total = metrics.counter("session_lease_conflicts_total", "Turns that found the session leased by another turn (duplicates attach, others get 409)")
+
+# Topics of cross-worker events
+TOKEN_REVOKED = "token_revoked"
+CACHE_INVALIDATED = "cache_invalidated"
+
+
+@dataclass
+class Lease:
+    name: str
+    owner: str
+    turn: Optional[str] = None  # What the holder is working on (e.g. a digest of the chat message)
+
+
+class LeaseHeld(Exception):
+    """Another request (on any worker) is working on this session"""
+
+    def __init__(self, message: str, holder: Optional[Lease] = None):
+        super().__init__(message)
+        self.holder = holder  # None if it was released in the meantime
+
+
+class MemoryBackend:
+    """
+    Process-local stand-in for tests and single-worker deployments. Rate limits
+    use an exact sliding window; events never leave the process.
+    """
+
+    def __init__(self):
+        self._hits: Dict[str, Deque[float]] = {}
+        self._leases: Dict[str, Tuple[str, float, Optional[str]]] = {}
+        self._revoked: Dict[str, datetime] = {}
+
+    async def ensure_indexes(self) -> None:
+        pass
+
+    def _window(self, key: str, window: float) -> Deque[float]:
+        hits = self._hits.setdefault(key, deque())
+        now = time.time()
+        while hits and now - hits[0] > window:
+            hits.popleft()
+        return hits
+
+    async def hit(self, key: str, limit: int, window: float) -> bool:
+        hits = self._window(key, window)
+        if len(hits) >= limit:
+            return False
+        hits.append(time.time())
+        return True
+
+    def headroom(self, key: str, limit: int, window: float) -> int:
+        return max(limit - len(self._window(key, window)), 0)
+
+    async def count(self, key: str, window: float) -> int:
+        return len(self._window(key, window))
+
+    async def acquire_lease(self, name: str, owner: str, ttl: float, turn: Optional[str] = None) -> bool:
+        now = time.monotonic()
+        holder = self._leases.get(name)
+        if holder is not None and holder[0] != owner and holder[1] > now:
+            return False
+        self._leases[name] = (owner, now + ttl, turn)
+        return True
+
+    async def lease_holder(self, name: str) -> Optional[Lease]:
+        holder = self._leases.get(name)
+        if holder is None or holder[1] <= time.monotonic():
+            return None
+        return Lease(name, holder[0], holder[2])
+
+    async def release_lease(self, name: str, owner: str) -> None:
+        holder = self._leases.get(name)
+        if holder is not None and holder[0] == owner:
+            del self._leases[name]
+
+    async def revoke(self, token_id: str, expires_at: datetime) -> None:
+        self._revoked[token_id] = expires_at
+
+    async def revocations(self) -> Dict[str, datetime]:
+        now = datetime.utcnow()
+        return {token_id: expires for token_id, expires in self._revoked.items() if expires > now}
+
+    async def publish(self, topic: str, payload: Dict[str, Any], origin: str) -> None:
+        pass  # No other process to tell
+
+    async def events(self, origin: str) -> List[Dict[str, Any]]:
+        return []
+
+
+class MongoBackend:
+    """
+    State shared by every worker and pod through MongoDB. Rate limits count in
+    fixed windows (one upserted document per key and window); leases and
+    revocations expire through TTL indexes. Events are documents that every
+    worker polls for, re-reading a short lookback so inserts that land out of
+    order across workers are not missed.
+    """
+
+    EVENT_LOOKBACK = timedelta(seconds=10)
+    EVENT_RETENTION_SECONDS = 3600
+
+    def __init__(self):
+        self._observed: Dict[str, Tuple[int, int]] = {}  # key -> (window, count) of this worker's last hit
+        self._seen: Dict[Any, datetime] = {}  # Event ids already delivered, within the lookback
+        self._since = datetime.utcnow()
+
+    async def ensure_indexes(self) -> None:
+        await db.get_collection(RATE_LIMITS_COLLECTION).create_index("expires_at", expireAfterSeconds=0)
+        await db.get_collection(LEASES_COLLECTION).create_index("expires_at", expireAfterSeconds=0)
+        await db.get_collection(REVOKED_TOKENS_COLLECTION).create_index("expires_at", expireAfterSeconds=0)
+        await db.get_collection(SHARED_EVENTS_COLLECTION).create_index(
+            "created_at", expireAfterSeconds=self.EVENT_RETENTION_SECONDS
+        )
+
+    async def hit(self, key: str, limit: int, window: float) -> bool:
+        index = int(time.time() // window)
+        collection = db.get_collection(RATE_LIMITS_COLLECTION)
+        # The filter only matches below the limit; at the limit the upsert collides with
+        # the existing document. Two first hits can also collide, so retry once.
+        for _ in range(2):
+            try:
+                counter = await collection.find_one_and_update(
+                    {"_id": f"{key}:{index}", "count": {"$lt": limit}},
+                    {
+                        "$inc": {"count": 1},
+                        "$setOnInsert": {"expires_at": datetime.utcfromtimestamp((index + 2) * window)},
+                    },
+                    upsert=True,
+                    return_document=ReturnDocument.AFTER,
+                )
+            except DuplicateKeyError:
+                continue
+            self._observed[key] = (index, counter["count"])
+            return True
+        self._observed[key] = (index, limit)
+        return False
+
+    def headroom(self, key: str, limit: int, window: float) -> int:
+        # No round trip: judged from this worker's last hit in the current window
+        index, count = self._observed.get(key, (None, 0))
+        if index != int(time.time() // window):
+            return limit
+        return max(limit - count, 0)
+
+    async def count(self, key: str, window: float) -> int:
+        counter = await db.get_collection(RATE_LIMITS_COLLECTION).find_one({"_id": f"{key}:{int(time.time() // window)}"})
+        return counter["count"] if counter else 0
+
+    async def acquire_lease(self, name: str, owner: str, ttl: float, turn: Optional[str] = None) -> bool:
+        now = datetime.utcnow()
+        try:
+            await db.get_collection(LEASES_COLLECTION).update_one(
+                {"_id": name, "$or": [{"owner": owner}, {"expires_at": {"$lte": now}}]},
+                {"$set": {"owner": owner, "turn": turn, "expires_at": now + timedelta(seconds=ttl)}},
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            return False  # Held by someone else and not expired
+        return True
+
+    async def lease_holder(self, name: str) -> Optional[Lease]:
+        document = await db.get_collection(LEASES_COLLECTION).find_one(
+            {"_id": name, "expires_at": {"$gt": datetime.utcnow()}}
+        )
+        return Lease(name, document["owner"], document.get("turn")) if document else None
+
+    async def release_lease(self, name: str, owner: str) -> None:
+        await db.get_collection(LEASES_COLLECTION).delete_one({"_id": name, "owner": owner})
+
+    async def revoke(self, token_id: str, expires_at: datetime) -> None:
+        await db.get_collection(REVOKED_TOKENS_COLLECTION).update_one(
+            {"_id": token_id}, {"$set": {"expires_at": expires_at}}, upsert=True
+        )
+
+    async def revocations(self) -> Dict[str, datetime]:
+        cursor = db.get_collection(REVOKED_TOKENS_COLLECTION).find({"expires_at": {"$gt": datetime.utcnow()}})
+        return {document["_id"]: document["expires_at"] async for document in cursor}
+
+    async def publish(self, topic: str, payload: Dict[str, Any], origin: str) -> None:
+        await db.get_collection(SHARED_EVENTS_COLLECTION).insert_one(
+            {"topic": topic, "payload": payload, "origin": origin, "created_at": datetime.utcnow()}
+        )
+
+    async def events(self, origin: str) -> List[Dict[str, Any]]:
+        now = datetime.utcnow()
+        cursor = db.get_collection(SHARED_EVENTS_COLLECTION).find(
+            {"created_at": {"$gte": self._since - self.EVENT_LOOKBACK}, "origin": {"$ne": origin}}
+        ).sort("created_at", 1)
+        fresh = []
+        async for event in cursor:
+            if event["_id"] not in self._seen:
+                self._seen[event["_id"]] = event["created_at"]
+                fresh.append(event)
+        self._since = now
+        cutoff = now - 2 * self.EVENT_LOOKBACK
+        self._seen = {event_id: created for event_id, created in self._seen.items() if created >= cutoff}
+        return fresh
+
+
+SHARED_STATE_BACKENDS = {"memory": MemoryBackend, "mongo": MongoBackend}
+
+
+class SharedState:
+    """
+    Coordination between workers (uvicorn --workers N, several pods): the LLM
+    rate limit, per-session turn leases, the revoked token list and cache
+    invalidation. With the "memory" backend all of it is local to the process,
+    which is only correct for a single worker.
+
+    Revocations and invalidations are applied locally at once and broadcast to
+    the other workers, which pick them up within SHARED_STATE_POLL_INTERVAL_SECONDS.
+    """
+
+    def __init__(self, backend: str = SHARED_STATE_BACKEND, poll_interval: float = SHARED_STATE_POLL_INTERVAL_SECONDS):
+        if backend not in SHARED_STATE_BACKENDS:
+            raise ValueError(f"Unknown shared state backend '{backend}'. Use one of: {', '.join(SHARED_STATE_BACKENDS)}")
+        self.backend_name = backend
+        self.backend = SHARED_STATE_BACKENDS[backend]()
+        self.poll_interval = poll_interval
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._revoked: Dict[str, datetime] = {}
+        self._caches: Dict[str, Callable[[], Any]] = {}
+        self._poller = PeriodicTask("Shared state poll", self._poll, lambda: self.poll_interval)
+
+    async def ensure_indexes(self):
+        await self.backend.ensure_indexes()
+
+    # Rate limits
+
+    async def rate_limit(self, key: str, limit: int, window: float = 60.0) -> bool:
+        """Count one request against `limit` per `window` seconds; False once the limit is reached"""
+        return await self.backend.hit(key, limit, window)
+
+    def headroom(self, key: str, limit: int, window: float = 60.0) -> int:
+        """Requests still allowed in the current window (no I/O; approximate with the mongo backend)"""
+        return self.backend.headroom(key, limit, window)
+
+    async def shared_headroom(self, key: str, limit: int, window: float = 60.0) -> int:
+        """Requests still allowed in the current window by every worker together (a round trip with mongo)"""
+        return max(limit - await self.backend.count(key, window), 0)
+
+    # Session leases
+
+    async def acquire_session(self, session_id: str, turn: Optional[str] = None, ttl: float = SESSION_LEASE_SECONDS) -> Lease:
+        """
+        Lease a session for one turn; raises LeaseHeld while another turn holds it.
+        `turn` identifies the work, so a duplicate request can recognise the
+        holder as its own in-flight turn (LeaseHeld.holder) and attach to it.
+        """
+        lease = Lease(f"session:{session_id}", uuid.uuid4().hex, turn)
+        if not await self.backend.acquire_lease(lease.name, lease.owner, ttl, turn):
+            session_lease_conflicts_total.inc()
+            raise LeaseHeld("A reply for this session is already being generated", await self.backend.lease_holder(lease.name))
+        return lease
+
+    async def held(self, lease: Lease) -> bool:
+        """Whether `lease` is still held (by whichever request took it)"""
+        holder = await self.backend.lease_holder(lease.name)
+        return holder is not None and holder.owner == lease.owner
+
+    async def wait_released(self, lease: Lease, timeout: float = SESSION_LEASE_SECONDS) -> bool:
+        """Wait until another request's lease is released or expires; False on timeout"""
+        deadline = time.monotonic() + timeout
+        while await self.held(lease):
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(self.poll_interval)
+        return True
+
+    async def release(self, lease: Lease) -> None:
+        """Give a lease back (a no-op once it has expired and been taken over)"""
+        try:
+            await self.backend.release_lease(lease.name, lease.owner)
+        except Exception as e:
+            print(f"Could not release {lease.name}: {e}")  # It expires on its own
+
+    @asynccontextmanager
+    async def session_lease(self, session_id: str, turn: Optional[str] = None):
+        lease = await self.acquire_session(session_id, turn)
+        try:
+            yield lease
+        finally:
+            await self.release(lease)
+
+    # Revoked tokens
+
+    async def revoke_token(self, token_id: str, expires_at: datetime) -> None:
+        """Reject a token on every worker until it expires"""
+        await self.backend.revoke(token_id, expires_at)
+        self._revoked[token_id] = expires_at
+        await self._publish(TOKEN_REVOKED, {"token_id": token_id, "expires_at": expires_at.isoformat()})
+
+    def is_revoked(self, token_id: Optional[str]) -> bool:
+        """Whether a token id was revoked (no I/O)"""
+        return token_id is not None and token_id in self._revoked
+
+    async def load_revocations(self) -> int:
+        """Load the unexpired revocations (called from the app lifespan)"""
+        self._revoked = await self.backend.revocations()
+        return len(self._revoked)
+
+    def _prune_revocations(self) -> None:
+        now = datetime.utcnow()
+        self._revoked = {token_id: expires for token_id, expires in self._revoked.items() if expires > now}
+
+    # Cache invalidation
+
+    def register_cache(self, name: str, clear: Callable[[], Any]) -> None:
+        """Make a worker-local cache clearable on every worker through invalidate(name)"""
+        self._caches[name] = clear
+
+    @property
+    def caches(self) -> List[str]:
+        return sorted(self._caches)
+
+    async def invalidate(self, name: str) -> None:
+        """Clear a registered cache here and on every other worker"""
+        if name not in self._caches:
+            raise ValueError(f"Unknown cache '{name}'. Use one of: {', '.join(self.caches)}")
+        self._clear(name)
+        await self._publish(CACHE_INVALIDATED, {"cache": name})
+
+    def _clear(self, name: str) -> None:
+        try:
+            self._caches[name]()
+        except Exception as e:
+            print(f"Clearing cache {name} failed: {e}")
+
+    # Events
+
+    async def _publish(self, topic: str, payload: Dict[str, Any]) -> None:
+        await self.backend.publish(topic, payload, self.worker_id)
+        shared_events_total.inc(topic=topic, direction="sent")
+
+    def _receive(self, event: Dict[str, Any]) -> None:
+        topic, payload = event["topic"], event["payload"]
+        shared_events_total.inc(topic=topic, direction="received")
+        if topic == TOKEN_REVOKED:
+            self._revoked[payload["token_id"]] = datetime.fromisoformat(payload["expires_at"])
+        elif topic == CACHE_INVALIDATED and payload.get("cache") in self._caches:
+            self._clear(payload["cache"])
+
+    async def _poll(self):
+        try:
+            for event in await self.backend.events(self.worker_id):
+                self._receive(event)
+        finally:
+            self._prune_revocations()
+
+    def start(self):
+        """Start receiving other workers' events (called from the app lifespan)"""
+        self._poller.start()
+
+    async def stop(self):
+        """Stop receiving events"""
+        await self._poller.stop()
+
+# Global shared state instance
+shared_state = SharedState()
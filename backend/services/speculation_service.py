@@ -0,0 +1,226 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Set
+from config.constants import (
+    SPECULATION_MODE, SPECULATION_BUDGET_PER_SESSION, SPECULATION_MIN_DRAFT_CHARS,
+    SPECULATION_MAX_CONCURRENCY, SPECULATION_RATE_RESERVE, SPECULATION_TTL_SECONDS
+)
+from services.ai_service import ai_service, LLMUsage
+from services.session_service import session_service
+from services.interview_flow import interview_flows, flow_events, PhaseTransition, COMPLETED_PHASE
+from services.prompt_registry import prompt_registry
+from services.usage_service import usage_service
+from services.quota_service import quota_service, QuotaExceeded
+from services.runtime_settings import runtime_settings
+from utils.metrics import metrics
+
+speculation_drafts_total = metrics.counter("speculation_drafts_total", "Draft events, by what speculation did with them")
+speculation_results_total = metrics.counter("speculation_results_total", "Speculative replies at answer time, by outcome (hit/miss)")
+speculation_ttft_saved_seconds = metrics.histogram(
+    "speculation_ttft_saved_seconds", "Reply latency saved by a speculative hit",
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0)
+)
+speculation_wasted_tokens_total = metrics.counter("speculation_wasted_tokens_total", "Tokens spent on speculative replies that were not used")
+
+SPECULATION_MODES = ("off", "warm", "generate")
+
+
+def _normalize(text: str) -> str:
+    """Answers match a draft if they only differ in case and whitespace"""
+    return " ".join(text.split()).casefold()
+
+
+@dataclass
+class Speculation:
+    """One speculative call for a session's current turn"""
+    session_id: str
+    role_id: Optional[str]
+    user_email: Optional[str]
+    turn: int  # metadata.message_count when the draft arrived
+    draft_key: str
+    mode: str
+    usage: LLMUsage = field(default_factory=LLMUsage)
+    task: Optional[asyncio.Task] = None
+    reply: Optional[str] = None
+    started_at: float = field(default_factory=time.monotonic)
+
+
+class SpeculationService:
+    """
+    Uses the time a candidate spends typing.
+
+    On a draft event, "warm" mode sends the upcoming request's stable prefix so
+    the provider's prompt cache is primed; "generate" mode generates the next
+    question for the draft as if it had been sent. When the real answer arrives,
+    a generated reply is reused if the answer matches the draft (a hit) and
+    cancelled otherwise. Each session gets SPECULATION_BUDGET_PER_SESSION
+    speculative calls, and speculation never takes the last
+    SPECULATION_RATE_RESERVE rate-limit slots from real turns.
+    """
+
+    def __init__(self, mode: str = SPECULATION_MODE, budget: int = SPECULATION_BUDGET_PER_SESSION):
+        if mode not in SPECULATION_MODES:
+            raise ValueError(f"Unknown speculation mode '{mode}'. Use one of: {', '.join(SPECULATION_MODES)}")
+        self.mode = mode
+        self.budget = budget
+        self._pending: Dict[str, Speculation] = {}
+        self._spent: Dict[str, int] = {}
+        self._warmed: Dict[str, int] = {}  # session_id -> turn whose prefix was warmed
+        self._warmups: Set[asyncio.Task] = set()
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    def _running(self) -> int:
+        return sum(1 for spec in self._pending.values() if spec.task is not None and not spec.task.done())
+
+    async def on_draft(self, session_id: str, draft: str) -> str:
+        """Handle a typing/draft event; returns what was done (for the client and metrics)"""
+        outcome = await self._on_draft(session_id, draft)
+        speculation_drafts_total.inc(outcome=outcome)
+        return outcome
+
+    async def _on_draft(self, session_id: str, draft: str) -> str:
+        if not self.enabled:
+            return "disabled"
+        self._prune()
+        if self.mode == "generate" and len(draft.strip()) < SPECULATION_MIN_DRAFT_CHARS:
+            return "too_short"
+
+        pending = self._pending.get(session_id)
+        if pending is not None and pending.draft_key == _normalize(draft):
+            return "unchanged"
+        if self._spent.get(session_id, 0) >= self.budget:
+            return "budget_exhausted"
+        if self._running() >= SPECULATION_MAX_CONCURRENCY:
+            return "busy"
+        if ai_service.rate_limit_headroom() <= SPECULATION_RATE_RESERVE:
+            return "rate_limited"
+
+        session = await session_service.get_session(session_id)
+        if not session:
+            return "unknown_session"
+        metadata = session.get("metadata", {})
+        if metadata.get("interview_completed", False) or session.get("archived"):
+            return "completed"
+        try:
+            quota_service.check_tokens(session.get("user_email"))
+        except QuotaExceeded:
+            return "over_quota"
+
+        turn = metadata.get("message_count", len(session.get("messages", [])))
+        flow = interview_flows.for_role(session.get("role_id"))
+        step = flow.advance(session_id, session.get("role_id"), metadata.get("question_count", 0))
+        if step.completed:
+            return "completed"  # The closing message is static
+        prompt = prompt_registry.variant(session.get("role_id"), step.phase)
+        messages = session_service.build_llm_messages(session)
+
+        if self.mode == "warm":
+            if self._warmed.get(session_id) == turn:
+                return "unchanged"
+            self._warmed[session_id] = turn
+            self._spent[session_id] = self._spent.get(session_id, 0) + 1
+            task = asyncio.create_task(self._warm(session, messages, prompt, LLMUsage()))
+            self._warmups.add(task)
+            task.add_done_callback(self._warmups.discard)
+            return "warming"
+
+        if pending is not None:
+            self._discard(self._pending.pop(session_id))
+        spec = Speculation(
+            session_id=session_id,
+            role_id=session.get("role_id"),
+            user_email=session.get("user_email"),
+            turn=turn,
+            draft_key=_normalize(draft),
+            mode=self.mode
+        )
+        # Same layout as ChatController: the draft stands in for the user's answer
+        messages.append({"role": "user", "content": draft})
+        phase_context = f"CURRENT STATUS: Question {step.question_count}/{flow.total_questions}"
+        spec.task = asyncio.create_task(self._generate(spec, messages, phase_context, prompt))
+        self._pending[session_id] = spec
+        self._spent[session_id] = self._spent.get(session_id, 0) + 1
+        return "generating"
+
+    async def _warm(self, session, messages, prompt, usage: LLMUsage) -> None:
+        try:
+            await ai_service.warm_prefix(messages, prompt, usage)
+        except Exception as e:
+            print(f"Prompt cache warm-up failed: {e}")
+            return
+        # Warm-ups are real spend: they count towards rollups and quotas
+        usage_service.record(session.get("role_id"), session.get("user_email"), usage)
+        quota_service.record(session.get("user_email"), usage)
+
+    async def _generate(self, spec: Speculation, messages, phase_context: str, prompt) -> None:
+        spec.reply = await ai_service.generate_response(messages, phase_context, prompt, spec.usage)
+
+    async def take(self, session_id: str, turn: Optional[int], answer: str) -> Optional[Speculation]:
+        """
+        Called when the real answer arrives (before the next question is generated).
+        Returns the speculative reply for a matching draft, waiting for it if it is
+        still in flight; anything else is cancelled.
+        """
+        spec = self._pending.pop(session_id, None)
+        if spec is None:
+            return None
+        if spec.turn != turn or spec.draft_key != _normalize(answer):
+            speculation_results_total.inc(outcome="miss")
+            self._discard(spec)
+            return None
+
+        waited = time.monotonic()
+        try:
+            await spec.task
+        except Exception as e:
+            print(f"Speculative reply failed: {e}")
+            speculation_results_total.inc(outcome="miss")
+            return None
+        waited = time.monotonic() - waited
+        speculation_results_total.inc(outcome="hit")
+        speculation_ttft_saved_seconds.observe(max(spec.usage.latency_ms / 1000 - waited, 0.0))
+        return spec
+
+    def _discard(self, spec: Speculation) -> None:
+        """Cancel an unused speculation; a finished one still counts as spend"""
+        if spec.task is not None and not spec.task.done():
+            spec.task.cancel()
+            return
+        if spec.task is not None and not spec.task.cancelled() and spec.task.exception() is None:
+            speculation_wasted_tokens_total.inc(spec.usage.prompt_tokens + spec.usage.completion_tokens)
+            usage_service.record(spec.role_id, spec.user_email, spec.usage)
+            quota_service.record(spec.user_email, spec.usage)
+
+    def _prune(self) -> None:
+        cutoff = time.monotonic() - SPECULATION_TTL_SECONDS
+        for session_id, spec in list(self._pending.items()):
+            if spec.started_at < cutoff:
+                self._discard(self._pending.pop(session_id))
+
+    def forget(self, session_id: str) -> None:
+        """Drop a session's speculation state (its interview is over)"""
+        spec = self._pending.pop(session_id, None)
+        if spec is not None:
+            self._discard(spec)
+        self._spent.pop(session_id, None)
+        self._warmed.pop(session_id, None)
+
+    async def stop(self):
+        for session_id in list(self._pending):
+            self.forget(session_id)
+        for task in list(self._warmups):
+            task.cancel()
+
+# Global speculation service instance
+speculation_service = SpeculationService()
+runtime_settings.bind(speculation_service, budget="SPECULATION_BUDGET_PER_SESSION")
+
+
+@flow_events.subscribe
+async def forget_completed_sessions(transition: PhaseTransition) -> None:
+    if transition.to_phase == COMPLETED_PHASE:
+        speculation_service.forget(transition.session_id)
@@ -0,0 +1,297 @@
+import asyncio
+import os
+import socket
+import time
+import uuid
+from dataclasses import asdict
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Awaitable, Dict, List, Optional, Set
+from pymongo import ASCENDING, ReturnDocument
+from config.database import db
+from config.constants import (
+    STREAMS_COLLECTION, STREAM_CHECKPOINT_INTERVAL_SECONDS, STREAM_STALE_AFTER_SECONDS,
+    STREAM_LIVE_RETENTION_SECONDS, STREAM_RETENTION_HOURS
+)
+from models.session import Message
+from services.session_service import session_service
+from services.interview_flow import flow_events, PhaseTransition
+from utils.metrics import metrics
+
+streams_active = metrics.gauge("streams_active", "Generations running in this worker")
+stream_checkpoints_total = metrics.counter("stream_checkpoints_total", "Partial-reply checkpoints written")
+stream_reattach_total = metrics.counter("stream_reattach_total", "Stream reattachments, by source (live/checkpoint)")
+streams_recovered_total = metrics.counter("streams_recovered_total", "Abandoned streams whose partial reply was saved")
+
+STREAMING = "streaming"
+DONE = "done"
+INTERRUPTED = "interrupted"
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+
+class LiveStream:
+    """
+    A generation in progress in this worker. The producer appends UTF-8 chunks;
+    any number of readers follow it from a byte offset.
+    """
+
+    def __init__(self, stream_id: str, session_id: str):
+        self.stream_id = stream_id
+        self.session_id = session_id
+        self.chunks: List[bytes] = []
+        self.size = 0
+        self.status = STREAMING
+        self.finished_at: Optional[float] = None
+        self._changed = asyncio.Event()
+        self._checkpointed_size = 0
+        self._checkpointed_at = time.monotonic()
+
+    def append(self, text: str) -> None:
+        data = text.encode()
+        if data:
+            self.chunks.append(data)
+            self.size += len(data)
+            self._notify()
+
+    def finish(self, status: str) -> None:
+        self.status = status
+        self.finished_at = time.monotonic()
+        self._notify()
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def content(self) -> str:
+        return b"".join(self.chunks).decode()
+
+    async def follow(self, offset: int = 0) -> AsyncIterator[bytes]:
+        """Yield everything after `offset` bytes, then new chunks until the stream ends"""
+        index, position = 0, 0
+        while True:
+            while index < len(self.chunks):
+                chunk = self.chunks[index]
+                index += 1
+                end = position + len(chunk)
+                if end > offset:
+                    yield chunk[max(offset - position, 0):]
+                position = end
+            if self.status != STREAMING:
+                return
+            await self._changed.wait()
+
+
+class StreamService:
+    """
+    Resumable assistant replies.
+
+    Each streamed reply gets a stream id and runs as a task that is decoupled
+    from the HTTP response, so a client that drops can reattach (from the number
+    of bytes it already has) instead of paying for a fresh generation. Partial
+    output is checkpointed to `streams` every STREAM_CHECKPOINT_INTERVAL_SECONDS;
+    readers on other workers follow those checkpoints, and if a worker dies the
+    last checkpoint is saved as the assistant's turn once the stream goes stale.
+    The owning worker heartbeats `updated_at` independently of token arrival,
+    so a generation still waiting on upstream is never taken for abandoned.
+    """
+
+    def __init__(self, checkpoint_interval: float = STREAM_CHECKPOINT_INTERVAL_SECONDS):
+        self.checkpoint_interval = checkpoint_interval
+        self.heartbeat_interval = STREAM_STALE_AFTER_SECONDS / 3  # Several beats per staleness window
+        self._live: Dict[str, LiveStream] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    @property
+    def collection(self):
+        return db.get_collection(STREAMS_COLLECTION)
+
+    async def ensure_indexes(self):
+        await self.collection.create_index("stream_id", unique=True)
+        await self.collection.create_index([("session_id", ASCENDING), ("status", ASCENDING)], name="session_status")
+        await self.collection.create_index("created_at", expireAfterSeconds=STREAM_RETENTION_HOURS * 3600)
+
+    async def open(
+        self,
+        session_id: str,
+        metadata_updates: Dict[str, Any],
+        transition: Optional[PhaseTransition] = None,
+        lease: Optional[str] = None
+    ) -> LiveStream:
+        """
+        Register a new stream; the metadata/transition are what a recovery needs to
+        save the turn, `lease` the owner of the session lease the turn runs under
+        """
+        self._prune()
+        live = LiveStream(str(uuid.uuid4()), session_id)
+        now = datetime.utcnow()
+        await self.collection.insert_one({
+            "stream_id": live.stream_id,
+            "session_id": session_id,
+            "status": STREAMING,
+            "content": "",
+            "size": 0,
+            "worker": WORKER_ID,
+            "metadata_updates": metadata_updates,
+            "transition": asdict(transition) if transition else None,
+            "lease": lease,
+            "created_at": now,
+            "updated_at": now,
+        })
+        self._live[live.stream_id] = live
+        return live
+
+    async def checkpoint(self, live: LiveStream, force: bool = False) -> None:
+        """Persist the partial reply if the checkpoint interval has passed"""
+        if not force and time.monotonic() - live._checkpointed_at < self.checkpoint_interval:
+            return
+        if live.size == live._checkpointed_size and not force:
+            return
+        live._checkpointed_at = time.monotonic()
+        live._checkpointed_size = live.size
+        try:
+            await self.collection.update_one(
+                {"stream_id": live.stream_id},
+                {"$set": {"content": live.content(), "size": live.size, "updated_at": datetime.utcnow()}}
+            )
+            stream_checkpoints_total.inc()
+        except Exception as e:
+            print(f"Stream checkpoint failed: {e}")
+
+    async def close(self, live: LiveStream, status: str = DONE) -> bool:
+        """
+        Write the final content and wake readers. Returns False if the stream was
+        already recovered as abandoned, in which case the caller must not save the
+        turn again.
+        """
+        live.finish(status)
+        try:
+            result = await self.collection.update_one(
+                {"stream_id": live.stream_id, "status": STREAMING},
+                {"$set": {
+                    "status": status, "content": live.content(), "size": live.size,
+                    "updated_at": datetime.utcnow()
+                }}
+            )
+            return result.matched_count > 0
+        except Exception as e:
+            print(f"Stream close failed: {e}")
+            return True
+
+    def run(self, live: LiveStream, producer: Awaitable[None]) -> asyncio.Task:
+        """Run a stream's producer independently of the request that started it"""
+        task = asyncio.create_task(self._track(live, producer))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _track(self, live: LiveStream, producer: Awaitable[None]) -> None:
+        streams_active.inc()
+        heartbeat = asyncio.create_task(self._heartbeat(live))
+        try:
+            await producer
+        finally:
+            heartbeat.cancel()
+            streams_active.dec()
+
+    async def _heartbeat(self, live: LiveStream) -> None:
+        """Keep the stream fresh while its producer runs, even before the first token"""
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                await self.collection.update_one(
+                    {"stream_id": live.stream_id, "status": STREAMING},
+                    {"$set": {"updated_at": datetime.utcnow()}}
+                )
+            except Exception as e:
+                print(f"Stream heartbeat failed: {e}")
+
+    async def follow(self, stream_id: str, offset: int = 0) -> Optional[AsyncIterator[bytes]]:
+        """Reader for a stream from `offset` bytes, or None if the stream is unknown"""
+        live = self._live.get(stream_id)
+        if live is not None:
+            stream_reattach_total.inc(source="live")
+            return live.follow(offset)
+
+        document = await self.collection.find_one({"stream_id": stream_id})
+        if document is None:
+            return None
+        stream_reattach_total.inc(source="checkpoint")
+        if document["status"] == STREAMING and self._is_stale(document):
+            document = await self.recover(document) or document
+        return self._follow_checkpoints(document, offset)
+
+    async def _follow_checkpoints(self, document: Dict[str, Any], offset: int) -> AsyncIterator[bytes]:
+        """Follow a stream owned by another worker by polling its checkpoints"""
+        while True:
+            data = document.get("content", "").encode()
+            if len(data) > offset:
+                yield data[offset:]
+                offset = len(data)
+            if document["status"] != STREAMING:
+                return
+            await asyncio.sleep(self.checkpoint_interval)
+            document = await self.collection.find_one({"stream_id": document["stream_id"]})
+            if document is None:
+                return
+            if document["status"] == STREAMING and self._is_stale(document):
+                document = await self.recover(document) or document
+
+    async def find_by_lease(self, session_id: str, lease: str) -> Optional[str]:
+        """Stream id of the turn running under a session lease, if it has opened one"""
+        document = await self.collection.find_one({"session_id": session_id, "lease": lease}, {"stream_id": 1})
+        return document["stream_id"] if document else None
+
+    @staticmethod
+    def _is_stale(document: Dict[str, Any]) -> bool:
+        return document["updated_at"] < datetime.utcnow() - timedelta(seconds=STREAM_STALE_AFTER_SECONDS)
+
+    async def recover(self, document: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Save the last checkpoint of an abandoned stream as the assistant's turn.
+        Only one caller wins the status flip, so the turn is saved once.
+        """
+        claimed = await self.collection.find_one_and_update(
+            {"stream_id": document["stream_id"], "status": STREAMING, "updated_at": document["updated_at"]},
+            {"$set": {"status": INTERRUPTED, "updated_at": datetime.utcnow()}},
+            return_document=ReturnDocument.AFTER
+        )
+        if claimed is None:
+            return None
+        if claimed.get("content", "").strip():
+            await session_service.add_message_and_update_metadata(
+                claimed["session_id"],
+                Message(role="assistant", content=claimed["content"]),
+                claimed.get("metadata_updates") or {}
+            )
+            if claimed.get("transition"):
+                await flow_events.publish(PhaseTransition(**claimed["transition"]))
+        streams_recovered_total.inc()
+        return claimed
+
+    async def recover_abandoned(self, session_id: str) -> int:
+        """Recover stale streams of a session (before it takes its next turn)"""
+        recovered = 0
+        cutoff = datetime.utcnow() - timedelta(seconds=STREAM_STALE_AFTER_SECONDS)
+        async for document in self.collection.find(
+            {"session_id": session_id, "status": STREAMING, "updated_at": {"$lt": cutoff}}
+        ):
+            if document["stream_id"] not in self._live and await self.recover(document):
+                recovered += 1
+        return recovered
+
+    def _prune(self) -> None:
+        """Forget finished streams after STREAM_LIVE_RETENTION_SECONDS (readers then use Mongo)"""
+        cutoff = time.monotonic() - STREAM_LIVE_RETENTION_SECONDS
+        for stream_id, live in list(self._live.items()):
+            if live.finished_at is not None and live.finished_at < cutoff:
+                del self._live[stream_id]
+
+    async def stop(self):
+        """Cancel running generations; their producers save what they have"""
+        for task in list(self._tasks):
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+# Global stream service instance
+stream_service = StreamService()
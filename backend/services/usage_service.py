@@ -0,0 +1,108 @@
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from config.database import db
+from config.constants import USAGE_ROLLUPS_COLLECTION, USAGE_FLUSH_INTERVAL_SECONDS
+from services.ai_service import LLMUsage
+from utils.bulk_writes import CounterBuffer
+from utils.periodic import PeriodicTask
+from utils.metrics import metrics
+
+GUEST_KEY = "guest"
+USAGE_DIMENSIONS = ("all", "role", "user")
+USAGE_FIELDS = ("requests", "prompt_tokens", "cached_prompt_tokens", "completion_tokens", "cost", "latency_ms", "ttft_ms")
+
+usage_tokens_total = metrics.counter("llm_usage_tokens_total", "LLM tokens by role and kind")
+usage_cost_total = metrics.counter("llm_usage_cost_total", "Provider-reported LLM cost by role")
+usage_flushes_total = metrics.counter("usage_rollup_flushes_total", "Usage rollup batch writes, by outcome")
+
+RollupKey = Tuple[str, str, str]  # (day, dimension, key)
+
+
+class UsageService:
+    """
+    Daily usage rollups per role, per user and overall.
+
+    record() only adds to an in-memory buffer; a background task flushes the
+    buffer as one unordered bulk_write of $inc upserts, so accounting never adds
+    a database round trip to a chat turn. Per-session totals ride along with the
+    message write (see LLMUsage.metadata_increments).
+    """
+
+    def __init__(self, flush_interval: float = USAGE_FLUSH_INTERVAL_SECONDS):
+        self.flush_interval = flush_interval
+        self._buffer = CounterBuffer(
+            "Usage rollup",
+            lambda rollup_key: dict(zip(("day", "dimension", "key"), rollup_key)),
+            usage_flushes_total,
+            field_prefix="totals."
+        )
+        self._flusher = PeriodicTask("Usage rollup flush", self.flush, lambda: self.flush_interval)
+
+    @property
+    def collection(self):
+        return db.get_collection(USAGE_ROLLUPS_COLLECTION)
+
+    async def ensure_indexes(self):
+        """One rollup document per day, dimension and key"""
+        await self.collection.create_index([("day", 1), ("dimension", 1), ("key", 1)], unique=True)
+
+    def record(self, role_id: Optional[str], user_email: Optional[str], usage: LLMUsage) -> None:
+        """Buffer one upstream call's usage (no I/O)"""
+        if not usage.latency_ms:
+            return  # The call never completed
+        role_id = role_id or "unknown"
+        totals = usage.totals()
+        day = datetime.utcnow().strftime("%Y-%m-%d")
+        for dimension, key in (("all", "all"), ("role", role_id), ("user", user_email or GUEST_KEY)):
+            for field, value in totals.items():
+                self._buffer.add((day, dimension, key), field, value)
+
+        if usage.reported:
+            usage_tokens_total.inc(usage.prompt_tokens, role=role_id, kind="prompt")
+            usage_tokens_total.inc(usage.completion_tokens, role=role_id, kind="completion")
+            usage_cost_total.inc(usage.cost, role=role_id)
+
+    def pending_totals(self, dimension: str, day: str) -> Dict[str, Dict[str, float]]:
+        """Buffered (not yet flushed) totals of one day, per key of a dimension"""
+        return {
+            key: totals
+            for (pending_day, pending_dimension, key), totals in self._buffer.pending.items()
+            if pending_day == day and pending_dimension == dimension
+        }
+
+    async def flush(self) -> int:
+        """Write buffered counters; returns the number of rollup documents touched"""
+        return await self._buffer.flush(self.collection)
+
+    def start(self):
+        """Start the periodic flusher (called from the app lifespan)"""
+        self._flusher.start()
+
+    async def stop(self):
+        """Stop the flusher and write whatever is still buffered"""
+        await self._flusher.stop()
+        await self.flush()
+
+    async def get_usage(self, group_by: str, days: int) -> List[dict]:
+        """Usage totals per key of a dimension over the last `days` days, heaviest first"""
+        await self.flush()
+        since = (datetime.utcnow() - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+        pipeline = [
+            {"$match": {"dimension": group_by, "day": {"$gte": since}}},
+            {"$group": {
+                "_id": "$key",
+                **{field: {"$sum": f"$totals.{field}"} for field in USAGE_FIELDS},
+                "first_day": {"$min": "$day"},
+                "last_day": {"$max": "$day"},
+            }},
+        ]
+        rows = []
+        async for row in self.collection.aggregate(pipeline):
+            row["key"] = row.pop("_id")
+            row["total_tokens"] = row["prompt_tokens"] + row["completion_tokens"]
+            rows.append(row)
+        rows.sort(key=lambda row: row["total_tokens"], reverse=True)
+        return rows
+
+# Global usage service instance
+usage_service = UsageService()
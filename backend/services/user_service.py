@@ -11,9 +11,9 @@ class UserService:
     def __init__(self):
         self.collection_name = USERS_COLLECTION
     
-    def _get_collection(self):
+    def _get_collection(self, read_only: bool = False):
         """Get collection with proper error handling"""
-        return db.get_collection(self.collection_name)
+        return db.get_collection(self.collection_name, read_only)
     
     async def create_user(self, email: str, password: str, name: Optional[str] = None) -> Dict[str, Any]:
         """Create new user account"""
@@ -67,9 +67,9 @@ class UserService:
         
         return user
     
-    async def get_user_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+    async def get_user_by_email(self, email: str, read_only: bool = False) -> Optional[Dict[str, Any]]:
         """Get user by email"""
-        collection = self._get_collection()
+        collection = self._get_collection(read_only)
         return await collection.find_one({"email": email})
     
     async def get_user_profile(self, email: str) -> UserResponse:
@@ -90,9 +90,9 @@ class UserService:
             {"$addToSet": {"sessions": session_id}}  # addToSet prevents duplicates
         )
     
-    async def get_user_sessions(self, email: str) -> List[str]:
+    async def get_user_sessions(self, email: str, read_only: bool = False) -> List[str]:
         """Get all session IDs for a user"""
-        user = await self.get_user_by_email(email)
+        user = await self.get_user_by_email(email, read_only)
         return user.get("sessions", []) if user else []
     
     async def update_user_profile(self, email: str, name: Optional[str] = None) -> UserResponse:
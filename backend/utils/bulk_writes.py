@@ -0,0 +1,68 @@
+# Buffered counters written with unordered bulk_write, and their retry bookkeeping
+from datetime import datetime
+from typing import Any, Callable, Dict, Hashable, List
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+
+def unapplied(error: Exception, count: int) -> List[int]:
+    """
+    Indexes of the operations an unordered bulk_write of `count` operations did
+    not apply. A BulkWriteError lists the failed ones; the others were written
+    and must not be retried ($inc/$push would apply twice). After any other
+    error nothing is known to have been written, so all of them.
+    """
+    if isinstance(error, BulkWriteError):
+        return sorted({write_error["index"] for write_error in error.details.get("writeErrors", [])})
+    return list(range(count))
+
+
+class CounterBuffer:
+    """
+    Additive counters per rollup document, kept in memory and written as one
+    unordered bulk_write of $inc upserts. A failed write puts back only the
+    documents it did not update, so a retry never counts anything twice.
+    """
+
+    def __init__(self, name: str, document_filter: Callable[[Any], Dict[str, Any]], flushes_total, field_prefix: str = ""):
+        self.name = name  # For log lines, e.g. "Usage rollup"
+        self.document_filter = document_filter  # Rollup key -> the filter of its document
+        self.flushes_total = flushes_total  # Counter metric, labelled by outcome
+        self.field_prefix = field_prefix
+        self.pending: Dict[Hashable, Dict[str, float]] = {}
+
+    def add(self, key: Hashable, field: str, amount: float = 1) -> None:
+        bucket = self.pending.setdefault(key, {})
+        bucket[field] = bucket.get(field, 0) + amount
+
+    def clear(self) -> None:
+        self.pending.clear()
+
+    async def flush(self, collection) -> int:
+        """Write the buffered counters; returns the number of rollup documents updated"""
+        if not self.pending:
+            return 0
+        pending, self.pending = self.pending, {}
+        keys = list(pending)
+        now = datetime.utcnow()
+        operations = [
+            UpdateOne(
+                self.document_filter(key),
+                {"$inc": {f"{self.field_prefix}{field}": value for field, value in pending[key].items()}, "$set": {"updated_at": now}},
+                upsert=True
+            )
+            for key in keys
+        ]
+        try:
+            await collection.bulk_write(operations, ordered=False)
+        except Exception as e:
+            # Put back only the counters that were not written, in front of anything added meanwhile
+            failed = unapplied(e, len(operations))
+            for index in failed:
+                for field, value in pending[keys[index]].items():
+                    self.add(keys[index], field, value)
+            self.flushes_total.inc(outcome="error")
+            print(f"{self.name} flush failed for {len(failed)} of {len(operations)} documents: {e}")
+            return len(operations) - len(failed)
+        self.flushes_total.inc(outcome="ok")
+        return len(operations)
@@ -0,0 +1,82 @@
+# MinHash signatures and LSH banding for near-duplicate detection of short texts
+import random
+import re
+import zlib
+from collections import defaultdict
+from typing import Dict, Hashable, Iterable, List, Set, Tuple
+
+Signature = Tuple[int, ...]
+
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def normalize(text: str) -> str:
+    """Lowercase words only: punctuation, case and spacing don't matter"""
+    return " ".join(_WORD.findall(text.casefold()))
+
+
+def shingles(text: str, k: int = 4) -> Set[str]:
+    """Character k-grams of the normalized text (robust for short answers)"""
+    text = normalize(text)
+    if len(text) <= k:
+        return {text} if text else set()
+    return {text[i:i + k] for i in range(len(text) - k + 1)}
+
+
+class MinHasher:
+    """Fixed family of num_perm universal hash functions (deterministic for a seed)"""
+
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self._params = [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(num_perm)]
+
+    def signature(self, items: Iterable[str]) -> Signature:
+        hashes = [zlib.crc32(item.encode()) for item in items]
+        if not hashes:
+            return (_MAX_HASH,) * self.num_perm
+        return tuple(min(((a * h + b) % _PRIME) & _MAX_HASH for h in hashes) for a, b in self._params)
+
+    @staticmethod
+    def similarity(first: Signature, second: Signature) -> float:
+        """Estimated Jaccard similarity of the underlying sets"""
+        return sum(1 for x, y in zip(first, second) if x == y) / len(first)
+
+
+class LSHIndex:
+    """
+    Banded LSH over MinHash signatures: keys whose signatures agree on every row
+    of at least one band become candidates. Buckets are namespaced, so unrelated
+    entries never collide.
+    """
+
+    def __init__(self, num_perm: int = 64, bands: int = 16):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.bands = bands
+        self.rows = num_perm // bands
+        self._buckets: Dict[tuple, Set[Hashable]] = defaultdict(set)
+
+    def _band_keys(self, namespace: Hashable, signature: Signature) -> List[tuple]:
+        rows = self.rows
+        return [(namespace, band, signature[band * rows:(band + 1) * rows]) for band in range(self.bands)]
+
+    def add(self, key: Hashable, namespace: Hashable, signature: Signature) -> None:
+        for band_key in self._band_keys(namespace, signature):
+            self._buckets[band_key].add(key)
+
+    def remove(self, key: Hashable, namespace: Hashable, signature: Signature) -> None:
+        for band_key in self._band_keys(namespace, signature):
+            bucket = self._buckets.get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band_key]
+
+    def candidates(self, namespace: Hashable, signature: Signature) -> Set[Hashable]:
+        found: Set[Hashable] = set()
+        for band_key in self._band_keys(namespace, signature):
+            found.update(self._buckets.get(band_key, ()))
+        return found
@@ -0,0 +1,95 @@
+# pymongo event listeners feeding the metrics registry (connection pool + commands)
+from typing import Any, Dict
+from pymongo import monitoring
+from utils.metrics import metrics
+
+pool_connections = metrics.gauge("mongo_pool_connections", "Open connections in the pool, by server")
+pool_checked_out = metrics.gauge("mongo_pool_checked_out", "Connections currently checked out, by server")
+pool_wait_queue = metrics.gauge("mongo_pool_wait_queue", "Operations waiting for a connection, by server")
+pool_checkout_wait = metrics.histogram(
+    "mongo_pool_checkout_wait_seconds", "Time spent waiting to check out a connection",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+)
+pool_checkout_failures = metrics.counter("mongo_pool_checkout_failures_total", "Failed connection checkouts, by reason")
+pool_cleared_total = metrics.counter("mongo_pool_cleared_total", "Pool clears (e.g. after a network error), by server")
+command_duration = metrics.histogram(
+    "mongo_command_seconds", "MongoDB command round-trip time, by command",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+)
+command_failures = metrics.counter("mongo_command_failures_total", "Failed MongoDB commands, by command")
+
+
+def _server(address) -> str:
+    host, port = address
+    return f"{host}:{port}"
+
+
+class PoolMetricsListener(monitoring.ConnectionPoolListener):
+    """
+    Connection counts and checkout wait time. Listeners run on the driver's
+    threads, so they only touch the (thread-safe) metrics registry.
+    """
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pool_cleared_total.inc(server=_server(event.address))
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        pool_connections.inc(server=_server(event.address))
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        pool_connections.dec(server=_server(event.address))
+
+    def connection_check_out_started(self, event):
+        pool_wait_queue.inc(server=_server(event.address))
+
+    def connection_check_out_failed(self, event):
+        pool_wait_queue.dec(server=_server(event.address))
+        pool_checkout_failures.inc(reason=str(event.reason))
+
+    def connection_checked_out(self, event):
+        server = _server(event.address)
+        pool_wait_queue.dec(server=server)
+        pool_checked_out.inc(server=server)
+        # `duration` (seconds) is reported by pymongo >= 4.7
+        duration = getattr(event, "duration", None)
+        if duration is not None:
+            pool_checkout_wait.observe(duration)
+
+    def connection_checked_in(self, event):
+        pool_checked_out.dec(server=_server(event.address))
+
+
+class CommandMetricsListener(monitoring.CommandListener):
+    """Per-command latency and failures"""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        command_duration.observe(event.duration_micros / 1_000_000, command=event.command_name)
+
+    def failed(self, event):
+        command_duration.observe(event.duration_micros / 1_000_000, command=event.command_name)
+        command_failures.inc(command=event.command_name)
+
+
+def pool_stats() -> Dict[str, Dict[str, Any]]:
+    """Current pool gauges per server (for /health)"""
+    stats: Dict[str, Dict[str, Any]] = {}
+    for name, gauge in (("connections", pool_connections), ("checked_out", pool_checked_out),
+                        ("waiting", pool_wait_queue)):
+        for labels, value in gauge.series():
+            stats.setdefault(labels.get("server"), {})[name] = int(value)
+    return stats
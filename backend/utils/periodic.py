@@ -0,0 +1,42 @@
+# Background loops of the services (flushers, pollers, reconcilers)
+import asyncio
+from typing import Any, Awaitable, Callable, Optional
+
+
+class PeriodicTask:
+    """
+    Runs `step` every `interval()` seconds in a background task. The interval is
+    read before each sleep, so runtime setting changes apply to the next round.
+    An exception is logged and the loop carries on. With `immediate` the first
+    step runs at start instead of after the first interval.
+    """
+
+    def __init__(self, name: str, step: Callable[[], Awaitable[Any]], interval: Callable[[], float], immediate: bool = False):
+        self.name = name  # For log lines, e.g. "Quota reconcile"
+        self.step = step
+        self.interval = interval
+        self.immediate = immediate
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        if not self.immediate:
+            await asyncio.sleep(self.interval())
+        while True:
+            try:
+                await self.step()
+            except Exception as e:
+                print(f"{self.name} failed: {e}")
+            await asyncio.sleep(self.interval())
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,36 @@
+# Fast JSON responses for large payloads (transcripts, session listings)
+import json
+from datetime import date, datetime
+from typing import Any
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from utils.fast_json import orjson
+
+
+def _default(obj: Any) -> Any:
+    """Encode the types Mongo documents and our models contain"""
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    if isinstance(obj, (datetime, date)):
+        # Only reached on the stdlib path; orjson encodes datetimes natively
+        return obj.isoformat()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered with orjson when installed (stdlib json otherwise).
+
+    Return it directly from an endpoint to skip FastAPI's jsonable_encoder pass,
+    which dominates the cost of long message lists.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+        return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
@@ -0,0 +1,129 @@
+# Request coalescing: concurrent identical calls share one execution
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+from utils.metrics import metrics
+
+singleflight_calls_total = metrics.counter("singleflight_calls_total", "Calls through a single-flight group, by group and role (leader/shared)")
+singleflight_overflows_total = metrics.counter("singleflight_overflows_total", "Streams that stopped accepting subscribers at the buffer limit")
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one awaitable. The call
+    is forgotten as soon as it finishes, so this never serves stale results.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[str, asyncio.Task] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.create_task(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+            singleflight_calls_total.inc(group=self.name, role="leader")
+        else:
+            singleflight_calls_total.inc(group=self.name, role="shared")
+        # One caller going away must not cancel the call for the others
+        return await asyncio.shield(task)
+
+    def _finished(self, key: str, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()  # Retrieved here in case every caller was cancelled
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+
+class _Flight:
+    """One upstream stream and everything it produced so far"""
+
+    def __init__(self):
+        self.items: List[Any] = []
+        self.size = 0
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self.task: Optional[asyncio.Task] = None
+        self._changed = asyncio.Event()
+
+    def notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def wait(self) -> None:
+        await self._changed.wait()
+
+
+class SingleFlightStream:
+    """
+    Fans one upstream async iterator out to every concurrent subscriber with
+    the same key. Late subscribers replay from the start, so items are buffered
+    until the last subscriber finishes; once a stream has buffered max_buffer
+    units (characters for str/bytes items) it stops taking new subscribers,
+    which start their own upstream instead. The upstream is cancelled if every
+    subscriber leaves early.
+    """
+
+    def __init__(self, name: str, max_buffer: int):
+        self.name = name
+        self.max_buffer = max_buffer
+        self._flights: Dict[str, _Flight] = {}
+
+    async def subscribe(self, key: str, factory: Callable[[], AsyncIterator[Any]]) -> AsyncIterator[Any]:
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = self._flights[key] = _Flight()
+            flight.task = asyncio.create_task(self._pump(key, flight, factory()))
+            singleflight_calls_total.inc(group=self.name, role="leader")
+        else:
+            singleflight_calls_total.inc(group=self.name, role="shared")
+
+        flight.subscribers += 1
+        index = 0
+        try:
+            while True:
+                while index < len(flight.items):
+                    yield flight.items[index]
+                    index += 1
+                if flight.done:
+                    if flight.error is not None:
+                        raise flight.error
+                    return
+                await flight.wait()
+        finally:
+            flight.subscribers -= 1
+            if flight.subscribers == 0:
+                self._forget(key, flight)
+                if not flight.done:
+                    flight.task.cancel()
+
+    async def _pump(self, key: str, flight: _Flight, source: AsyncIterator[Any]) -> None:
+        try:
+            async for item in source:
+                flight.items.append(item)
+                flight.size += len(item) if isinstance(item, (str, bytes)) else 1
+                if flight.size > self.max_buffer and self._flights.get(key) is flight:
+                    self._forget(key, flight)
+                    singleflight_overflows_total.inc(group=self.name)
+                flight.notify()
+        except Exception as e:
+            flight.error = e
+        finally:
+            flight.done = True
+            self._forget(key, flight)
+            flight.notify()
+            aclose = getattr(source, "aclose", None)
+            if aclose is not None:
+                await aclose()
+
+    def _forget(self, key: str, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def __len__(self) -> int:
+        return len(self._flights)
@@ -0,0 +1,159 @@
+# Incremental Server-Sent Events decoder for upstream LLM streams
+from typing import List, Optional
+from utils import fast_json
+from utils.metrics import metrics
+
+DONE = b"[DONE]"
+
+sse_frames_total = metrics.counter("llm_sse_frames_total", "SSE frames received from the LLM provider, by outcome")
+
+
+class UpstreamStreamError(Exception):
+    """The provider reported an error inside an otherwise successful stream"""
+    pass
+
+
+class SSEDecoder:
+    """
+    Decodes raw byte chunks into SSE event payloads.
+
+    Handles CRLF/LF/CR line endings, multi-line `data:` fields, `:` keep-alive
+    comments and frames split across network chunks. Counts every frame by
+    outcome instead of silently dropping the ones it can't use.
+    """
+
+    def __init__(self):
+        self._buffer = b""
+        self._data: Optional[bytes] = None
+        self._pending_cr = False
+        self.usage: Optional[dict] = None  # Last usage block seen (sent in the final chunk)
+        self.stats = {
+            "events": 0,        # Complete data events dispatched
+            "content": 0,       # Events that carried a content delta
+            "keepalive": 0,     # ":" comment lines
+            "non_content": 0,   # Well-formed chunks without text (role, usage, finish_reason)
+            "malformed": 0,     # Unparseable JSON or unexpected chunk shape
+            "unknown_field": 0, # Lines that are not data/event/id/retry/comment
+            "dropped": 0,       # Partial frame left over when the stream ended
+        }
+
+    def feed(self, chunk: bytes) -> List[bytes]:
+        """Consume a chunk of bytes, returning the data of every event it completes"""
+        if self._pending_cr:
+            chunk = b"\r" + chunk
+            self._pending_cr = False
+        if chunk.endswith(b"\r"):
+            # Could be the first half of a CRLF split across chunks
+            chunk = chunk[:-1]
+            self._pending_cr = True
+        if b"\r" in chunk:
+            chunk = chunk.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+
+        lines = (self._buffer + chunk).split(b"\n")
+        self._buffer = lines.pop()
+
+        events = []
+        for line in lines:
+            if not line:
+                if self._data is not None:
+                    events.append(self._data)
+                    self._data = None
+                continue
+            if line[0] == 0x3A:  # ":" comment / keep-alive
+                self.stats["keepalive"] += 1
+                continue
+
+            field, _, value = line.partition(b":")
+            if value[:1] == b" ":
+                value = value[1:]
+            if field == b"data":
+                self._data = value if self._data is None else self._data + b"\n" + value
+            elif field not in (b"event", b"id", b"retry"):
+                self.stats["unknown_field"] += 1
+
+        self.stats["events"] += len(events)
+        return events
+
+    def flush(self) -> List[bytes]:
+        """Dispatch whatever is left once the stream has closed"""
+        events = self.feed(b"\n\n") if self._pending_cr or self._buffer or self._data is not None else []
+        self._pending_cr = False
+        return events
+
+    def extract_content(self, data: bytes) -> Optional[str]:
+        """Return choices[0].delta.content of an event, or None if it carries no text"""
+        if data[:1] != b"{":
+            self.stats["malformed"] += 1
+            return None
+        if b'"content"' not in data:
+            # Role-only, usage-only and error chunks never carry text; only parse
+            # the ones that might hold a usage block or an error object
+            if b'"error"' in data or b'"usage"' in data:
+                self._inspect_non_content(data)
+            else:
+                self.stats["non_content"] += 1
+            return None
+
+        try:
+            chunk = fast_json.loads(data)
+        except ValueError:
+            self.stats["malformed"] += 1
+            return None
+
+        if isinstance(chunk, dict):
+            self._check_error(chunk)
+        try:
+            content = chunk["choices"][0]["delta"].get("content")
+        except (KeyError, IndexError, TypeError, AttributeError):
+            self.stats["malformed"] += 1
+            return None
+
+        if chunk.get("usage"):
+            self.usage = chunk["usage"]
+        if content:
+            self.stats["content"] += 1
+        return content or None
+
+    def _inspect_non_content(self, data: bytes) -> None:
+        """Raise for a top-level error object, keep a usage block, count anything else as non-content"""
+        try:
+            chunk = fast_json.loads(data)
+        except ValueError:
+            self.stats["malformed"] += 1
+            return
+        if not isinstance(chunk, dict):
+            self.stats["malformed"] += 1
+            return
+        self._check_error(chunk)
+        if isinstance(chunk.get("usage"), dict):
+            self.usage = chunk["usage"]
+        self.stats["non_content"] += 1
+
+    @staticmethod
+    def _check_error(chunk: dict) -> None:
+        """
+        Raise for a mid-stream provider error: a top-level error object (OpenRouter
+        sends it alongside an empty delta) or finish_reason "error". The word
+        "error" inside a string or a nested field is not a failure.
+        """
+        error = chunk.get("error")
+        if isinstance(error, dict):
+            raise UpstreamStreamError(f"Upstream stream error: {error.get('message', 'unknown error')}")
+        try:
+            finish_reason = chunk["choices"][0].get("finish_reason")
+        except (KeyError, IndexError, TypeError, AttributeError):
+            return
+        if finish_reason == "error":
+            raise UpstreamStreamError("Upstream stream error: finish_reason error")
+
+    def close(self) -> None:
+        """Account for leftover partial frames and publish counters"""
+        if self._buffer or self._data is not None:
+            self.stats["dropped"] += 1
+            self._buffer = b""
+            self._data = None
+        for outcome, count in self.stats.items():
+            if count:
+                sse_frames_total.inc(count, outcome=outcome)
+        if self.stats["malformed"] or self.stats["dropped"]:
+            print(f"SSE stream had {self.stats['malformed']} malformed and {self.stats['dropped']} dropped frames")
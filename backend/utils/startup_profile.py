@@ -0,0 +1,51 @@
+# Worker boot timing: how long imports and each startup step took
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator
+from utils.metrics import metrics
+
+startup_phase_seconds = metrics.gauge("startup_phase_seconds", "Worker boot time, by phase")
+
+
+class StartupProfile:
+    """
+    Phases of one worker boot. Importing this module starts the clock, so
+    app.py imports it first and marks the end of its own imports; the lifespan
+    wraps each startup step in phase(). `python -m benchmarks.startup` gives
+    the per-module import breakdown.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._last_mark = self.started
+        self.phases: Dict[str, float] = {}
+
+    def mark(self, name: str) -> None:
+        """Record the time since the previous mark as phase `name`"""
+        now = time.perf_counter()
+        self._record(name, now - self._last_mark)
+        self._last_mark = now
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._record(name, time.perf_counter() - started)
+            self._last_mark = time.perf_counter()
+
+    def _record(self, name: str, seconds: float) -> None:
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+        startup_phase_seconds.set(self.phases[name], phase=name)
+
+    def ready(self) -> float:
+        """Log the breakdown once the worker can serve; returns the total boot time"""
+        total = time.perf_counter() - self.started
+        startup_phase_seconds.set(total, phase="total")
+        breakdown = ", ".join(f"{name} {seconds * 1000:.0f}ms" for name, seconds in self.phases.items())
+        print(f"🚀 Worker ready in {total * 1000:.0f}ms ({breakdown})")
+        return total
+
+# Global startup profile instance
+startup_profile = StartupProfile()
@@ -0,0 +1,124 @@
+# Compact binary encoding for message arrays that are stored but rarely read
+import zlib
+from collections import Counter
+from typing import Any, Dict, List, Optional
+import bson
+
+try:
+    import zstandard
+except ImportError:  # Optional dependency
+    zstandard = None
+
+MAGIC = b"TX"
+FORMAT_VERSION = 1
+
+# Codec ids (header byte 3)
+CODEC_ZLIB = 1
+CODEC_ZSTD = 2
+CODECS = {"zlib": CODEC_ZLIB, "zstd": CODEC_ZSTD}
+CODEC_NAMES = {codec: name for name, codec in CODECS.items()}
+
+# Layout version of the `transcript` subdocument written by pack_transcript
+TRANSCRIPT_LAYOUT_VERSION = 1
+
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 10
+
+
+class TranscriptFormatError(ValueError):
+    """Raised for blobs this version of the codec can't read"""
+    pass
+
+
+def resolve_codec(name: Optional[str] = None) -> int:
+    """Codec id for a name; 'auto' (or None) prefers zstd when installed"""
+    if name in (None, "auto"):
+        return CODEC_ZSTD if zstandard is not None else CODEC_ZLIB
+    if name not in CODECS:
+        raise ValueError(f"Unknown transcript codec '{name}'. Use one of: auto, {', '.join(CODECS)}")
+    if name == "zstd" and zstandard is None:
+        raise ValueError("Transcript codec 'zstd' requires the optional 'zstandard' package")
+    return CODECS[name]
+
+
+def _compress(payload: bytes, codec: int) -> bytes:
+    if codec == CODEC_ZSTD:
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(payload)
+    return zlib.compress(payload, ZLIB_LEVEL)
+
+
+def _decompress(payload: bytes, codec: int) -> bytes:
+    if codec == CODEC_ZLIB:
+        return zlib.decompress(payload)
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise TranscriptFormatError("Transcript is zstd-compressed but 'zstandard' is not installed")
+        return zstandard.ZstdDecompressor().decompress(payload)
+    raise TranscriptFormatError(f"Unsupported transcript codec {codec}")
+
+
+def encode_messages(messages: List[Dict[str, Any]], codec: Optional[int] = None) -> bytes:
+    """
+    Encode a messages array as MAGIC | version | codec | compressed BSON.
+
+    BSON keeps datetimes and other Mongo types intact, so decoding returns
+    exactly what find() would have returned for the plain array.
+    """
+    return _encode(bson.encode({"messages": messages}), codec or resolve_codec())
+
+
+def _encode(payload: bytes, codec: int) -> bytes:
+    return MAGIC + bytes([FORMAT_VERSION, codec]) + _compress(payload, codec)
+
+
+def decode_messages(blob: bytes) -> List[Dict[str, Any]]:
+    """Inverse of encode_messages"""
+    blob = bytes(blob)
+    if len(blob) < 4 or blob[:2] != MAGIC:
+        raise TranscriptFormatError("Not a transcript blob")
+    version, codec = blob[2], blob[3]
+    if version != FORMAT_VERSION:
+        raise TranscriptFormatError(f"Unsupported transcript format version {version}")
+    return bson.decode(_decompress(blob[4:], codec))["messages"]
+
+
+def pack_transcript(messages: List[Dict[str, Any]], codec_name: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Compressed transcript subdocument: the blob plus a small uncompressed header
+    that answers the common questions (how long, when, how big) without decoding.
+    """
+    codec = resolve_codec(codec_name)
+    payload = bson.encode({"messages": messages})
+    blob = _encode(payload, codec)
+    timestamps = [message["timestamp"] for message in messages if message.get("timestamp")]
+    return {
+        "layout": TRANSCRIPT_LAYOUT_VERSION,
+        "header": {
+            "codec": CODEC_NAMES[codec],
+            "message_count": len(messages),
+            "roles": dict(Counter(message.get("role") for message in messages)),
+            "first_at": min(timestamps) if timestamps else None,
+            "last_at": max(timestamps) if timestamps else None,
+            "raw_bytes": len(payload),
+            "stored_bytes": len(blob),
+        },
+        "blob": blob,
+    }
+
+
+def unpack_transcript(transcript: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Messages of a pack_transcript subdocument"""
+    layout = transcript.get("layout")
+    if layout != TRANSCRIPT_LAYOUT_VERSION:
+        raise TranscriptFormatError(f"Unsupported transcript layout {layout}")
+    return decode_messages(transcript["blob"])
+
+
+def document_messages(document: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Full messages array of a session document, whichever way it is stored"""
+    if "transcript" in document:
+        return unpack_transcript(document["transcript"])
+    if "messages_blob" in document:
+        # Archives written before transcripts carried a header
+        return decode_messages(document["messages_blob"])
+    return document.get("messages", [])